@@ -1,157 +1,443 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QListWidgetItem, QMessageBox, QStyle
+from todo_startup import PROFILE_FLAG, run_profile, startup  # 啟動計時，需在其他模組之前匯入
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QListWidgetItem, QMessageBox, QStyle, QAbstractItemView,
+                             QActionGroup, QFileDialog, QDialog, QDialogButtonBox, QHeaderView, QLabel,
+                             QLineEdit, QListWidget, QStyledItemDelegate, QTableWidget, QTableWidgetItem,
+                             QVBoxLayout)
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5 import QtGui
 from v_todo_ui import Ui_MainWindow  # 引入生成的界面文件
 import queue
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer
+from collections import deque
 import json
-import opencc
-from ckip_transformers.nlp import CkipWordSegmenter
-import cn2an
-import re
+import os
 import sqlite3
-
-
-def init_db():
-    """初始化 SQLite 資料庫"""
-    conn = sqlite3.connect("todo.db")
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON")
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category_id INTEGER,
-            name TEXT,
-            completed INTEGER DEFAULT 0,
-            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# 初始化轉換器（s2t 代表簡體轉繁體）
-converter = opencc.OpenCC('s2t')
-# 初始化繁體中文分詞模型
-ws_driver = CkipWordSegmenter(model="bert-base")
-
-def convert_simplified_to_traditional(text):
-    """將簡體中文轉為繁體"""
-    return converter.convert(text)
-
-def convert_chinese_numbers(text):
-    """根據分詞結果，轉換時間格式及數字"""
-    tokens = ws_driver([text])[0]
-    
-    converted_tokens = []
-    chinese_number_pattern = re.compile(r'[零一二三四五六七八九十百千萬億]+')
-
-    # 時間詞對應表
-    time_mapping = {
-        "一點": "1點", "二點": "2點", "兩點": "2點", "三點": "3點", "四點": "4點",
-        "五點": "5點", "六點": "6點", "七點": "7點", "八點": "8點", "九點": "9點",
-        "十點": "10點", "十一點": "11點", "十二點": "12點",
-        "三十分": "30分", "十五分": "15分", "四十五分": "45分"
-    }
-
-    for i, raw_token in enumerate(tokens):
-        # 先去除前後空白
-        token = raw_token.strip()
-        if not token:
-            continue
-
-        # 檢查是否在 time_mapping
-        if token in time_mapping:
-            converted_token = time_mapping[token]
-        elif re.search(r"[點時分]", token):  # 檢查是否為時間詞
-            parts = re.split(r"([點時分])", token)
-            arabic_time_parts = []
-            for part in parts:
-                if chinese_number_pattern.fullmatch(part):
-                    try:
-                        arabic_time_parts.append(str(cn2an.transform(part, "cn2an")))
-                    except ValueError:
-                        arabic_time_parts.append(part)
-                else:
-                    arabic_time_parts.append(part)
-            converted_token = "".join(arabic_time_parts)  # 重新組合
-        elif chinese_number_pattern.fullmatch(token):
-            try:
-                converted_token = str(cn2an.transform(token, "cn2an"))
-            except ValueError:
-                converted_token = token
+import time
+from todo_archive import Archiver, format_time
+from todo_asr import BACKENDS, SpeechDecoder, load_backend
+from todo_audio import AudioImporter
+from todo_config import ProfileManager, load_config
+from todo_engine import TodoEngine, result_confidence
+from todo_history import CommandHistory
+from todo_memory import format_bytes, memory, rss_bytes
+import todo_nlp  # noqa: F401  登記分詞模型（第一次使用時才載入），由記憶體管理預先載入與卸載
+from todo_reminders import ReminderScheduler, extract_due, format_due
+
+startup.mark("匯入模組")
+
+PREFETCH_ON_START = 5  # 啟動時預取的分類數量
+MAX_REMINDER_WAIT = 3600  # 提醒計時器單次最長等待秒數，超過時到點後重新設定
+AUDIO_IMPORT_POLL = 100  # 毫秒，檢查語音檔辨識結果的間隔
+COMMAND_POLL = 10  # 毫秒，檢查背景分詞結果的間隔
+SPEECH_POLL = 100  # 毫秒，收音中辨識已收到的音訊並更新部分結果的間隔
+COUNTS_ROLE = Qt.UserRole + 1  # 分類列表項目上的 (完成數, 項目數)
+ARCHIVE_POLL = 200  # 毫秒，還有項目待封存時兩批之間的間隔（讓出寫入鎖與事件迴圈）
+ARCHIVE_INTERVAL = 3600 * 1000  # 毫秒，封存完畢後下次檢查的間隔
+NOTICE_DURATION = 2000  # 毫秒，通知顯示的時間
+NOTICE_MIN_DURATION = 700  # 毫秒，後面還有通知排隊時，每則至少顯示的時間
+NOTICE_QUEUE = 5  # 最多排隊的通知數，超過時捨棄最舊、優先順序最低的一則
+NOTICE_ECHO, NOTICE_INFO, NOTICE_ALERT = range(3)  # 通知的優先順序：辨識出的文字 < 指令結果 < 提醒
+
+
+class CategoryCountDelegate(QStyledItemDelegate):
+    """在分類名稱右側顯示「完成數/項目數」；列表文字仍只有分類名稱"""
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        counts = index.data(COUNTS_ROLE)
+        if counts is None:
+            return
+        completed, total = counts
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.color(QtGui.QPalette.HighlightedText))
         else:
-            converted_token = token
-
-        converted_tokens.append(converted_token)
-
-    converted_text = "".join(converted_tokens)
-
-    # 最終格式化時間, ex: 4點30分 -> 4:30
-    converted_text = re.sub(r'(\d+)點(\d+)分?', r'\1:\2', converted_text)
-    converted_text = re.sub(r'(\d+)時(\d+)分?', r'\1:\2', converted_text)
+            painter.setPen(option.palette.color(QtGui.QPalette.Disabled, QtGui.QPalette.Text))
+        painter.drawText(option.rect.adjusted(0, 0, -8, 0), Qt.AlignRight | Qt.AlignVCenter, f"{completed}/{total}")
+        painter.restore()
+
+
+class CompletedItemDelegate(QStyledItemDelegate):
+    """已勾選的項目以灰色刪除線顯示；樣式依勾選狀態在繪製時決定，字型與顏色只建立一次"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.completed_font = QtGui.QFont(parent.font())
+        self.completed_font.setStrikeOut(True)
+        self.completed_palette = QtGui.QPalette(parent.palette())
+        self.completed_palette.setBrush(QtGui.QPalette.Text, QtGui.QBrush(QtGui.QColor("gray")))
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if index.data(Qt.CheckStateRole) == Qt.Checked:
+            option.font = self.completed_font
+            option.palette = self.completed_palette
+
+
+class Notifier:
+    """語音結果區域的通知佇列：只用一個計時器依序顯示，相同的訊息合併，
+    優先順序較高的訊息立即取代目前顯示的訊息，其餘排隊且有上限"""
+
+    def __init__(self, label, parent):
+        self.label = label
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.show_next)
+        self.queue = deque()  # (優先順序, 文字)，同優先順序依先後
+        self.current = None
+        self.shown_at = 0.0
+
+    def notify(self, text, priority=NOTICE_INFO):
+        # 辨識出的文字只在執行結果出現前有意義，有新訊息時捨棄還沒顯示的
+        self.queue = deque(notice for notice in self.queue if notice[0] != NOTICE_ECHO)
+        if self.current is None or priority > self.current[0]:
+            self.display((priority, text))
+            return
+        if text == self.current[1]:
+            self.timer.start(NOTICE_DURATION)  # 重複的訊息只延長顯示時間
+            return
+        if any(queued == text for _, queued in self.queue):
+            return
+        if len(self.queue) >= NOTICE_QUEUE:
+            self.queue.remove(min(self.queue, key=lambda notice: notice[0]))
+        self.queue.append((priority, text))
+        # 有訊息排隊時，目前的訊息只需顯示到最短時間
+        remaining = NOTICE_MIN_DURATION - (time.monotonic() - self.shown_at) * 1000
+        if self.timer.remainingTime() > remaining:
+            self.timer.start(max(0, int(remaining)))
+
+    def show_next(self):
+        if not self.queue:
+            self.current = None
+            self.label.setVisible(False)
+            return
+        notice = max(self.queue, key=lambda notice: notice[0])  # 同優先順序時取最早的一則
+        self.queue.remove(notice)
+        self.display(notice)
+
+    def display(self, notice):
+        self.current = notice
+        self.shown_at = time.monotonic()
+        self.label.setText(notice[1])
+        self.label.setVisible(True)
+        self.timer.start(NOTICE_MIN_DURATION if self.queue else NOTICE_DURATION)
+
+
+def fill_list(widget, rows):
+    """以 rows 取代列表內容：清空與加入期間暫停訊號與重繪，加完後只重繪一次"""
+    widget.setUpdatesEnabled(False)
+    widget.blockSignals(True)
+    try:
+        widget.clear()
+        for row in rows:
+            widget.addItem(row)
+    finally:
+        widget.blockSignals(False)
+        widget.setUpdatesEnabled(True)
+
+
+class StatsDialog(QDialog):
+    """統計頁面：各分類的項目數、完成數與完成率，直接讀取記憶體中的計數，資料異動時即時更新"""
+
+    COLUMNS = ["分類", "項目數", "已完成", "未完成", "完成率"]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("統計")
+        self.resize(480, 360)
+        layout = QVBoxLayout(self)
+        self.summary = QLabel(self)
+        layout.addWidget(self.summary)
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        store.subscribe(self.on_store_changed)
+        self.refresh()
+
+    def done(self, result):
+        self.store.unsubscribe(self.on_store_changed)
+        super().done(result)
+
+    def on_store_changed(self, event, record, *extra):
+        if event.startswith("category_") or event == "reloaded":
+            self.refresh()
+
+    def refresh(self):
+        categories = sorted(self.store.categories.values(), key=lambda category: category.name)
+        total = sum(category.total for category in categories)
+        completed = sum(category.completed for category in categories)
+
+        def rate(done, count):
+            return f"{done / count:.0%}" if count else "-"
+
+        self.summary.setText(f"{len(categories)} 個分類，共 {total} 個項目，"
+                             f"已完成 {completed} 個（{rate(completed, total)}）")
+        self.table.setRowCount(len(categories))
+        for r, category in enumerate(categories):
+            values = [category.name, category.total, category.completed,
+                      category.total - category.completed, rate(category.completed, category.total)]
+            for c, value in enumerate(values):
+                cell = QTableWidgetItem(str(value))
+                if c:
+                    cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(r, c, cell)
+
+
+class MemoryDialog(QDialog):
+    """診斷頁面：目前 RSS、各模型的載入狀態、載入／卸載耗時與 RSS 變化，每秒更新"""
+
+    COLUMNS = ["元件", "狀態", "閒置", "載入次數", "載入耗時", "載入時增加", "卸載耗時", "卸載時釋放"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("記憶體使用")
+        self.resize(760, 240)
+        layout = QVBoxLayout(self)
+        self.summary = QLabel(self)
+        layout.addWidget(self.summary)
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttons.addButton("立即卸載", QDialogButtonBox.ActionRole).clicked.connect(self.unload_now)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def unload_now(self):
+        memory.unload_all()
+        self.refresh()
+
+    def refresh(self):
+        rows = memory.report()
+        total = rss_bytes()
+        models = sum(row["loaded_rss"] or 0 for row in rows if row["loaded"])
+        idle = f"閒置 {memory.idle_timeout:g} 秒後卸載" if memory.idle_timeout else "不自動卸載"
+        other = "-" if total is None else format_bytes(total - models)
+        self.summary.setText(f"目前 RSS：{format_bytes(total)}（已載入模型約 {format_bytes(models)}，"
+                             f"其他 {other}）；{idle}")
+
+        def seconds(value):
+            return "-" if value is None else f"{value * 1000:.0f} ms"
+
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            values = [row["name"], "已載入" if row["loaded"] else "未載入",
+                      f"{row['idle']:.0f} 秒" if row["loaded"] else "-", str(row["loads"]),
+                      seconds(row["load_seconds"]), format_bytes(row["loaded_rss"]),
+                      seconds(row["unload_seconds"]), format_bytes(row["freed_rss"])]
+            for c, value in enumerate(values):
+                self.table.setItem(r, c, QTableWidgetItem(value))
+
+
+class HistoryDialog(QDialog):
+    """完成記錄：最近完成與取消完成的項目（包含已封存的部分）與近 7 天每天完成的數量"""
+
+    COLUMNS = ["時間", "動作", "分類", "項目"]
+    LIMIT = 500
+
+    def __init__(self, archiver, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("完成紀錄")
+        self.resize(560, 420)
+        layout = QVBoxLayout(self)
+        since = time.time() - 7 * 86400
+        daily = "、".join(f"{day[5:]} {count}" for day, count in archiver.daily_counts(since)) or "無"
+        layout.addWidget(QLabel(f"近 7 天完成：{daily}", self))
+        rows = archiver.history(limit=self.LIMIT)
+        table = QTableWidget(len(rows), len(self.COLUMNS), self)
+        table.setHorizontalHeaderLabels(self.COLUMNS)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for r, (at, completed, category, name, _) in enumerate(rows):
+            for c, value in enumerate([format_time(at), "完成" if completed else "取消完成", category or "-", name]):
+                table.setItem(r, c, QTableWidgetItem(value))
+        layout.addWidget(table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+
+class CommandPalette(QDialog):
+    """常用指令：依使用次數與最近使用時間排序，輸入文字篩選，按 Enter 或點兩下執行"""
+
+    LIMIT = 20
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.command = None
+        self.setWindowTitle("常用指令")
+        self.resize(420, 360)
+        layout = QVBoxLayout(self)
+        self.search = QLineEdit(self)
+        self.search.setPlaceholderText("輸入文字篩選，或輸入新的指令")
+        self.search.textChanged.connect(self.refresh)
+        self.search.returnPressed.connect(self.run_selected)
+        layout.addWidget(self.search)
+        self.list = QListWidget(self)
+        self.list.itemActivated.connect(self.run_selected)
+        layout.addWidget(self.list)
+        self.refresh()
+
+    def refresh(self):
+        self.list.clear()
+        query = todo_nlp.convert_simplified_to_traditional(self.search.text())
+        for shortcut in self.history.suggestions(query, self.LIMIT):
+            row = QListWidgetItem(f"{shortcut.key}（{shortcut.uses} 次）")
+            row.setData(Qt.UserRole, shortcut.key)
+            self.list.addItem(row)
+        self.list.setCurrentRow(0)
+
+    def run_selected(self, *args):
+        """執行選取的指令；沒有符合的建議時執行輸入的文字"""
+        row = self.list.currentItem()
+        self.command = row.data(Qt.UserRole) if row is not None else self.search.text().strip()
+        if self.command:
+            self.accept()
 
-    return converted_text
 
 class ToDoApp(QMainWindow):
     def load_data(self):
-        """從 SQLite 載入分類與項目"""
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-
-        # 載入分類
-        cursor.execute("SELECT id, name FROM categories")
-        categories = cursor.fetchall()
+        """從記憶體快取建立分類列表（資料在設定檔第一次開啟時從 SQLite 載入一次）"""
         self.ui.listWidgetCategories.clear()
-        self.category_map = {}  # 建立 id -> 名稱 的映射
-        for cat_id, name in categories:
-            item = QListWidgetItem(name)
-            self.ui.listWidgetCategories.addItem(item)
-            self.category_map[name] = cat_id  # 儲存對應關係
-
-        conn.close()
+        self.category_rows = {}  # 分類 id -> 列表項目
+        for category in self.store.categories.values():
+            self._add_category_row(category)
 
     def load_items_for_category(self, category_name):
-        """根據分類名稱載入該分類下的所有項目，並更新 UI 與 self.item_map"""
+        """根據分類名稱顯示該分類下的所有項目，並更新 UI 與 self.item_map"""
         # 清空現有的項目 UI 與記憶體對應
-        self.ui.listWidgetSubcategories.clear()
         self.item_map = {}  # 重新建立項目的映射
+        self.item_rows = {}  # 項目 id -> 列表項目
+        self.selected_subcategory = None
 
         # 根據分類名稱取得分類 ID
         category_id = self.category_map.get(category_name)
-        if not category_id:
+        self.current_category_id = category_id
+        # 已進入過的分類直接使用快取，不再查詢 SQLite；清空與加入期間不觸發 itemChanged、不重繪
+        items = self.store.items(category_id) if category_id else []
+        fill_list(self.ui.listWidgetSubcategories, [self._item_row(item) for item in items])
+
+    def _add_category_row(self, category):
+        row = QListWidgetItem(category.name)
+        row.setData(Qt.UserRole, category.id)
+        row.setData(COUNTS_ROLE, (category.completed, category.total))
+        self.ui.listWidgetCategories.addItem(row)
+        self.category_rows[category.id] = row
+
+    def _add_item_row(self, item):
+        self.ui.listWidgetSubcategories.addItem(self._item_row(item))
+
+    def _item_row(self, item):
+        """建立項目的列表項目並登記到 item_rows／item_map；已完成的樣式由 CompletedItemDelegate 繪製"""
+        row = QListWidgetItem(item.name)
+        row.setData(Qt.UserRole, item.id)
+        row.setFlags(row.flags() | Qt.ItemIsUserCheckable)
+        row.setCheckState(Qt.Checked if item.completed else Qt.Unchecked)
+        if item.due_at is not None:
+            row.setToolTip(f"提醒時間：{format_due(item.due_at)}")
+        self.item_rows[item.id] = row
+        self.item_map[item.name] = item.id
+        return row
+
+    def on_store_changed(self, event, record, *extra):
+        """依資料層的異動通知（包含其他程序的異動），只更新受影響的列表項目"""
+        if event == "reloaded":
+            # 其他程序的異動過多，重建整個畫面
+            self.selected_category = None
+            self.load_data()
+            if self.current_category_id in self.store.categories:
+                self.load_items_for_category(self.store.categories[self.current_category_id].name)
+            else:
+                self.load_items_for_category(None)
+                self.ui.stackedWidget.setCurrentWidget(self.ui.pageCategories)
+        elif event == "category_added":
+            self._add_category_row(record)
+        elif event == "category_renamed":
+            row = self.category_rows.get(record.id)
+            if row is not None:
+                row.setText(record.name)
+        elif event == "category_counts":
+            row = self.category_rows.get(record.id)
+            if row is not None:
+                row.setData(COUNTS_ROLE, (record.completed, record.total))
+        elif event == "category_deleted":
+            row = self.category_rows.pop(record.id, None)
+            if row is not None:
+                self.ui.listWidgetCategories.takeItem(self.ui.listWidgetCategories.row(row))
+                if row is self.selected_category:
+                    self.selected_category = None
+            if record.id == self.current_category_id:
+                self.load_items_for_category(None)
+        elif record.category_id == self.current_category_id:
+            self.on_item_changed(event, record, *extra)
+
+    def _unmap_item_name(self, name, item_id):
+        """項目改名或刪除後，item_map 中的名稱改為對應另一個同名項目（若有）"""
+        if self.item_map.get(name) != item_id:
+            return
+        other = self.store.find_item(self.current_category_id, name)
+        if other is None:
+            del self.item_map[name]
+        else:
+            self.item_map[name] = other.id
+
+    def on_item_changed(self, event, item, *extra):
+        """更新目前顯示中的分類項目"""
+        widget = self.ui.listWidgetSubcategories
+        if event == "item_added":
+            self._add_item_row(item)
             return
 
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("SELECT id, name, completed FROM items WHERE category_id = ?", (category_id,))
-        items = cursor.fetchall()
-        conn.close()
-
-        # 將讀取到的項目加入 UI 與記憶體
-        for item_id, name, completed in items:
-            new_item = QListWidgetItem(name)
-            new_item.setFlags(new_item.flags() | Qt.ItemIsUserCheckable)
-            new_item.setCheckState(Qt.Checked if completed else Qt.Unchecked)
-            self.ui.listWidgetSubcategories.addItem(new_item)
-            self.item_map[name] = item_id
+        row = self.item_rows.get(item.id)
+        if row is None:
+            return
+        # 程式更新時不觸發 itemChanged，避免重複寫入資料庫
+        widget.blockSignals(True)
+        if event == "item_renamed":
+            old_name = extra[0]
+            row.setText(item.name)
+            self._unmap_item_name(old_name, item.id)
+            self.item_map[item.name] = item.id
+        elif event == "item_deleted":
+            widget.takeItem(widget.row(row))
+            del self.item_rows[item.id]
+            self._unmap_item_name(item.name, item.id)
+            if row is self.selected_subcategory:
+                self.selected_subcategory = None
+        elif event == "item_completed":
+            row.setCheckState(Qt.Checked if item.completed else Qt.Unchecked)
+        elif event == "item_moved":
+            index = extra[0]
+            current = widget.row(row)
+            if current != index:  # 拖曳排序時列表已經在新位置
+                widget.takeItem(current)
+                widget.insertItem(index, row)
+                if row is self.selected_subcategory:
+                    widget.setCurrentItem(row)
+        widget.blockSignals(False)
 
     def __init__(self):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.setup_connections()
+        startup.mark("建立介面")
 
-        self.last_action = None  # 只記錄最近一次的可撤銷動作
         self.undo_timer = QTimer(self)  # 設置計時器
         self.undo_timer.setSingleShot(True)  # 只執行一次
         self.undo_timer.timeout.connect(self.clear_undo)  # 15秒後清除撤銷記錄
@@ -162,18 +448,94 @@ class ToDoApp(QMainWindow):
         self.selected_category = None  # 目前選中的母分類項目
         self.selected_subcategory = None  # 目前選中的項目
 
+        # 設定（設定檔 + 環境變數）；各設定檔的資料庫在第一次使用時才開啟
+        self.config = load_config()
+        self.profiles = ProfileManager(self.config)
+
+        # 記憶體中的資料層：分類與項目快取，異動時同步 SQLite 並通知 UI
+        self.store = self.profiles.store()
+        startup.mark("開啟資料庫")
+        self.store.subscribe(self.on_store_changed)
+
+        # 指令引擎：解析指令、執行與撤銷，透過事件通知 UI
+        self.engine = TodoEngine(self.store)
+        self.engine.subscribe(self.on_engine_event)
+        # 語音指令信心過低時模糊比對目標名稱、刪除前確認；每個語音指令的信心記錄到檔案供調整門檻
+        self.engine.confidence_threshold = self.config.get("confidence_threshold")
+        self.engine.ask_confirmation = self.ask_confirmation
+        # 指令記錄：重複的指令不再分詞與解析；各設定檔的記錄存在各自的資料庫
+        self.histories = {}  # 資料庫路徑 -> CommandHistory
+        self.engine.history = self.command_history()
+        log_path = self.config.get("confidence_log")
+        self.confidence_log = os.path.join(self.config.get("data_dir"), log_path) if log_path else None
+
         # 初始化記憶體中的映射：分類和項目
-        self.category_map = {}
+        self.category_map = self.store.category_map  # 與資料層共用，名稱 -> id
         self.item_map = {}
+        self.category_rows = {}
+        self.item_rows = {}
+        self.current_category_id = None  # 目前顯示項目的分類
 
         # 從資料庫載入分類與項目
         self.load_data()
-
-        # 初始化 Vosk 語音辨識
-        self.model = Model("vosk-model-small-cn-0.22")  # 填入模型的路徑
-        self.recognizer = KaldiRecognizer(self.model, 16000)
+        startup.mark("建立列表")
+
+        # 提醒排程：最小堆積 + 單一計時器，只在最早的提醒時間觸發
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.setSingleShot(True)
+        self.reminders = ReminderScheduler(self.store, self.arm_reminder_timer, self.show_reminders,
+                                           on_overdue=self.show_overdue_reminders)
+        self.reminder_timer.timeout.connect(self.reminders.fire)
+        self.reminders.load()
+
+        # 定時檢查其他程序對資料庫的異動（沒有異動時只需一次 PRAGMA data_version）
+        self.change_timer = QTimer(self)
+        self.change_timer.timeout.connect(self.poll_external_changes)
+        if self.config.get("poll_interval") > 0:
+            self.change_timer.start(self.config.get("poll_interval"))
+
+        # 封存完成超過 archive_after_days 天的項目（分批進行）；完成紀錄也由封存工具查詢
+        self.archivers = {}  # 資料庫路徑 -> Archiver
+        self.archive_timer = QTimer(self)
+        self.archive_timer.setSingleShot(True)
+        self.archive_timer.timeout.connect(self.run_archive_batch)
+        self.archive_timer.start(ARCHIVE_POLL)
+
+        # 背景預取：先暖好列表最上方幾個分類，之後依選取／滑鼠停留預取
+        self.store.start_prefetcher()
+        for category_id in list(self.store.categories)[:PREFETCH_ON_START]:
+            self.store.prefetch(category_id)
+
+        # 初始化語音辨識（後端、模型路徑與取樣率見設定）；模型由記憶體管理載入，收音時才取用
+        self.sample_rate = self.config.get("sample_rate")
+        self.block_size = self.config.get("block_size")
+        self.speech_slot = memory.register("語音辨識模型", self.load_speech_model)
+        self.speech_error = None  # 設定的後端無法載入、改用 Vosk 的原因，收音時顯示
+        self.asr = None  # 收音期間為 SpeechDecoder，在背景執行緒辨識
         self.audio_queue = queue.Queue()
 
+        # 模型在視窗顯示後於背景預先載入；閒置超過 model_idle_timeout 秒後卸載，下次使用時再載入
+        memory.idle_timeout = self.config.get("model_idle_timeout")
+        if not startup.profiling:
+            QTimer.singleShot(0, memory.preload)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.unload_idle_models)
+        if memory.idle_timeout:
+            self.memory_timer.start(max(1000, int(memory.idle_timeout * 250)))
+
+        # 等待背景分詞的指令：(Future, 是否為口述模式, 語音辨識信心)，依送出順序執行
+        self.pending_commands = deque()
+        self.running_commands = False
+        self.command_timer = QTimer(self)
+        self.command_timer.timeout.connect(self.run_pending_commands)
+
+        # 語音檔匯入：工作程序在第一次匯入時才啟動，依音檔順序取回已完成的片段
+        self.audio_importer = AudioImporter(self.config.get("vosk_model"))
+        self.audio_import_futures = []
+        self.audio_import_total = 0
+        self.audio_import_timer = QTimer(self)
+        self.audio_import_timer.timeout.connect(self.poll_audio_import)
+
         # 初始化按鈕圖示
         self.default_mic_icon = self.style().standardIcon(QStyle.SP_MediaVolumeMuted)  # 麥克風關閉
         self.recording_mic_icon = self.style().standardIcon(QStyle.SP_MediaVolume)  # 麥克風開啟
@@ -181,9 +543,200 @@ class ToDoApp(QMainWindow):
         self.ui.btnVoiceInputCategory.setIcon(self.default_mic_icon)
         self.ui.btnVoiceInputSubcategory.setIcon(self.default_mic_icon)
         self.ui.labelSpeechResult.setVisible(False) # 確保語音辨識結果區域一開始是隱藏的
+        self.notifier = Notifier(self.ui.labelSpeechResult, self)
 
-        # 收音狀態
+        # 收音狀態；收音中定時辨識，並依部分結果預先分詞（self.speculation）
         self.is_recording = False
+        self.finishing = None  # 停止收音後，最後一句的背景辨識（Future）
+        self.stream = None
+        self.wake_detector = None  # 喚醒詞待命中時為 WakeWordDetector
+        self.command_started = 0.0
+        self.speculation = None
+        self.utterances = 0
+        self.speech_timer = QTimer(self)
+        self.speech_timer.timeout.connect(self.decode_audio)
+
+        self.setup_profile_menu()
+        self.setup_import_menu()
+        speech_menu = self.ui.menubar.addMenu("語音")
+        self.wake_action = speech_menu.addAction(f"喚醒詞待命（說「{self.config.get('wake_word')}」）")
+        self.wake_action.setCheckable(True)
+        self.wake_action.toggled.connect(self.set_wake_listening)
+        backend = BACKENDS.get(self.config.get("asr_backend"))
+        if backend is None or not backend.supports_wake:
+            self.wake_action.setEnabled(False)
+            self.wake_action.setToolTip("喚醒詞待命需使用 Vosk 辨識（asr_backend）")
+        palette_action = speech_menu.addAction("常用指令...")
+        palette_action.setShortcut("Ctrl+P")
+        palette_action.triggered.connect(self.show_command_palette)
+        view_menu = self.ui.menubar.addMenu("檢視")
+        view_menu.addAction("統計...").triggered.connect(self.show_stats_dialog)
+        view_menu.addAction("完成紀錄...").triggered.connect(self.show_history_dialog)
+        self.ui.menubar.addMenu("診斷").addAction("記憶體使用...").triggered.connect(self.show_memory_dialog)
+
+        # 啟動後即進入喚醒詞待命（視窗顯示後才開麥克風）
+        if self.config.get("wake_listen") and self.wake_action.isEnabled() and not startup.profiling:
+            QTimer.singleShot(0, lambda: self.wake_action.setChecked(True))
+
+    def load_speech_model(self):
+        """載入設定的語音辨識後端（todo_asr）；無法載入時改用 Vosk（可能在背景預先載入的執行緒中執行，
+        原因留到收音時再顯示）"""
+        name = self.config.get("asr_backend")
+        try:
+            return load_backend(self.config)
+        except Exception as e:
+            if name == "vosk":
+                raise
+            self.speech_error = f"無法使用 {name} 語音辨識，改用 Vosk：{e}"
+            print(self.speech_error)
+            return load_backend(self.config, name="vosk")
+
+    def unload_idle_models(self):
+        unloaded = memory.collect_idle()
+        if unloaded:
+            self.ui.statusbar.showMessage("已卸載閒置的模型：" + "、".join(unloaded), 3000)
+
+    def show_memory_dialog(self):
+        MemoryDialog(self).exec_()
+
+    def show_stats_dialog(self):
+        StatsDialog(self.store, self).exec_()
+
+    def show_history_dialog(self):
+        archiver = self.archiver()
+        if archiver is None:
+            self.ui.statusbar.showMessage("連線到同步伺服器時無法查看完成紀錄", 3000)
+            return
+        HistoryDialog(archiver, self).exec_()
+
+    def show_command_palette(self):
+        if self.engine.history is None:
+            self.ui.statusbar.showMessage("連線到同步伺服器或關閉 command_history 時沒有指令記錄", 3000)
+            return
+        dialog = CommandPalette(self.engine.history, self)
+        if dialog.exec_() == QDialog.Accepted:
+            self.queue_commands([dialog.command])
+
+    def command_history(self):
+        """目前設定檔資料庫的指令記錄；連線到同步伺服器或關閉 command_history 時為 None"""
+        active = self.profiles.active
+        if self.config.get("server", active) or not self.config.get("command_history", active):
+            return None
+        db_path = self.store.db_path
+        if db_path not in self.histories:
+            self.histories[db_path] = CommandHistory(self.store).load()
+        return self.histories[db_path]
+
+    def archiver(self):
+        """目前設定檔資料庫的封存工具；連線到同步伺服器時為 None"""
+        if self.config.get("server", self.profiles.active):
+            return None
+        db_path = self.store.db_path
+        if db_path not in self.archivers:
+            settings = self.config.settings(self.profiles.active)
+            self.archivers[db_path] = Archiver(db_path, pragmas=settings["pragmas"],
+                                               busy_timeout=settings["busy_timeout"])
+        return self.archivers[db_path]
+
+    def run_archive_batch(self):
+        """封存一批完成已久的項目；還有剩下時稍後再做下一批，避免長時間占用寫入鎖與事件迴圈"""
+        days = self.config.get("archive_after_days", self.profiles.active)
+        archiver = self.archiver() if days else None
+        if archiver is None:
+            self.archive_timer.start(ARCHIVE_INTERVAL)
+            return
+        try:
+            moved = archiver.archive_batch(time.time() - days * 86400)
+            if moved:
+                # 封存的項目經由異動記錄從快取與畫面移除
+                self.store.poll_changes()
+                self.ui.statusbar.showMessage(f"已封存 {moved} 個完成超過 {days:g} 天的項目", 3000)
+        except sqlite3.Error as e:
+            print("封存失敗：", e)
+            moved = 0
+        self.archive_timer.start(ARCHIVE_POLL if moved else ARCHIVE_INTERVAL)
+
+    def setup_import_menu(self):
+        """選單列的匯入選項"""
+        menu = self.ui.menubar.addMenu("匯入")
+        menu.addAction("語音檔...").triggered.connect(self.import_audio_files)
+
+    def import_audio_files(self):
+        """選擇 WAV 音檔，在背景程序辨識；每句依序當作指令執行，在項目頁面時無法識別的句子新增為項目"""
+        paths, _ = QFileDialog.getOpenFileNames(self, "匯入語音檔", "", "WAV 音檔 (*.wav)")
+        if paths:
+            self.start_audio_import(paths)
+
+    def start_audio_import(self, paths):
+        try:
+            futures = self.audio_importer.submit(paths)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "匯入語音檔", str(e))
+            return
+        self.audio_import_futures.extend(futures)
+        self.audio_import_total += len(futures)
+        self.ui.statusbar.showMessage(f"語音檔辨識中（0/{self.audio_import_total}）...")
+        self.audio_import_timer.start(AUDIO_IMPORT_POLL)
+
+    def poll_audio_import(self):
+        """依順序套用已辨識完成的片段，後面的片段先完成時等待前面的"""
+        while self.audio_import_futures and self.audio_import_futures[0].done():
+            future = self.audio_import_futures.pop(0)
+            try:
+                path, frame, texts, seconds = future.result()
+            except Exception as e:
+                print("語音檔辨識失敗：", e)
+                continue
+            self.queue_commands(texts, dictation=True)
+        done = self.audio_import_total - len(self.audio_import_futures)
+        if self.audio_import_futures:
+            self.ui.statusbar.showMessage(f"語音檔辨識中（{done}/{self.audio_import_total}）...")
+        else:
+            self.audio_import_timer.stop()
+            self.audio_import_total = 0
+            self.audio_importer.close()  # 匯入結束後釋放工作程序與模型
+            self.ui.statusbar.showMessage(f"語音檔匯入完成，共 {done} 段", 5000)
+
+    def setup_profile_menu(self):
+        """有多個設定檔時在選單列加入切換選項"""
+        names = self.config.profile_names()
+        if len(names) < 2:
+            return
+        menu = self.ui.menubar.addMenu("設定檔")
+        group = QActionGroup(self)
+        for name in names:
+            action = menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(name == self.profiles.active)
+            action.triggered.connect(lambda checked, name=name: self.switch_profile(name))
+            group.addAction(action)
+
+    def switch_profile(self, profile):
+        """切換到另一個設定檔的資料庫，不需重新啟動；已開啟過的資料庫保留快取"""
+        if profile == self.profiles.active:
+            return
+        self.store.unsubscribe(self.on_store_changed)
+        self.store = self.profiles.switch(profile)
+        self.store.subscribe(self.on_store_changed)
+        self.category_map = self.store.category_map
+        self.store.start_prefetcher()
+
+        self.engine.set_store(self.store)
+        self.engine.history = self.command_history()
+        self.reminders.set_store(self.store)
+        self.selected_category = None
+        self.load_data()
+        self.load_items_for_category(None)
+        self.reset_editing_state()
+        self.ui.statusbar.showMessage(f"已切換設定檔：{profile}")
+
+    def poll_external_changes(self):
+        """套用其他程序寫入的異動"""
+        try:
+            if self.store.poll_changes():
+                self.ui.statusbar.showMessage("已同步其他視窗的變更", 2000)
+        except sqlite3.Error as e:
+            print("同步失敗：", e)
 
     def toggle_voice_input(self):
         """切換語音輸入（開始/停止）"""
@@ -192,588 +745,290 @@ class ToDoApp(QMainWindow):
         else:
             self.stop_voice_input()
 
-    def start_voice_input(self):
-        """開始語音輸入"""
-        self.is_recording = True
-        self.ui.statusbar.showMessage("正在收音...")
-        self.ui.btnVoiceInputCategory.setIcon(self.recording_mic_icon)
-        self.ui.btnVoiceInputSubcategory.setIcon(self.recording_mic_icon)
+    def acquire_speech_model(self):
+        """取得語音辨識後端，第一次使用時才載入；收音或待命期間不會被卸載。無法載入時顯示原因並回傳 False"""
+        if not self.speech_slot.loaded:
+            self.ui.statusbar.showMessage("正在載入語音模型...")
+            QApplication.processEvents()
+        try:
+            backend = self.speech_slot.acquire()
+        except Exception as e:
+            self.ui.statusbar.showMessage("無法載入語音模型", 3000)
+            self.notifier.notify(f"無法載入語音辨識模型：{e}", NOTICE_ALERT)
+            return False
+        if self.speech_error:
+            self.notifier.notify(self.speech_error, NOTICE_ALERT)
+            self.speech_error = None
+        self.asr = SpeechDecoder(backend)
+        return True
+
+    def release_speech_model(self):
+        self.asr.close()
+        self.asr = None
+        self.speech_slot.release()
+
+    def open_stream(self):
+        """開啟麥克風；音訊放進 audio_queue，由 decode_audio 定時辨識"""
+        import sounddevice as sd  # 載入 PortAudio，第一次收音時才匯入
 
         def callback(indata, frames, time, status):
             if status:
                 print(status)
             self.audio_queue.put(bytes(indata))
 
-        self.stream = sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16',
+        self.audio_queue = queue.Queue()
+        self.stream = sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.block_size, dtype='int16',
                                         channels=1, callback=callback)
         self.stream.start()
+        self.speech_timer.start(SPEECH_POLL)
 
-    def stop_voice_input(self):
-        """停止語音輸入並立即處理辨識結果"""
-        if not self.is_recording:
-            return
-
-        self.is_recording = False
-        self.ui.statusbar.showMessage("收音已停止")
-        self.ui.btnVoiceInputCategory.setIcon(self.default_mic_icon)
-        self.ui.btnVoiceInputSubcategory.setIcon(self.default_mic_icon)
-
-        if self.stream:
+    def close_stream(self):
+        self.speech_timer.stop()
+        if self.stream is not None:
             self.stream.stop()
             self.stream.close()
+            self.stream = None
 
-        # 立即處理所有音訊數據，確保語音結果及時顯示
-        self.process_audio_queue(force_finalize=True)
-
-    def process_audio_queue(self, force_finalize=False):
-        """處理所有音訊數據並進行語音辨識"""
-        final_result = ""  # 存儲完整的語音結果
+    def set_mic_icon(self, recording):
+        icon = self.recording_mic_icon if recording else self.default_mic_icon
+        self.ui.btnVoiceInputCategory.setIcon(icon)
+        self.ui.btnVoiceInputSubcategory.setIcon(icon)
 
-        while not self.audio_queue.empty():
-            data = self.audio_queue.get()
-            if self.recognizer.AcceptWaveform(data):
-                result_json = self.recognizer.Result()  # Vosk 回傳的是 JSON 字串
-                result_dict = json.loads(result_json)   # 解析 JSON
-                final_result = result_dict.get("text", "").strip()  # 提取辨識結果
-
-        # 如果還沒有輸出結果，強制取得最終結果
-        if force_finalize and not final_result:
-            result_json = self.recognizer.FinalResult()  # 取得完整的最終辨識結果
-            result_dict = json.loads(result_json)
-            final_result = result_dict.get("text", "").strip()
-
-        if final_result:
-            # 簡轉繁 + 數字轉換
-            traditional_text = convert_simplified_to_traditional(final_result)
-            numeric_text = convert_chinese_numbers(traditional_text)
-
-            # 更新 UI
-            self.ui.labelSpeechResult.setText(f"語音辨識結果：{numeric_text}")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-            # 傳送數字轉換後的結果給 `process_voice_command()`
-            self.process_voice_command({"text": numeric_text}) 
-        else:
-            self.ui.labelSpeechResult.setText("未識別到有效語音")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def process_voice_command(self, text):
-        """處理語音輸入結果，使用 CKIP 進行分詞，並轉換適當的數字"""
-        recognized_text = text.get("text", "").strip()
-
-        if recognized_text:
-            traditional_text = convert_simplified_to_traditional(recognized_text)
-            numeric_text = convert_chinese_numbers(traditional_text)
-
-            self.ui.labelSpeechResult.setText(f"語音辨識結果：{numeric_text}")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-            tokens = ws_driver([numeric_text])[0]
-            print("語音分詞結果：", tokens)
-
-            result = self.parse_command(tokens)
-
-            # 若指令屬於項目操作，但目前不在項目頁面，則拒絕執行
-            if result[0] in ["add_item", "delete_item", "edit_item", "complete_item"]:
-                if self.ui.stackedWidget.currentWidget() != self.ui.pageSubcategories:
-                    self.ui.labelSpeechResult.setText("請先進入項目頁面操作項目")
-                    self.ui.labelSpeechResult.setVisible(True)
-                    QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-                    return
-
-            if result[0] == "add_category" and result[1]:
-                self.add_category_from_voice(result[1])
-            elif result[0] == "delete_category" and result[1]:
-                self.delete_category_from_voice(result[1])
-            elif result[0] == "edit_category" and result[1] and result[2]:
-                self.edit_category_from_voice(result[1], result[2])
-            elif result[0] == "enter_category" and result[1]:
-                self.enter_category_from_voice(result[1])
-            elif result[0] == "add_item" and result[1]:
-                self.add_item_from_voice(result[1])
-            elif result[0] == "delete_item" and result[1]:
-                self.delete_item_from_voice(result[1])
-            elif result[0] == "edit_item" and result[1] and result[2]:
-                self.edit_item_from_voice(result[1], result[2])
-            elif result[0] == "complete_item" and result[1]:
-                self.complete_item_from_voice(result[1])
-            elif result[0] == "return_to_categories":
-                self.return_to_categories()
-            elif result[0] == "undo_last_action":
-                self.undo_last_action()
-
-            else:
-                self.ui.labelSpeechResult.setText(f"無法識別的指令：{numeric_text}")
-                self.ui.labelSpeechResult.setVisible(True)
-                QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def parse_command(self, tokens):
-        """解析語音分詞結果，轉換為指令與目標"""
-        command = None
-        target_old = ""
-        target_new = ""
-
-        # 統一異體字
-        tokens = [token.replace("爲", "為") for token in tokens]
-
-        # 去除每個 token 內部的空格
-        tokens = [token.replace(" ", "") for token in tokens]
-
-        # 關鍵詞片段定義（模糊匹配）
-        return_fragments = {"返回", "回到", "上1頁", "前頁", "首頁"}
-        complete_fragments = {"完成", "標記", "勾選", "打勾"}
-        undo_fragment = {"撤銷", "復原"}
-
-        # 判斷指令
-        if "新增" in tokens and "分類" in tokens:
-            command = "add_category"
-        elif "刪除" in tokens and "分類" in tokens:
-            command = "delete_category"
-        elif "修改" in tokens and "分類" in tokens and "為" in tokens:
-            command = "edit_category"
-        elif "進入" in tokens and "分類" in tokens:
-            command = "enter_category"
-        elif "新增" in tokens and "項目" in tokens:
-            command = "add_item"
-        elif "刪除" in tokens and "項目" in tokens:
-            command = "delete_item"
-        elif "修改" in tokens and "項目" in tokens and "為" in tokens:
-            command = "edit_item"
-        elif any(fragment in token for token in tokens for fragment in complete_fragments):
-            command = "complete_item"
-        elif any(fragment in "".join(tokens) for fragment in return_fragments):
-            command = "return_to_categories"
-        elif any(fragment in "".join(tokens) for fragment in undo_fragment):
-            command = "undo_last_action"
-
-        # 找出名稱
-        if command in ["edit_category", "edit_item"]:
-            try:
-                old_index = tokens.index("項目") + 1 if "項目" in tokens else tokens.index("分類") + 1
-                new_index = tokens.index("為") + 1
-
-                target_old = "".join(tokens[old_index:new_index-1])
-                target_new = "".join(tokens[new_index:])
-            except ValueError:
-                pass  # 如果格式錯誤，則不做處理
+    def start_voice_input(self):
+        """開始語音輸入；待命中麥克風已開著，直接開始辨識指令"""
+        if self.wake_detector is None:
+            if not self.acquire_speech_model():  # 收音期間不會被卸載
+                return
+            self.open_stream()
         else:
-            start_index = -1
-            for i, token in enumerate(tokens):
-                if token in ["新增", "刪除", "修改", "分類", "項目", "為", "進入", "返回", "完成", "標記", "勾選", "打勾"]:
-                    continue
-                if start_index == -1:
-                    start_index = i
-                target_old += token
+            self.asr.reset()
+        self.is_recording = True
+        self.command_started = time.monotonic()
+        self.ui.statusbar.showMessage("正在收音...")
+        self.set_mic_icon(True)
+        self.speculation = None
+        self.utterances = 0
 
-        if command in ["edit_category", "edit_item"]:
-            return command, target_old.strip(), target_new.strip()
-        else:
-            return command, target_old.strip()
-    
-    def add_category_from_voice(self, category_name):
-        """透過語音新增分類，並存入 SQLite，同時支援撤銷"""
-        # 檢查記憶體中的分類名稱，避免不必要的 SQL 操作
-        if category_name in self.category_map:
-            self.ui.labelSpeechResult.setText(f"分類「{category_name}」已存在")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+    def stop_voice_input(self, wait=False):
+        """停止語音輸入，在背景辨識最後一句，完成後由 finish_voice_input 處理；wait 時等到處理完才返回"""
+        if not self.is_recording or self.finishing is not None:
             return
 
-        # 直接插入 SQLite
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("INSERT INTO categories (name) VALUES (?)", (category_name,))
-        conn.commit()
-        category_id = cursor.lastrowid  # 取得新分類的 ID
-        conn.close()
-
-        # 更新記憶體
-        self.category_map[category_name] = category_id
-
-        # 新增分類
-        new_item = QListWidgetItem(category_name)
-        self.ui.listWidgetCategories.addItem(new_item)
-
-        # 覆蓋先前的撤銷動作
-        self.last_action = ("add_category", category_name, category_id)
-        self.reset_undo_timer()  # 重新計時
-
-        self.ui.labelSpeechResult.setText(f"已新增分類：{category_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def delete_category_from_voice(self, category_name):
-        """透過語音刪除分類，並同步 SQLite"""
-        if category_name not in self.category_map:
-            self.ui.labelSpeechResult.setText(f"找不到分類：{category_name}")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+        if self.wake_detector is None:
+            self.close_stream()
+        # 剩下的音訊都送出後才取最後一句
+        self.drain_audio()
+        self.finishing = self.asr.finish()
+        if wait:
+            self.finishing.exception()  # 等待完成
+            self.finish_voice_input()
             return
-
-        category_id = self.category_map[category_name]
-
-        # 刪除 UI 上的分類
-        for index in range(self.ui.listWidgetCategories.count()):
-            item = self.ui.listWidgetCategories.item(index)
-            if item.text() == category_name:
-                self.ui.listWidgetCategories.takeItem(index)
-                break
-
-        # 刪除 SQLite 紀錄
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-        conn.commit()
-        conn.close()
-
-        # 更新記憶體
-        del self.category_map[category_name]
-
-        # 支援撤銷
-        self.last_action = ("delete_category", category_name, category_id)
-        self.reset_undo_timer()
-
-        self.ui.labelSpeechResult.setText(f"已刪除分類：{category_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def edit_category_from_voice(self, old_category_name, new_category_name):
-        """透過語音修改分類名稱，並確保名稱不重複"""
-        if old_category_name not in self.category_map:
-            self.ui.labelSpeechResult.setText(f"找不到分類：{old_category_name}")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+        self.ui.statusbar.showMessage("正在辨識...")
+        self.speech_timer.start(COMMAND_POLL)
+
+    def finish_voice_input(self):
+        """最後一句辨識完成：執行剩下的指令；待命中則回到待命"""
+        error = self.finishing.exception()
+        self.handle_speech_results()
+        self.finishing = None
+        if error is not None:
+            print("語音辨識失敗：", error)
+        if self.speculation is not None:
+            self.speculation.future.cancel()
+            self.speculation = None
+        if not self.utterances:
+            self.notifier.notify("未識別到有效語音")
+        if self.wake_detector is not None:
+            self.speech_timer.start(SPEECH_POLL)
+            self.finish_wake_command()
             return
+        self.speech_timer.stop()
+        self.is_recording = False
+        self.ui.statusbar.showMessage("收音已停止")
+        self.set_mic_icon(False)
+        self.release_speech_model()
 
-        if new_category_name in self.category_map:
-            self.ui.labelSpeechResult.setText(f"分類「{new_category_name}」已存在，無法修改")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+    def set_wake_listening(self, enabled):
+        """喚醒詞待命：麥克風一直開著但只以喚醒詞文法辨識，聽到喚醒詞後才以完整辨識器收一句指令"""
+        if enabled == (self.wake_detector is not None):
             return
-
-        category_id = self.category_map[old_category_name]
-
-        # 更新 SQLite
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("UPDATE categories SET name = ? WHERE id = ?", (new_category_name, category_id))
-        conn.commit()
-        conn.close()
-
-        # 更新 UI
-        for index in range(self.ui.listWidgetCategories.count()):
-            item = self.ui.listWidgetCategories.item(index)
-            if item.text() == old_category_name:
-                item.setText(new_category_name)
-                break
-
-        # 更新記憶體
-        del self.category_map[old_category_name]
-        self.category_map[new_category_name] = category_id
-
-        # 支援撤銷
-        self.last_action = ("edit_category", new_category_name, old_category_name, category_id)
-        self.reset_undo_timer()
-
-        self.ui.labelSpeechResult.setText(f"已將分類「{old_category_name}」修改為「{new_category_name}」")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def enter_category_from_voice(self, category_name):
-        """透過語音進入分類"""
-        for index in range(self.ui.listWidgetCategories.count()):
-            item = self.ui.listWidgetCategories.item(index)
-            if item.text() == category_name:
-                self.selected_category = item
-                self.ui.stackedWidget.setCurrentWidget(self.ui.pageSubcategories)
-                self.ui.labelSpeechResult.setText(f"已進入分類：{category_name}")
-                self.ui.labelSpeechResult.setVisible(True)
-                QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-                self.load_items_for_category(category_name)
+        if self.is_recording:
+            self.stop_voice_input(wait=True)
+        if enabled:
+            if not self.acquire_speech_model():
+                self.wake_action.setChecked(False)
                 return
+            self.wake_detector = self.asr.backend.wake_detector(self.config.get("wake_word"))
+            self.open_stream()
+            self.show_wake_status()
+        else:
+            self.wake_detector = None
+            self.close_stream()
+            self.release_speech_model()
+            self.ui.statusbar.showMessage("已停止待命")
+        self.wake_action.setChecked(enabled)
 
-        self.ui.labelSpeechResult.setText(f"找不到分類：{category_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def add_item_from_voice(self, item_name):
-        """透過語音新增項目，並存入 SQLite"""
-        if not self.selected_category:
-            self.ui.labelSpeechResult.setText("請先選擇分類")
-            self.ui.labelSpeechResult.setVisible(True)
-            return
-
-        category_name = self.selected_category.text()
-        category_id = self.category_map.get(category_name)
+    def show_wake_status(self):
+        self.ui.statusbar.showMessage(f"待命中，說「{self.wake_detector.wake_word}」開始下指令")
 
-        # 避免重複新增
-        for index in range(self.ui.listWidgetSubcategories.count()):
-            item = self.ui.listWidgetSubcategories.item(index)
-            if item.text() == item_name:
-                self.ui.labelSpeechResult.setText(f"項目「{item_name}」已存在")
-                self.ui.labelSpeechResult.setVisible(True)
-                return
+    def finish_wake_command(self):
+        """喚醒後的一句指令結束，回到待命"""
+        self.is_recording = False
+        self.set_mic_icon(False)
+        self.wake_detector.reset()
+        self.show_wake_status()
 
-        # 存入 SQLite
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("INSERT INTO items (category_id, name, completed) VALUES (?, ?, ?)", (category_id, item_name, 0))
-        conn.commit()
-        item_id = cursor.lastrowid  # 取得新項目的 ID
-        conn.close()
-
-        # 更新 UI
-        new_item = QListWidgetItem(item_name)
-        new_item.setFlags(new_item.flags() | Qt.ItemIsUserCheckable)
-        new_item.setCheckState(Qt.Unchecked)
-        self.ui.listWidgetSubcategories.addItem(new_item)
-
-        # 支援撤銷
-        self.last_action = ("add_item", item_name, category_name, item_id)
-        self.reset_undo_timer()
-
-        self.ui.labelSpeechResult.setText(f"已新增項目：{item_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def delete_item_from_voice(self, item_name):
-        """透過語音刪除項目，並同步 SQLite"""
-        if not self.selected_category:
-            self.ui.labelSpeechResult.setText("請先選擇分類")
-            self.ui.labelSpeechResult.setVisible(True)
+    def drain_audio(self):
+        """送出已收到的音訊：待命時只找喚醒詞（在此執行，喚醒詞文法很小）；收音中交給背景辨識"""
+        while not self.audio_queue.empty():
+            data = self.audio_queue.get()
+            if not self.is_recording:
+                if self.wake_detector is not None and self.wake_detector.feed(data):
+                    self.start_voice_input()  # 之後的音訊交給完整的辨識器
+                continue
+            self.asr.feed(data)
+        self.handle_speech_results()
+
+    def handle_speech_results(self):
+        """背景辨識完成的句子依序送出指令（喚醒後只收一句）"""
+        if self.asr is None:
             return
-
-        category_name = self.selected_category.text()
-        category_id = self.category_map.get(category_name)
-        item_id = None
-
-        # 刪除 UI 中的項目
-        for index in range(self.ui.listWidgetSubcategories.count()):
-            item = self.ui.listWidgetSubcategories.item(index)
-            if item.text() == item_name:
-                self.ui.listWidgetSubcategories.takeItem(index)
+        for result in self.asr.results():
+            if not self.is_recording:
                 break
-        else:
-            self.ui.labelSpeechResult.setText(f"找不到項目：{item_name}")
-            self.ui.labelSpeechResult.setVisible(True)
+            self.finish_utterance(result)
+            if self.wake_detector is not None and self.finishing is None:
+                self.finish_wake_command()
+
+    def decode_audio(self):
+        """定時辨識：收音中依部分結果預先分詞與解析；喚醒後一直沒有說話時回到待命"""
+        if self.finishing is not None:
+            if self.finishing.done():
+                self.finish_voice_input()
             return
-
-        # 從 SQLite 刪除
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("SELECT id FROM items WHERE category_id = ? AND name = ?", (category_id, item_name))
-        row = cursor.fetchone()
-        if row:
-            item_id = row[0]
-            cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
-            conn.commit()
-        conn.close()
-
-        # 支援撤銷
-        if item_id:
-            self.last_action = ("delete_item", item_name, category_name, item_id)
-            self.reset_undo_timer()
-
-        self.ui.labelSpeechResult.setText(f"已刪除項目：{item_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def edit_item_from_voice(self, old_name, new_name):
-        """透過語音修改項目名稱，並確保名稱不重複"""
-        if not self.selected_category:
-            self.ui.labelSpeechResult.setText("請先選擇分類")
-            self.ui.labelSpeechResult.setVisible(True)
+        self.drain_audio()
+        if not self.is_recording:
             return
+        partial = self.asr.partial()
+        if not partial and self.wake_detector is not None \
+                and time.monotonic() - self.command_started > self.config.get("wake_timeout"):
+            self.stop_voice_input()
+            return
+        if not self.config.get("speculate_partial"):
+            return
+        if partial:
+            self.ui.statusbar.showMessage(f"正在收音...{partial}")
+            self.speculation = self.engine.speculate(partial, self.speculation)
+        if self.speculation is not None:
+            self.engine.prepare(self.speculation)
+
+    def finish_utterance(self, result):
+        """一句話辨識完成（語音辨識後端的結果 dict）：與預先分詞的文字相同時沿用其結果，否則重新送出分詞"""
+        text = result.get("text", "").strip()
+        if not text:
+            return
+        self.utterances += 1
+        confidence = result_confidence(result)
+        future = self.engine.confirm(self.speculation, text)
+        self.speculation = None
+        if future is None:
+            self.queue_commands([text], confidences=[confidence])
+        else:
+            self.pending_commands.append((future, False, confidence))
+            self.run_pending_commands()
+            if self.pending_commands:
+                self.command_timer.start(COMMAND_POLL)
+
+    def queue_commands(self, texts, dictation=False, confidences=None):
+        """送出文字指令的分詞但不阻塞介面；與其他同時送出的文字合併為一次模型呼叫，完成後依序執行"""
+        # 文字與信心一起過濾，略過空白文字後才不會對錯
+        pairs = [(text, confidence) for text, confidence in zip(texts, confidences or [None] * len(texts))
+                 if text.strip()]
+        texts = [text for text, _ in pairs]
+        for future, (_, confidence) in zip(self.engine.submit_batch(texts), pairs):
+            self.pending_commands.append((future, dictation, confidence))
+        if self.pending_commands:
+            self.command_timer.start(COMMAND_POLL)
+
+    def run_pending_commands(self):
+        """依送出順序執行已分詞完成的指令，前面的尚未完成時等待"""
+        if self.running_commands:
+            return  # 確認刪除的對話框開著時計時器仍會觸發，等目前的指令結束
+        self.running_commands = True
+        try:
+            while self.pending_commands and self.pending_commands[0][0].done():
+                future, dictation, confidence = self.pending_commands.popleft()
+                try:
+                    tokens = future.result()
+                except Exception as e:
+                    print("分詞失敗：", e)
+                    continue
+                self.engine.run_segmented([tokens], dictation, [confidence])
+        finally:
+            self.running_commands = False
+        if not self.pending_commands:
+            self.command_timer.stop()
+
+    def ask_confirmation(self, message):
+        """指令引擎在執行低信心的刪除指令前詢問"""
+        return QMessageBox.question(self, "確認", message, QMessageBox.Yes | QMessageBox.No,
+                                    QMessageBox.No) == QMessageBox.Yes
+
+    def log_confidence(self, record):
+        """每個語音指令的信心附加到 JSON Lines 記錄檔，用來調整 confidence_threshold"""
+        if not self.confidence_log:
+            return
+        try:
+            with open(self.confidence_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print("無法寫入信心記錄：", e)
+
+    def on_engine_event(self, event, *args):
+        """依指令引擎的事件更新 UI"""
+        if event == "message":
+            text, kind = args
+            self.notifier.notify(text, NOTICE_ECHO if kind == "echo" else NOTICE_INFO)
+        elif event == "confidence":
+            self.log_confidence(args[0])
+        elif event == "tokens":
+            print("語音分詞結果：", args[0])
+        elif event == "navigate":
+            page, category_id = args
+            if page == "items":
+                self.selected_category = self.category_rows.get(category_id)
+                self.ui.stackedWidget.setCurrentWidget(self.ui.pageSubcategories)
+                self.load_items_for_category(self.store.categories[category_id].name)
+            else:
+                self.ui.stackedWidget.setCurrentWidget(self.ui.pageCategories)  # 回到分類主頁
+                self.store.prefetch_recent()
+        elif event == "undo_recorded":
+            if args[0] is None:
+                self.undo_timer.stop()  # 已撤銷，停止計時
+            else:
+                self.reset_undo_timer()  # 重新計時
 
-        category_name = self.selected_category.text()
-        category_id = self.category_map.get(category_name)
-
-        # 檢查新名稱是否重複
-        for index in range(self.ui.listWidgetSubcategories.count()):
-            item = self.ui.listWidgetSubcategories.item(index)
-            if item.text() == new_name:
-                self.ui.labelSpeechResult.setText(f"項目「{new_name}」已存在")
-                self.ui.labelSpeechResult.setVisible(True)
-                return
-
-        item_id = self.item_map.get(old_name)
-
-        # 更新 SQLite
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        cursor.execute("UPDATE items SET name = ? WHERE category_id = ? AND name = ?", (new_name, category_id, old_name))
-        conn.commit()
-        conn.close()
-
-        # 更新 UI
-        for index in range(self.ui.listWidgetSubcategories.count()):
-            item = self.ui.listWidgetSubcategories.item(index)
-            if item.text() == old_name:
-                item.setText(new_name)
-                break
-
-        # 支援撤銷
-        self.last_action = ("edit_item", new_name, old_name, category_name, item_id)
-
-        self.reset_undo_timer()
-
-        self.ui.labelSpeechResult.setText(f"已修改項目：{old_name} → {new_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def complete_item_from_voice(self, item_name):
-        """透過語音標記項目為完成，並存入 SQLite"""
-        for index in range(self.ui.listWidgetSubcategories.count()):
-            item = self.ui.listWidgetSubcategories.item(index)
-            if item.text() == item_name:
-                item.setCheckState(Qt.Checked)  # 標記為完成
-                self.ui.labelSpeechResult.setText(f"已標記完成：{item_name}")
-                self.ui.labelSpeechResult.setVisible(True)
-
-                # 更新 SQLite
-                conn = sqlite3.connect("todo.db")
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA foreign_keys = ON")
-                cursor.execute("UPDATE items SET completed = 1 WHERE name = ?", (item_name,))
-                conn.commit()
-                conn.close()
-
-                # 支援撤銷
-                self.last_action = ("uncomplete_item", item_name)
-                self.reset_undo_timer()
-
-                QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-                return
+    def arm_reminder_timer(self, delay):
+        """設定下一次提醒的計時器；delay 為 None 表示沒有待提醒項目"""
+        if delay is None:
+            self.reminder_timer.stop()
+        else:
+            self.reminder_timer.start(int(min(delay, MAX_REMINDER_WAIT) * 1000))
 
-        self.ui.labelSpeechResult.setText(f"找不到項目：{item_name}")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def return_to_categories(self):
-        """返回分類主頁"""
-        self.ui.stackedWidget.setCurrentWidget(self.ui.pageCategories)  # 回到分類主頁
-        self.ui.labelSpeechResult.setText("已返回分類頁面")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
-
-    def undo_last_action(self):
-        """回到上一個動作，並同步 SQLite"""
-        if not self.last_action:
-            self.ui.labelSpeechResult.setText("沒有可撤銷的動作")
-            self.ui.labelSpeechResult.setVisible(True)
-            QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+    def show_reminders(self, due):
+        """顯示到期的提醒"""
+        names = "、".join(f"{name}（{self.store.categories[category_id].name}）"
+                         for _, _, (category_id, name) in due if category_id in self.store.categories)
+        if not names:
             return
+        QApplication.beep()
+        self.ui.statusbar.showMessage(f"提醒：{names}")
+        self.notifier.notify(f"提醒：{names}", NOTICE_ALERT)
 
-        action = self.last_action
-        self.last_action = None
-        self.undo_timer.stop()  # 停止計時
-
-        conn = sqlite3.connect("todo.db")
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-
-        if action[0] == "delete_category":
-            category_name, category_id = action[1], action[2]
-            cursor.execute("INSERT INTO categories (id, name) VALUES (?, ?)", (category_id, category_name))
-            conn.commit()
-
-            new_item = QListWidgetItem(category_name)
-            self.ui.listWidgetCategories.addItem(new_item)
-            self.category_map[category_name] = category_id
-
-        elif action[0] == "add_category":
-            category_name, category_id = action[1], action[2]
-            cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-            conn.commit()
-
-            for index in range(self.ui.listWidgetCategories.count()):
-                item = self.ui.listWidgetCategories.item(index)
-                if item.text() == category_name:
-                    self.ui.listWidgetCategories.takeItem(index)
-                    break
-
-            del self.category_map[category_name]
-
-        elif action[0] == "edit_category":
-            new_name, old_name, category_id = action[1], action[2], action[3]
-            cursor.execute("UPDATE categories SET name = ? WHERE id = ?", (old_name, category_id))
-            conn.commit()
-
-            for index in range(self.ui.listWidgetCategories.count()):
-                item = self.ui.listWidgetCategories.item(index)
-                if item.text() == new_name:
-                    item.setText(old_name)
-                    break
-
-            del self.category_map[new_name]
-            self.category_map[old_name] = category_id
-
-        elif action[0] == "add_item":
-            item_name, category_name, item_id = action[1], action[2], action[3]
-            cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
-            conn.commit()
-
-            # 更新 UI
-            for index in range(self.ui.listWidgetSubcategories.count()):
-                item = self.ui.listWidgetSubcategories.item(index)
-                if item.text() == item_name:
-                    self.ui.listWidgetSubcategories.takeItem(index)
-                    break
-
-            # 更新記憶體
-            if item_name in self.item_map:
-                del self.item_map[item_name]
-
-        elif action[0] == "delete_item":
-            item_name, category_name, item_id = action[1], action[2], action[3]
-            category_id = self.category_map.get(category_name)
-            # 檢查該 id 是否已存在
-            cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
-            if cursor.fetchone() is None:
-                cursor.execute("INSERT INTO items (id, category_id, name, completed) VALUES (?, ?, ?, ?)", 
-                               (item_id, category_id, item_name, 0))
-                conn.commit()
-            # 更新 UI：重新將該項目加回
-            new_item = QListWidgetItem(item_name)
-            new_item.setFlags(new_item.flags() | Qt.ItemIsUserCheckable)
-            new_item.setCheckState(Qt.Unchecked)
-            self.ui.listWidgetSubcategories.addItem(new_item)
-            # 更新記憶體
-            self.item_map[item_name] = item_id
-
-        elif action[0] == "edit_item":
-            # 
-            new_name, old_name, category_name, item_id = action[1], action[2], action[3], action[4]
-            category_id = self.category_map.get(category_name)
-            cursor.execute("UPDATE items SET name = ? WHERE category_id = ? AND id = ?", 
-                   (old_name, category_id, item_id))
-            conn.commit()
-
-            # 更新 UI
-            for index in range(self.ui.listWidgetSubcategories.count()):
-                item = self.ui.listWidgetSubcategories.item(index)
-                if item.text() == new_name:
-                    item.setText(old_name)
-                    break
-                
-            # 更新記憶體
-            if new_name in self.item_map:
-                del self.item_map[new_name]
-            self.item_map[old_name] = item_id
-
-        conn.close()
-        self.ui.labelSpeechResult.setText("已撤銷上一個動作")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+    def show_overdue_reminders(self, count):
+        """載入時彙總已過期的提醒，不逐一提醒"""
+        self.ui.statusbar.showMessage(f"提醒：有 {count} 個提醒已過期")
+        self.notifier.notify(f"提醒：有 {count} 個提醒已過期", NOTICE_ALERT)
 
     def reset_undo_timer(self):
         """重新開始15秒撤銷計時"""
@@ -781,10 +1036,7 @@ class ToDoApp(QMainWindow):
 
     def clear_undo(self):
         """清除撤銷動作（15秒後執行）"""
-        self.last_action = None
-        self.ui.labelSpeechResult.setText("撤銷時間已過，無法回復")
-        self.ui.labelSpeechResult.setVisible(True)
-        QTimer.singleShot(2000, lambda: self.ui.labelSpeechResult.setVisible(False))
+        self.engine.clear_undo()
 
     def setup_connections(self):
         # 第一層按鈕
@@ -808,6 +1060,14 @@ class ToDoApp(QMainWindow):
         # 監聽項目打勾狀態變化
         self.ui.listWidgetSubcategories.itemChanged.connect(self.toggle_completed_status)
 
+        # 拖曳項目調整順序
+        self.ui.listWidgetSubcategories.setDragDropMode(QAbstractItemView.InternalMove)
+        # 每列高度相同，大量項目時不必逐列計算大小
+        self.ui.listWidgetSubcategories.setUniformItemSizes(True)
+        self.completed_delegate = CompletedItemDelegate(self.ui.listWidgetSubcategories)
+        self.ui.listWidgetSubcategories.setItemDelegate(self.completed_delegate)
+        self.ui.listWidgetSubcategories.model().rowsMoved.connect(self.on_item_rows_moved)
+
         # 確認/取消按鈕
         self.ui.btnConfirmEdit.clicked.connect(self.confirm_edit_task)
         self.ui.btnCancelEdit.clicked.connect(self.cancel_edit_task)
@@ -816,6 +1076,12 @@ class ToDoApp(QMainWindow):
 
         # 列表點擊事件
         self.ui.listWidgetCategories.itemClicked.connect(self.select_category)
+        # 滑鼠停留在分類上時預取該分類的項目
+        self.ui.listWidgetCategories.setMouseTracking(True)
+        self.ui.listWidgetCategories.itemEntered.connect(self.prefetch_category)
+        # 分類名稱右側顯示完成數/項目數
+        self.category_delegate = CategoryCountDelegate(self.ui.listWidgetCategories)
+        self.ui.listWidgetCategories.setItemDelegate(self.category_delegate)
         self.ui.listWidgetSubcategories.itemClicked.connect(self.select_subcategory)
 
     # 第一層功能
@@ -853,21 +1119,11 @@ class ToDoApp(QMainWindow):
         if msg_box.clickedButton() == btn_yes:
             category_name = self.selected_category.text()
             category_id = self.category_map.get(category_name)
-            # 從 SQLite 刪除
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-            conn.commit()
-            conn.close()
-
-            # 從 UI 刪除
-            self.ui.listWidgetCategories.takeItem(self.ui.listWidgetCategories.row(self.selected_category))
-            del self.category_map[category_name]
+            # 從 SQLite、記憶體與 UI 刪除
+            self.store.delete_category(category_id)
 
             # 記錄撤銷操作
-            self.last_action = ("add_category", category_name, category_id)
-            self.reset_undo_timer()
+            self.engine.record_undo(("delete_category", category_name, category_id))
 
             self.selected_category = None
             self.reset_editing_state()
@@ -876,8 +1132,7 @@ class ToDoApp(QMainWindow):
         if not self.selected_category:
             QMessageBox.warning(self, "提示", "請選擇一個分類")
             return
-        self.load_items_for_category(self.selected_category.text())
-        self.ui.stackedWidget.setCurrentWidget(self.ui.pageSubcategories)
+        self.engine.open_category(self.selected_category.data(Qt.UserRole))
 
     # 第二層功能
     def add_subcategory(self):
@@ -910,58 +1165,37 @@ class ToDoApp(QMainWindow):
         msg_box.exec()
         
         if msg_box.clickedButton() == btn_yes:
-            item_name = self.selected_subcategory.text()
-            category_name = self.selected_category.text()
-            category_id = self.category_map.get(category_name)
+            item_id = self.selected_subcategory.data(Qt.UserRole)
 
-            # 從 SQLite 刪除，先取得 item_id
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("SELECT id FROM items WHERE category_id = ? AND name = ?", (category_id, item_name))
-            row = cursor.fetchone()
-            if row:
-                item_id = row[0]
-                cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
-                conn.commit()
-                # 更新記憶體
-                if item_name in self.item_map:
-                    del self.item_map[item_name]
-            conn.close()
-
-            # 從 UI 刪除
-            self.ui.listWidgetSubcategories.takeItem(self.ui.listWidgetSubcategories.row(self.selected_subcategory))
+            # 從 SQLite、記憶體與 UI 刪除
+            item = self.store.delete_item(self.current_category_id, item_id)
+            category_name = self.store.categories[self.current_category_id].name
+            self.engine.record_undo(("delete_item", item.name, category_name, item.id, item.due_at, item.position))
             self.selected_subcategory = None
             self.reset_editing_state()
 
+    def on_item_rows_moved(self, parent, start, end, destination, dest_row):
+        """拖曳排序完成後寫回新的順序，只更新被移動項目的排序鍵"""
+        index = dest_row - 1 if dest_row > start else dest_row
+        row = self.ui.listWidgetSubcategories.item(index)
+        if row is None or self.current_category_id is None:
+            return
+        self.engine.move_item_to(row.data(Qt.UserRole), index)
+
     def toggle_completed_status(self, item):
-        """當使用者勾選 CheckBox 時，改變項目的樣式，同時更新 SQLite 資料庫"""
-        if item.checkState() == Qt.Checked:
-            # 已完成：改變字體顏色為灰色，並加刪除線
-            font = item.font()
-            font.setStrikeOut(True)
-            item.setFont(font)
-            item.setForeground(QtGui.QColor("gray"))
-            completed = 1
-        else:
-            # 未完成：恢復正常字體
-            font = item.font()
-            font.setStrikeOut(False)
-            item.setFont(font)
-            item.setForeground(QtGui.QColor("black"))
-            completed = 0
-        # 使用 item_map 根據 item 名稱取得對應的資料庫 id
-        item_id = self.item_map.get(item.text())
+        """當使用者勾選 CheckBox 時更新 SQLite 資料庫（樣式由 CompletedItemDelegate 依勾選狀態繪製）"""
+        completed = 1 if item.checkState() == Qt.Checked else 0
+        # 列表項目上存有對應的資料庫 id
+        item_id = item.data(Qt.UserRole)
         if item_id is not None:
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("UPDATE items SET completed = ? WHERE id = ?", (completed, item_id))
-            conn.commit()
-            conn.close()
+            self.store.set_completed(self.current_category_id, item_id, completed)
 
     def back_to_categories(self):
-        self.ui.stackedWidget.setCurrentWidget(self.ui.pageCategories)
+        self.engine.show_categories()
+
+    def prefetch_category(self, item):
+        """在背景預取分類項目，之後進入該分類時直接使用快取"""
+        self.store.prefetch(item.data(Qt.UserRole))
 
     # 確認/取消按鈕
     def confirm_edit_task(self):
@@ -971,46 +1205,27 @@ class ToDoApp(QMainWindow):
             return
 
         if self.edit_mode == "add_category":
-            # 新增分類到 SQLite
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
+            # 新增分類到 SQLite、記憶體與 UI
             try:
-                cursor.execute("INSERT INTO categories (name) VALUES (?)", (new_text,))
-                conn.commit()
-                category_id = cursor.lastrowid  # 取得新分類的ID
+                category = self.store.add_category(new_text)
             except sqlite3.IntegrityError:
                 QMessageBox.warning(self, "提示", f"分類「{new_text}」已存在")
-                conn.close()
                 return
-            conn.close()
-
-            # 更新記憶體與 UI
-            self.category_map[new_text] = category_id
-            self.ui.listWidgetCategories.addItem(QListWidgetItem(new_text))
 
             # 記錄撤銷操作
-            self.last_action = ("delete_category", new_text, category_id)
-            self.reset_undo_timer()
+            self.engine.record_undo(("add_category", new_text, category.id))
 
         elif self.edit_mode == "edit_category" and self.selected_category:
             # 修改分類：更新 SQLite
             old_text = self.selected_category.text()
             category_id = self.category_map.get(old_text)
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("UPDATE categories SET name = ? WHERE id = ?", (new_text, category_id))
-            conn.commit()
-            conn.close()
-
-            # 更新 UI 與記憶體
-            self.selected_category.setText(new_text)
-            del self.category_map[old_text]
-            self.category_map[new_text] = category_id
+            try:
+                self.store.rename_category(category_id, new_text)
+            except sqlite3.IntegrityError:
+                QMessageBox.warning(self, "提示", f"分類「{new_text}」已存在")
+                return
 
-            self.last_action = ("edit_category", new_text, old_text, category_id)
-            self.reset_undo_timer()
+            self.engine.record_undo(("edit_category", new_text, old_text, category_id))
 
         self.reset_editing_state()
 
@@ -1028,46 +1243,24 @@ class ToDoApp(QMainWindow):
             category_name = self.selected_category.text()
             category_id = self.category_map.get(category_name)
 
-            # 存入 SQLite
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("INSERT INTO items (category_id, name, completed) VALUES (?, ?, ?)", (category_id, new_text, 0))
-            conn.commit()
-            item_id = cursor.lastrowid
-            conn.close()
-
-            # 更新 UI 與記憶體
-            item = QListWidgetItem(new_text)
-            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
-            item.setCheckState(Qt.Unchecked)
-            self.ui.listWidgetSubcategories.addItem(item)
-            self.item_map[new_text] = item_id
+            # 名稱中的時間設為提醒時間，存入 SQLite、記憶體與 UI
+            new_text, due_at = extract_due(new_text)
+            item = self.store.add_item(category_id, new_text, due_at=due_at)
 
             # 記錄撤銷操作
-            self.last_action = ("delete_item", new_text, category_name, item_id)
-            self.reset_undo_timer()
+            self.engine.record_undo(("add_item", new_text, category_name, item.id))
 
         elif self.edit_mode == "edit_subcategory" and self.selected_subcategory:
             # 修改項目：更新 SQLite
             old_text = self.selected_subcategory.text()
             category_name = self.selected_category.text()
             category_id = self.category_map.get(category_name)
+            item_id = self.selected_subcategory.data(Qt.UserRole)
 
-            conn = sqlite3.connect("todo.db")
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("UPDATE items SET name = ? WHERE category_id = ? AND name = ?", (new_text, category_id, old_text))
-            conn.commit()
-            conn.close()
-
-            # 更新 UI 與記憶體
-            self.selected_subcategory.setText(new_text)
-            del self.item_map[old_text]
-            self.item_map[new_text] = None  # 若能取得ID，可更新；否則後續需要重新載入
+            # 更新 SQLite、記憶體與 UI
+            self.store.rename_item(category_id, item_id, new_text)
 
-            self.last_action = ("edit_item", new_text, old_text, category_name)
-            self.reset_undo_timer()
+            self.engine.record_undo(("edit_item", new_text, old_text, category_name, item_id))
 
         self.reset_editing_state()
 
@@ -1077,6 +1270,7 @@ class ToDoApp(QMainWindow):
     # 選中事件
     def select_category(self, item):
         self.selected_category = item
+        self.prefetch_category(item)
         self.ui.btnEditCategory.setEnabled(True)
         self.ui.btnDeleteCategory.setEnabled(True)
         self.ui.btnManageItems.setEnabled(True)
@@ -1086,6 +1280,19 @@ class ToDoApp(QMainWindow):
         self.ui.btnEditSubcategory.setEnabled(True)
         self.ui.btnDeleteSubcategory.setEnabled(True)
 
+    def closeEvent(self, event):
+        """關閉視窗時停止背景預取並關閉所有已開啟的資料庫"""
+        stats = self.store.cache_stats()
+        print(f"項目快取命中率：{stats['hit_rate']:.0%}（命中 {stats['hits']}、未命中 {stats['misses']}、預取 {stats['prefetched']}）")
+        self.close_stream()
+        if self.asr is not None:
+            self.asr.close()
+        self.audio_importer.close()
+        for archiver in self.archivers.values():
+            archiver.close()
+        self.profiles.close()
+        super().closeEvent(event)
+
     # 重置狀態
     def reset_editing_state(self):
         self.ui.textEditEditTask.setVisible(False)
@@ -1102,8 +1309,13 @@ class ToDoApp(QMainWindow):
         self.edit_mode = None
 
 if __name__ == "__main__":
-    init_db()
+    if PROFILE_FLAG in sys.argv and not startup.profiling:
+        # 以 -X importtime 重新啟動自己，輸出各模組匯入與初始化階段的耗時
+        sys.exit(run_profile(__file__, [arg for arg in sys.argv[1:] if arg != PROFILE_FLAG]))
     app = QApplication(sys.argv)
+    startup.mark("建立 QApplication")
     window = ToDoApp()
+    startup.mark("初始化其餘元件")
     window.show()
+    QTimer.singleShot(0, lambda: startup.window_shown(app.quit))  # 事件迴圈開始時視窗已顯示
     sys.exit(app.exec_())
@@ -0,0 +1,108 @@
+"""完成項目封存前後的載入耗時
+
+建立含大量已完成項目（完成時間分散在過去一年）的資料庫，比較封存前後第一次讀取一個分類
+（未快取，與 load_items_for_category 相同）的耗時，並輸出封存吞吐量、單一交易（持有寫入鎖）
+的最長時間，以及查詢最近 7 天與全部完成記錄的耗時。
+
+    python benchmarks/bench_archive.py --categories 20 --items 5000 --completed 0.8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_archive import Archiver  # noqa: E402
+from todo_store import POSITION_GAP, TodoStore, init_db  # noqa: E402
+
+
+def build(path, categories, items, completed, seed):
+    """建立資料庫；已完成項目的完成記錄時間隨機分布在過去 365 天"""
+    init_db(path)
+    rng = random.Random(seed)
+    now = int(time.time())
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO categories (name) VALUES (?)", [(f"分類{c}",) for c in range(categories)])
+    rows, events = [], []
+    item_id = 0
+    for c in range(1, categories + 1):
+        for i in range(items):
+            item_id += 1
+            done = rng.random() < completed
+            rows.append((item_id, c, f"項目{i}", int(done), (i + 1) * POSITION_GAP))
+            if done:
+                events.append((item_id, c, f"項目{i}", 1, now - rng.randrange(365 * 86400)))
+    conn.executemany("INSERT INTO items (id, category_id, name, completed, position) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO completions (item_id, category_id, name, completed, at) VALUES (?, ?, ?, ?, ?)",
+                     events)
+    conn.commit()
+    conn.close()
+
+
+def cold_load(path, repeat):
+    """每次開新的 TodoStore，第一次讀取各分類的平均耗時（秒）"""
+    elapsed = []
+    for _ in range(repeat):
+        store = TodoStore(path)
+        store.load()
+        for category_id in store.categories:
+            start = time.perf_counter()
+            store.items(category_id)
+            elapsed.append(time.perf_counter() - start)
+        store.close()
+    return sum(elapsed) / len(elapsed)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--items", type=int, default=5000, help="每個分類的項目數")
+    parser.add_argument("--completed", type=float, default=0.8, help="已完成項目的比例")
+    parser.add_argument("--days", type=float, default=30, help="封存完成超過幾天的項目")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "todo.db")
+        build(path, args.categories, args.items, args.completed, args.seed)
+        before = cold_load(path, args.repeat)
+
+        archiver = Archiver(path)
+        cutoff = time.time() - args.days * 86400
+        batches = []  # 每個交易的耗時
+        moved = 0
+        while True:
+            count, batch_elapsed = timed(archiver.archive_batch, cutoff, args.batch_size)
+            if not count:
+                break
+            moved += count
+            batches.append(batch_elapsed)
+        elapsed = sum(batches)
+        after = cold_load(path, args.repeat)
+
+        total = args.categories * args.items
+        print(f"{total} 個項目，封存 {moved} 個：{elapsed:.2f} 秒（{moved / elapsed:.0f} 項/秒），"
+              f"{len(batches)} 個交易，最長 {max(batches) * 1000:.1f} ms")
+        print(f"第一次讀取一個分類：封存前 {before * 1000:.2f} ms，封存後 {after * 1000:.2f} ms"
+              f"（快 {before / after:.1f} 倍）")
+        recent, recent_elapsed = timed(archiver.history, since=time.time() - 7 * 86400)
+        everything, all_elapsed = timed(archiver.history)
+        print(f"完成記錄：最近 7 天 {len(recent)} 筆 {recent_elapsed * 1000:.1f} ms，"
+              f"全部 {len(everything)} 筆 {all_elapsed * 1000:.1f} ms（{len(archiver.partitions('completions'))} 個月份分區）")
+        archiver.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""語音辨識後端的速度與指令正確率
+
+以同一組 WAV 檔（單聲道 16-bit PCM，取樣率與收音相同）比較各個語音辨識後端（todo_asr）。每個音檔旁放
+同名的 .txt 作為答案，每行一句指令。音訊以收音的區塊大小依序送入後端，每塊之後取一次部分結果，
+與收音中的 App 相同。輸出：
+  載入：模型載入秒數
+  RTF：辨識耗時 / 音訊長度，小於 1 才能即時辨識
+  延遲：送入一句的最後一塊音訊到取得該句結果的耗時（p50 / p95）
+  CER：簡轉繁、數字轉換並去除空白與標點後的字錯誤率
+  句正確：與答案完全相同的句數比例
+  指令正確：分詞並解析後的指令與目標和答案相同的比例（--no-parse 略過，不需載入分詞模型）
+後端載入失敗（ex: 沒有安裝 faster-whisper）時顯示原因並略過。
+
+    python benchmarks/bench_asr.py fixtures/*.wav
+    python benchmarks/bench_asr.py fixtures/*.wav --backends whisper --whisper-model small --no-parse
+"""
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_asr import BACKENDS, load_backend  # noqa: E402
+from todo_audio import open_wav  # noqa: E402
+from todo_config import load_config  # noqa: E402
+from todo_history import command_key  # noqa: E402
+
+
+def read_fixture(path, sample_rate):
+    with open_wav(path) as wav:
+        if wav.getframerate() != sample_rate:
+            raise SystemExit(f"{path}：取樣率需為 {sample_rate} Hz（與設定的 sample_rate 相同）")
+        audio = wav.readframes(wav.getnframes())
+    answer = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(answer):
+        raise SystemExit(f"{path}：找不到答案檔 {answer}")
+    with open(answer, encoding="utf-8") as f:
+        expected = [line.strip() for line in f if line.strip()]
+    return audio, expected
+
+
+def recognize(backend, audio, block_size):
+    """以收音的區塊送入音訊，回傳（每句文字, 每句延遲秒數, 總耗時秒數）"""
+    step = block_size * 2  # int16
+    texts, latencies = [], []
+    backend.reset()
+    start = time.perf_counter()
+    for offset in range(0, len(audio), step):
+        begin = time.perf_counter()
+        result = backend.feed(audio[offset:offset + step])
+        if result is not None:
+            latencies.append(time.perf_counter() - begin)
+            texts.append(result.get("text", ""))
+        else:
+            backend.partial()
+    begin = time.perf_counter()
+    result = backend.finish()
+    if result.get("text", "").strip():
+        latencies.append(time.perf_counter() - begin)
+        texts.append(result["text"])
+    return [text.strip() for text in texts if text.strip()], latencies, time.perf_counter() - start
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def matches(expected, actual):
+    """依序對齊後相同的句數（辨識結果可能多出或少了句子）"""
+    return sum(block.size for block in difflib.SequenceMatcher(None, expected, actual).get_matching_blocks())
+
+
+def main():
+    config = load_config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="WAV 檔，旁邊需有同名的 .txt 答案檔")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--whisper-model", help="Whisper 模型名稱或目錄（預設依設定檔）")
+    parser.add_argument("--no-parse", action="store_true", help="不分詞解析，只比較文字")
+    args = parser.parse_args()
+    if args.whisper_model:
+        config.values["whisper_model"] = args.whisper_model
+
+    sample_rate, block_size = config.get("sample_rate"), config.get("block_size")
+    fixtures = [read_fixture(path, sample_rate) for path in args.paths]
+    audio_seconds = sum(len(audio) for audio, _ in fixtures) / 2 / sample_rate
+    expected_total = sum(len(expected) for _, expected in fixtures)
+
+    engine = None
+    if not args.no_parse:
+        from todo_engine import TodoEngine
+        from todo_store import TodoStore, init_db
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bench.db")
+        init_db(path)
+        engine = TodoEngine(TodoStore(path))
+
+    def normalize(texts):
+        from todo_nlp import convert_chinese_numbers, convert_simplified_to_traditional
+        return [command_key(convert_chinese_numbers(convert_simplified_to_traditional(text))) for text in texts]
+
+    def commands(texts):
+        """與 App 相同：簡轉繁後分詞，再轉換數字並解析"""
+        from todo_nlp import convert_simplified_to_traditional, normalize_tokens, segment
+        texts = [convert_simplified_to_traditional(text) for text in texts if text]
+        return [engine.parse_command(normalize_tokens(tokens)) for tokens in segment(texts)] if texts else []
+
+    print(f"{len(fixtures)} 個音檔，音訊 {audio_seconds:.1f} 秒，{expected_total} 句，每塊 {block_size} 個取樣")
+    print("後端      載入(秒)    RTF  延遲p50(ms)  延遲p95(ms)    CER  句正確  指令正確")
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = load_backend(config, name=name)
+        except Exception as e:
+            print(f"{name:<8}  無法載入：{e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        elapsed, latencies = 0.0, []
+        errors = characters = sentences = correct_commands = 0
+        for audio, expected in fixtures:
+            texts, file_latencies, seconds = recognize(backend, audio, block_size)
+            elapsed += seconds
+            latencies += file_latencies
+            expected_keys, actual_keys = normalize(expected), normalize(texts)
+            errors += edit_distance("".join(expected_keys), "".join(actual_keys))
+            characters += len("".join(expected_keys))
+            sentences += matches(expected_keys, actual_keys)
+            if engine is not None:
+                correct_commands += matches(commands(expected), commands(texts))
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000 if latencies else 0.0
+        command_rate = f"{correct_commands / expected_total:>8.0%}" if engine is not None else f"{'-':>8}"
+        print(f"{name:<8}  {load_seconds:>8.1f}  {elapsed / audio_seconds:>5.2f}  {p50:>11.1f}  {p95:>11.1f}"
+              f"  {errors / max(characters, 1):>5.1%}  {sentences / expected_total:>6.0%}  {command_rate}")
+
+    if engine is not None:
+        engine.store.close()
+        tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
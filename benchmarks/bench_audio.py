@@ -0,0 +1,57 @@
+"""語音檔離線辨識的平行擴充基準
+
+先以單一程序、不切段辨識一次作為基準，再以不同的工作程序數（長音檔切段）辨識同一批 WAV 檔，
+輸出耗時、倍速（音訊秒數 / 耗時）與加速比，並確認辨識出的句子與基準相同（切段不會把句子切斷）。
+模型載入時間包含在第一個片段內，因此音檔總長應遠大於載入時間。
+
+    python benchmarks/bench_audio.py memo1.wav memo2.wav --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_audio import SEGMENT_SECONDS, AudioImporter  # noqa: E402
+from todo_config import load_config  # noqa: E402
+
+
+def run(paths, model_path, workers, segment_seconds):
+    importer = AudioImporter(model_path, workers, segment_seconds)
+    start = time.perf_counter()
+    texts = []
+    audio_seconds = 0.0
+    try:
+        for path, frame, utterances, seconds in importer.transcribe(paths):
+            texts.extend(utterances)
+            audio_seconds += seconds
+    finally:
+        importer.close()
+    return texts, audio_seconds, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="單聲道 16-bit PCM WAV 檔")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}), help="要比較的工作程序數")
+    parser.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS)
+    parser.add_argument("--model", help="Vosk 模型路徑（預設依設定檔）")
+    args = parser.parse_args()
+    model_path = args.model or load_config().get("vosk_model")
+
+    baseline, audio_seconds, baseline_elapsed = run(args.paths, model_path, 1, 0)
+    print(f"基準（1 個程序、不切段）：{baseline_elapsed:.2f} 秒，{audio_seconds / baseline_elapsed:.1f} 倍速，"
+          f"{len(baseline)} 句")
+    failed = False
+    for workers in args.workers:
+        texts, audio_seconds, elapsed = run(args.paths, model_path, workers, args.segment_seconds)
+        same = texts == baseline
+        failed |= not same
+        print(f"{workers} 個程序：{elapsed:.2f} 秒，{audio_seconds / elapsed:.1f} 倍速，"
+              f"加速 {baseline_elapsed / elapsed:.2f} 倍，{len(texts)} 句{'' if same else '（與基準不同）'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""語音指令信心門檻的調整依據
+
+讀取程式寫入的信心記錄（confidence.jsonl），輸出信心分布，以及不同門檻下會被視為低信心的指令比例、
+其中被使用者取消或目標經模糊比對修正的數量（門檻以下這兩者越多、門檻以上越少，門檻越合適）。
+另外測量每個指令計算信心與低信心檢查的額外耗時，確認不影響辨識延遲。
+
+    python benchmarks/bench_confidence.py confidence.jsonl --thresholds 0.3 0.5 0.7 0.9
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_engine import TodoEngine, result_confidence  # noqa: E402
+from todo_store import TodoStore, init_db  # noqa: E402
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def overhead(repeat):
+    """result_confidence + check_low_confidence 每個指令的平均耗時（秒）"""
+    result = {"text": "刪除 分類 家物", "result": [{"word": word, "conf": conf} for word, conf
+                                                 in (("刪除", 1.0), ("分類", 0.98), ("家物", 0.31))]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "todo.db")
+        init_db(path)
+        store = TodoStore(path)
+        store.load()
+        for n in range(50):
+            store.add_category(f"分類{n}")
+        store.add_category("家務")
+        engine = TodoEngine(store)
+        engine.ask_confirmation = lambda message: False
+        start = time.perf_counter()
+        for _ in range(repeat):
+            engine.check_low_confidence(("delete_category", "家物"), result_confidence(result))
+        elapsed = time.perf_counter() - start
+        store.close()
+    return elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", nargs="?", help="信心記錄檔（JSON Lines）；省略時只測量額外耗時")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"每個指令的信心計算與檢查：{overhead(args.repeat) * 1e6:.0f} µs")
+    if not args.log:
+        return 0
+    records = read_log(args.log)
+    if not records:
+        print("記錄檔沒有資料")
+        return 1
+
+    print(f"{len(records)} 個語音指令")
+    print("信心分布：")
+    buckets = [0] * 10
+    for record in records:
+        buckets[min(int(record["confidence"] * 10), 9)] += 1
+    for low, count in enumerate(buckets):
+        print(f"  {low / 10:.1f}–{(low + 1) / 10:.1f}  {count:>5}  {'#' * round(40 * count / len(records))}")
+
+    print("門檻   低信心指令  其中取消  其中修正  門檻以上的未識別指令")
+    for threshold in args.thresholds:
+        below = [record for record in records if record["confidence"] < threshold]
+        above = [record for record in records if record["confidence"] >= threshold]
+        cancelled = sum(record["action"] == "cancelled" for record in below)
+        corrected = sum(record["action"] == "corrected" for record in below)
+        unknown = sum(record["command"] is None for record in above)
+        print(f"{threshold:>4.2f}  {len(below):>5}（{len(below) / len(records):>4.0%}）"
+              f"  {cancelled:>8}  {corrected:>8}  {unknown:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""指令記錄的命中率與延遲
+
+以 Zipf 分布（少數指令很常用）從 --distinct 種指令中抽出 --commands 個指令逐一執行，比較不使用與使用
+指令記錄時每個指令的延遲（run_text：分詞 + 解析 + 執行）與分詞模型實際處理的句數，並輸出命中率、
+索引淘汰的次數、從資料庫重建索引與常用指令建議的耗時。
+沒有 CKIP 模型時可用 --simulate 以「每次呼叫固定成本 + 每句成本」模擬模型耗時。
+
+    python benchmarks/bench_history.py --commands 2000 --distinct 300
+    python benchmarks/bench_history.py --simulate 80,5 --index-size 100
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import todo_nlp  # noqa: E402
+from todo_engine import TodoEngine  # noqa: E402
+from todo_history import CommandHistory  # noqa: E402
+from todo_nlp import SegmentBatcher  # noqa: E402
+from todo_store import TodoStore, init_db  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_segment import simulated_segmenter  # noqa: E402
+
+CATEGORIES = 20
+
+
+def word_segmenter(overhead, per_text):
+    """與 simulated_segmenter 相同的耗時，但依空白分詞，指令可以正確解析"""
+    simulated = simulated_segmenter(overhead, per_text)
+
+    def segment(texts, batch_size=256, show_progress=False):
+        simulated(texts, batch_size)
+        return [text.split() for text in texts]
+    return segment
+
+
+def make_commands(distinct, seed):
+    """各種指令文字（Vosk 中文模型的輸出以空白分隔詞）"""
+    rng = random.Random(seed)
+    commands = []
+    for n in range(distinct):
+        kind = rng.randrange(4)
+        if kind == 0:
+            commands.append(f"进入 分类 分类{n % CATEGORIES}")
+        elif kind == 1:
+            commands.append(f"新增 项目 事项{n} 明天 下午 三点")
+        elif kind == 2:
+            commands.append(f"完成 事项{n}")
+        else:
+            commands.append("返回")
+    return commands
+
+
+def zipf_stream(commands, count, seed, exponent=1.1):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(commands))]
+    return rng.choices(commands, weights, k=count)
+
+
+def run(path, stream, history):
+    """逐一執行指令，回傳每個指令的延遲（秒）與使用的指令記錄"""
+    store = TodoStore(path)
+    store.load()
+    engine = TodoEngine(store)
+    engine.history = history(store) if history else None
+    latencies = []
+    for text in stream:
+        start = time.perf_counter()
+        engine.run_text(text)
+        latencies.append(time.perf_counter() - start)
+    store.close()
+    return latencies, engine.history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300, help="不同指令的種類數")
+    parser.add_argument("--index-size", type=int, default=None, help="記憶體索引大小（預設 INDEX_SIZE）")
+    parser.add_argument("--simulate", metavar="OVERHEAD_MS,PER_TEXT_MS",
+                        help="不使用 CKIP 模型，改以固定成本模擬，ex: 80,5")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.simulate:
+        overhead, per_text = (float(value) / 1000 for value in args.simulate.split(","))
+        todo_nlp.batcher = SegmentBatcher(word_segmenter(overhead, per_text),
+                                          todo_nlp.batcher.batch_size, todo_nlp.batcher.max_delay)
+    todo_nlp.segment(["預熱"])
+    commands = make_commands(args.distinct, args.seed)
+    stream = zipf_stream(commands, args.commands, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.commands} 個指令（{args.distinct} 種，Zipf 分布）")
+        print("模式        p50(ms)  p95(ms)  平均(ms)  模型處理句數")
+        history = None
+        for label, use_history in (("無指令記錄", False), ("指令記錄", True)):
+            path = os.path.join(tmp, f"{label}.db")
+            init_db(path)
+            store = TodoStore(path)
+            store.load()
+            for n in range(CATEGORIES):
+                store.add_category(f"分類{n}")
+            store.close()
+
+            def make_history(store):
+                history = CommandHistory(store, **({"size": args.index_size} if args.index_size else {}))
+                return history.load()
+
+            texts = todo_nlp.batcher.texts
+            latencies, history = run(path, stream, make_history if use_history else None)
+            latencies.sort()
+            print(f"{label:<10}{statistics.median(latencies) * 1000:>8.2f}"
+                  f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>9.2f}"
+                  f"{statistics.mean(latencies) * 1000:>10.2f}{todo_nlp.batcher.texts - texts:>14}")
+
+        total = history.hits + history.misses
+        print(f"命中率 {history.hits / total:.0%}（{history.hits}/{total}），"
+              f"索引 {len(history.index)} 個指令，淘汰 {history.evicted} 次")
+
+        store = TodoStore(path)
+        start = time.perf_counter()
+        reloaded = CommandHistory(store, history.size).load()
+        rebuilt = time.perf_counter() - start
+        start = time.perf_counter()
+        for query in ("", "進入", "新增項目", "完成事項1"):
+            reloaded.suggestions(query)
+        suggest = (time.perf_counter() - start) / 4
+        print(f"從資料庫重建索引 {rebuilt * 1000:.1f} ms，常用指令建議 {suggest * 1000:.2f} ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""大量項目載入到列表的耗時
+
+在 QListWidget 中載入一個含 --items 個項目（部分已完成）的分類，比較：
+  逐筆：訊號與重繪不暫停，逐筆 addItem，已完成項目再各自建立 QFont／QColor 設定刪除線與灰色
+        （舊版勾選時的做法），每次設定都會觸發一次 itemChanged；
+  批次：fill_list 暫停訊號與重繪後一次加入，已完成的樣式由 CompletedItemDelegate 依勾選狀態繪製。
+輸出加入項目的耗時、加入後到畫面更新完成的耗時（含版面配置）與 itemChanged 次數。
+沒有顯示器時使用 offscreen 平台。
+
+    python benchmarks/bench_list.py --items 10000 --completed 0.5
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui  # noqa: E402
+from PyQt5.QtCore import Qt  # noqa: E402
+from PyQt5.QtWidgets import QApplication, QListWidget, QListWidgetItem  # noqa: E402
+
+# 主程式檔名含版本號，無法直接 import
+spec = importlib.util.spec_from_file_location("v_todo_app", os.path.join(ROOT, "app_v0.9.4.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+
+def make_row(n, completed):
+    row = QListWidgetItem(f"項目{n}")
+    row.setData(Qt.UserRole, n)
+    row.setFlags(row.flags() | Qt.ItemIsUserCheckable)
+    row.setCheckState(Qt.Checked if completed else Qt.Unchecked)
+    return row
+
+
+def one_by_one(widget, items):
+    widget.clear()
+    for n, completed in items:
+        row = make_row(n, completed)
+        widget.addItem(row)
+        if completed:
+            font = row.font()
+            font.setStrikeOut(True)
+            row.setFont(font)
+            row.setForeground(QtGui.QColor("gray"))
+
+
+def bulk(widget, items):
+    app_module.fill_list(widget, [make_row(n, completed) for n, completed in items])
+
+
+def measure(qapp, populate, items, delegate):
+    widget = QListWidget()
+    widget.resize(400, 600)
+    widget.setUniformItemSizes(delegate)
+    if delegate:
+        widget.setItemDelegate(app_module.CompletedItemDelegate(widget))
+    changed = []
+    widget.itemChanged.connect(changed.append)
+    widget.show()
+    qapp.processEvents()
+
+    start = time.perf_counter()
+    populate(widget, items)
+    added = time.perf_counter()
+    qapp.processEvents()
+    shown = time.perf_counter()
+    widget.close()
+    return added - start, shown - added, len(changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--completed", type=float, default=0.5, help="已完成項目的比例")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數（取最快一次）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    qapp = QApplication.instance() or QApplication(sys.argv)
+    rng = random.Random(args.seed)
+    items = [(n, rng.random() < args.completed) for n in range(args.items)]
+    print(f"{args.items} 個項目，已完成 {sum(completed for n, completed in items)} 個")
+    print("方式   加入(ms)  畫面更新(ms)  itemChanged")
+    for label, populate, delegate in (("逐筆", one_by_one, False), ("批次", bulk, True)):
+        runs = [measure(qapp, populate, items, delegate) for _ in range(args.repeat)]
+        add, show, changed = min(runs, key=lambda run: run[0] + run[1])
+        print(f"{label}  {add * 1000:>9.1f}  {show * 1000:>12.1f}  {changed:>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
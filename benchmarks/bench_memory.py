@@ -0,0 +1,42 @@
+"""模型堆疊的記憶體用量與載入／卸載耗時
+
+依序載入語音辨識模型（依 asr_backend）與 CKIP 分詞模型、各分詞一次，再全部卸載並重新載入，
+輸出每個元件載入時增加與卸載時釋放的 RSS，用來估計低記憶體機器上閒置卸載能省下多少。
+第一次載入 CKIP 時包含匯入 PyTorch，之後重新載入只剩模型權重。
+
+    python benchmarks/bench_memory.py --rounds 2
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_asr import load_backend  # noqa: E402
+from todo_config import load_config  # noqa: E402
+from todo_memory import format_bytes, memory, rss_bytes  # noqa: E402
+from todo_nlp import ws_driver  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2, help="載入／卸載的回合數")
+    args = parser.parse_args()
+    config = load_config()
+
+    speech = memory.register("語音辨識模型", lambda: load_backend(config))
+    print(f"啟動時 RSS：{format_bytes(rss_bytes())}")
+    for round_number in range(1, args.rounds + 1):
+        speech.get()
+        ws_driver(["新增項目明天下午三點開會"], show_progress=False)
+        loaded = rss_bytes()
+        unloaded = memory.unload_all()
+        print(f"第 {round_number} 回合：載入後 RSS {format_bytes(loaded)}，"
+              f"卸載 {len(unloaded)} 個元件後 {format_bytes(rss_bytes())}")
+        for row in memory.report():
+            print(f"  {row['name']}：載入 {row['load_seconds'] * 1000:.0f} ms、增加 {format_bytes(row['loaded_rss'])}；"
+                  f"卸載 {row['unload_seconds'] * 1000:.0f} ms、釋放 {format_bytes(row['freed_rss'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
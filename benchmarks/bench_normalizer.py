@@ -0,0 +1,124 @@
+"""中文數字／時間正規化的微基準
+
+比較舊版逐 token 正規表示式 + cn2an 的寫法與 todo_nlp.normalize_tokens 的單次掃描，
+輸入為已分詞的 token 列表，因此不受 CKIP 模型速度影響。正確性由 tests/test_nlp.py 檢查。
+
+    python benchmarks/bench_normalizer.py --cases 2000 --repeat 20
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import warnings
+
+import cn2an
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_nlp import chinese_to_int, normalize_tokens  # noqa: E402
+
+
+def legacy_convert(tokens):
+    """舊版 convert_chinese_numbers 的 token 處理部分（每次呼叫重新編譯與建表）"""
+    converted_tokens = []
+    chinese_number_pattern = re.compile(r'[零一二三四五六七八九十百千萬億]+')
+    time_mapping = {
+        "一點": "1點", "二點": "2點", "兩點": "2點", "三點": "3點", "四點": "4點",
+        "五點": "5點", "六點": "6點", "七點": "7點", "八點": "8點", "九點": "9點",
+        "十點": "10點", "十一點": "11點", "十二點": "12點",
+        "三十分": "30分", "十五分": "15分", "四十五分": "45分"
+    }
+    for raw_token in tokens:
+        token = raw_token.strip()
+        if not token:
+            continue
+        if token in time_mapping:
+            converted_token = time_mapping[token]
+        elif re.search(r"[點時分]", token):
+            parts = re.split(r"([點時分])", token)
+            arabic_time_parts = []
+            for part in parts:
+                if chinese_number_pattern.fullmatch(part):
+                    try:
+                        arabic_time_parts.append(str(cn2an.transform(part, "cn2an")))
+                    except ValueError:
+                        arabic_time_parts.append(part)
+                else:
+                    arabic_time_parts.append(part)
+            converted_token = "".join(arabic_time_parts)
+        elif chinese_number_pattern.fullmatch(token):
+            try:
+                converted_token = str(cn2an.transform(token, "cn2an"))
+            except ValueError:
+                converted_token = token
+        else:
+            converted_token = token
+        converted_tokens.append(converted_token)
+    converted_text = "".join(converted_tokens)
+    converted_text = re.sub(r'(\d+)點(\d+)分?', r'\1:\2', converted_text)
+    converted_text = re.sub(r'(\d+)時(\d+)分?', r'\1:\2', converted_text)
+    return converted_text
+
+
+def to_chinese(number):
+    return cn2an.an2cn(number, "low").replace("万", "萬").replace("亿", "億")
+
+
+def random_case(rng):
+    """產生一段指令的 token 列表與預期的正規化結果結尾；tests/test_nlp.py 也以此做隨機檢查"""
+    kind = rng.choice(["time", "half", "quarter", "hour", "number", "range", "text"])
+    prefix = rng.choice([["新增", "項目"], ["完成"], ["進入", "分類"]])
+    if kind == "time":
+        h, m = rng.randint(1, 12), rng.randint(1, 59)
+        time_tokens = rng.choice([[f"{to_chinese(h)}點{to_chinese(m)}分"],
+                                  [f"{to_chinese(h)}點", f"{to_chinese(m)}分"]])
+        return prefix + ["開會"] + time_tokens, f"開會{h}:{m:02d}"
+    if kind == "half":
+        h = rng.randint(1, 12)
+        return prefix + ["開會", f"{to_chinese(h)}點半"], f"開會{h}:30"
+    if kind == "quarter":
+        h, q = rng.randint(1, 12), rng.randint(1, 3)
+        return prefix + ["開會", f"{to_chinese(h)}點", f"{to_chinese(q)}刻"], f"開會{h}:{q * 15:02d}"
+    if kind == "hour":
+        h = rng.randint(1, 12)
+        return prefix + ["開會", f"{to_chinese(h)}點"], f"開會{h}點"
+    if kind == "number":
+        n = rng.randint(0, 99999999)
+        return prefix + ["買", to_chinese(n), "個", "蘋果"], f"買{n}個蘋果"
+    if kind == "range":
+        a, b = sorted(rng.sample(range(1, 100), 2))
+        return prefix + ["讀", to_chinese(a), "到", to_chinese(b), "頁"], f"讀{a}-{b}頁"
+    return prefix + ["一起", "寫", "報告"], "一起寫報告"
+
+
+def bench(func, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tokens in corpus:
+            func(tokens)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=2000, help="隨機案例數")
+    parser.add_argument("--repeat", type=int, default=20, help="計時重複次數（取最佳）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", module="cn2an")  # 舊版遇到「零六十」這類片段時的警告
+    rng = random.Random(args.seed)
+    corpus = [random_case(rng)[0] for _ in range(args.cases)]
+    legacy = bench(legacy_convert, corpus, args.repeat)
+    chinese_to_int.cache_clear()
+    current = bench(normalize_tokens, corpus, args.repeat)
+    print(f"舊版：{legacy * 1e6:.1f} µs/次")
+    print(f"新版：{current * 1e6:.1f} µs/次（{legacy / current:.1f} 倍）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""通知顯示時間與成本
+
+以 --interval 毫秒的間隔連續送出 --messages 則訊息（模擬快速連續的語音指令），比較：
+  舊做法：每則訊息 setText 後各自 QTimer.singleShot(2000) 隱藏，先前的計時器會提早隱藏後來的訊息；
+  Notifier：一個重複使用的計時器、佇列與合併。
+輸出最後一則訊息實際顯示的時間（應約為 NOTICE_DURATION）、期間建立的計時器數，
+以及每則訊息的平均處理時間。沒有顯示器時使用 offscreen 平台。
+
+    python benchmarks/bench_notify.py --messages 20 --interval 300
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtCore import QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication, QLabel, QWidget  # noqa: E402
+
+# 主程式檔名含版本號，無法直接 import
+spec = importlib.util.spec_from_file_location("v_todo_app", os.path.join(ROOT, "app_v0.9.4.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+
+windows = []
+
+
+def single_shot(label, parent):
+    def show(text):
+        label.setText(text)
+        label.setVisible(True)
+        QTimer.singleShot(app_module.NOTICE_DURATION, lambda: label.setVisible(False))
+    return show
+
+
+def notifier(label, parent):
+    return app_module.Notifier(label, parent).notify
+
+
+def run(qapp, make, messages, interval):
+    """回傳（最後一則訊息顯示的秒數, 建立的計時器數, 每則訊息的處理秒數）"""
+    parent = QWidget()
+    windows.append(parent)  # 舊做法的計時器在測量結束後仍會觸發，視窗不能先被回收
+    label = QLabel(parent)
+    parent.show()
+    timers = len(parent.findChildren(QTimer))
+    show = make(label, parent)
+    last = f"訊息{messages - 1}"
+
+    def showing():
+        return label.isVisible() and label.text() == last
+
+    spent = 0.0
+    shown_at = hidden_at = None
+    start = time.monotonic()
+    sent = 0
+    while (hidden_at is None or sent < messages) and time.monotonic() - start < (messages * interval + 10 * app_module.NOTICE_DURATION) / 1000:
+        now = time.monotonic()
+        if sent < messages and (now - start) * 1000 >= sent * interval:
+            begin = time.perf_counter()
+            show(f"訊息{sent}")
+            spent += time.perf_counter() - begin
+            sent += 1
+            if shown_at is None and showing():
+                shown_at = time.monotonic()
+        qapp.processEvents()
+        if shown_at is None and showing():
+            shown_at = time.monotonic()
+        elif shown_at is not None and not showing():
+            hidden_at = time.monotonic()
+        time.sleep(0.002)
+    parent.close()
+    # QTimer.singleShot 的計時器沒有 parent，以送出的訊息數計
+    timers = messages if make is single_shot else len(parent.findChildren(QTimer)) - timers
+    duration = (hidden_at - shown_at) if shown_at is not None and hidden_at is not None else 0.0
+    return duration, timers, spent / messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=300, help="訊息間隔（毫秒）")
+    args = parser.parse_args()
+
+    qapp = QApplication.instance() or QApplication(sys.argv)
+    print(f"{args.messages} 則訊息，間隔 {args.interval:g} ms，預期顯示 {app_module.NOTICE_DURATION} ms")
+    print("方式        最後一則顯示(ms)  計時器數  每則處理(µs)")
+    for label, make in (("singleShot", single_shot), ("Notifier", notifier)):
+        duration, timers, per_message = run(qapp, make, args.messages, args.interval)
+        print(f"{label:<10}  {duration * 1000:>16.0f}  {timers:>8}  {per_message * 1e6:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
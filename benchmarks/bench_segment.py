@@ -0,0 +1,103 @@
+"""分詞微批次的延遲／吞吐量取捨
+
+以開放式負載（依卜瓦松過程到達的單句文字，多個執行緒同時送出）比較不同的 batch_size 與等待時間：
+batch_size=1、等待 0 毫秒即舊版每句各呼叫一次模型的做法。輸出每句延遲（p50/p95）、吞吐量與平均每批句數。
+沒有 CKIP 模型時可用 --simulate 以「每次呼叫固定成本 + 每句成本」模擬模型耗時。
+
+    python benchmarks/bench_segment.py --rate 200 --seconds 5
+    python benchmarks/bench_segment.py --simulate 30,1.5 --batch-sizes 1 8 32 --delays 0 5 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_nlp import SegmentBatcher, ws_driver  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "新增項目明天下午三點開會", "進入分類工作", "完成買牛奶", "刪除項目繳電費", "把開會移到最上面",
+    "修改項目報告為季度報告", "新增分類家務", "返回", "新增項目二十五號交房租", "撤銷",
+]
+
+
+def simulated_segmenter(overhead, per_text):
+    """模擬模型：每次呼叫固定 overhead 秒加每句 per_text 秒（sleep 會釋放 GIL，與模型推論相同）"""
+    def segment(texts, batch_size=256, show_progress=False):
+        for start in range(0, len(texts), batch_size):
+            time.sleep(overhead + per_text * len(texts[start:start + batch_size]))
+        return [list(text) for text in texts]
+    return segment
+
+
+def run(segmenter, batch_size, delay, rate, seconds, producers, seed):
+    batcher = SegmentBatcher(segmenter, batch_size, delay)
+    batcher.segment(["預熱"])
+    batcher.batches = batcher.texts = 0
+
+    def producer(index):
+        rng = random.Random(seed + index)
+        latencies = []  # 由分詞執行緒的 callback 寫入
+        next_time = time.perf_counter()
+        end = next_time + seconds
+        while next_time < end:
+            next_time += rng.expovariate(rate / producers)
+            wait = next_time - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            submitted = time.perf_counter()
+            future = batcher.submit([rng.choice(SAMPLE_TEXTS)])[0]
+            future.add_done_callback(lambda f, submitted=submitted: latencies.append(time.perf_counter() - submitted))
+        return latencies
+
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(producer(i))) for i in range(producers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.segment(["結束"])  # 佇列依序處理，這一句完成時先前送出的都已完成
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        "texts": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "per_batch": (batcher.texts - 1) / max(1, batcher.batches - 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="每秒送出的句數（所有執行緒合計）")
+    parser.add_argument("--seconds", type=float, default=3, help="每組設定的執行秒數")
+    parser.add_argument("--producers", type=int, default=4, help="同時送出文字的執行緒數")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--delays", type=float, nargs="+", default=[0, 2, 5, 20], help="等待毫秒數")
+    parser.add_argument("--simulate", metavar="OVERHEAD_MS,PER_TEXT_MS",
+                        help="不使用 CKIP 模型，改以固定成本模擬，ex: 30,1.5")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    segmenter = ws_driver
+    if args.simulate:
+        overhead, per_text = (float(value) / 1000 for value in args.simulate.split(","))
+        segmenter = simulated_segmenter(overhead, per_text)
+
+    print(f"到達率 {args.rate:g} 句/秒、{args.producers} 個執行緒、每組 {args.seconds:g} 秒")
+    print("batch_size  等待(ms)  吞吐量(句/秒)  p50(ms)  p95(ms)  平均每批句數")
+    for batch_size in args.batch_sizes:
+        for delay in args.delays:
+            result = run(segmenter, batch_size, delay / 1000, args.rate, args.seconds, args.producers, args.seed)
+            print(f"{batch_size:>10}  {delay:>8g}  {result['throughput']:>13.0f}  {result['p50'] * 1000:>7.1f}"
+                  f"  {result['p95'] * 1000:>7.1f}  {result['per_batch']:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
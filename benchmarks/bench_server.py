@@ -0,0 +1,178 @@
+"""同步伺服器的一致性檢查與並行客戶端基準
+
+1. 以 LoopbackTransport（不經網路的本機替身）讓多個 RemoteStore 隨機操作同一個伺服器，
+   檢查推播套用後每個客戶端的快取都與伺服器一致。
+2. 在背景執行緒啟動 HTTP 伺服器，多個執行緒透過連線池同時送出請求，
+   量測吞吐量與延遲，並確認透過推播同步的客戶端最後與伺服器一致。
+
+    python benchmarks/bench_server.py --clients 8 --ops 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_client import HTTPTransport, LoopbackTransport, RemoteStore  # noqa: E402
+from todo_server import TodoServer, start_server_thread  # noqa: E402
+from todo_store import TodoStore, init_db  # noqa: E402
+
+
+def snapshot(store):
+    """比較用的狀態：{分類名稱: [(項目名稱, 完成), ...]}（依排序）"""
+    return {category.name: [(item.name, item.completed) for item in store.items(category_id)]
+            for category_id, category in sorted(store.categories.items())}
+
+
+def random_op(store, rng, tag):
+    """對 RemoteStore 做一個隨機操作；名稱衝突等預期內的錯誤直接略過"""
+    category_ids = list(store.categories)
+    try:
+        if not category_ids or rng.random() < 0.05:
+            store.add_category(f"分類{tag}-{rng.randrange(1000)}")
+            return
+        category_id = rng.choice(category_ids)
+        items = store.items(category_id)
+        roll = rng.random()
+        if not items or roll < 0.4:
+            store.add_item(category_id, f"項目{tag}-{rng.randrange(10000)}")
+        elif roll < 0.55:
+            store.rename_item(category_id, rng.choice(items).id, f"改名{tag}-{rng.randrange(10000)}")
+        elif roll < 0.7:
+            store.set_completed(category_id, rng.choice(items).id, rng.random() < 0.5)
+        elif roll < 0.85:
+            store.move_item(category_id, rng.choice(items).id, rng.randrange(len(items)))
+        elif roll < 0.98:
+            store.delete_item(category_id, rng.choice(items).id)
+        else:
+            store.delete_category(category_id)
+    except (KeyError, sqlite3.IntegrityError):  # 其他客戶端剛刪除的資料、名稱重複
+        pass
+
+
+def check_loopback(clients, ops, rng):
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "loopback.db")
+    init_db(db_path)
+    store = TodoStore(db_path)
+    store.load()
+    server = TodoServer(store)
+    remotes = [RemoteStore(LoopbackTransport(server)) for _ in range(clients)]
+    for remote in remotes:
+        remote.load()
+    for step in range(ops):
+        remote = rng.choice(remotes)
+        remote.poll_changes()
+        random_op(remote, rng, step)
+    expected = snapshot(store)
+    mismatches = 0
+    for remote in remotes:
+        remote.poll_changes()
+        if snapshot(remote) != expected:
+            mismatches += 1
+    store.close()
+    return mismatches, sum(len(items) for items in expected.values())
+
+
+def run_http(clients, ops, pool_size, seed):
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "server.db")
+    server, port = start_server_thread(db_path)
+    url = f"http://127.0.0.1:{port}"
+
+    # 以推播同步的觀察者
+    watcher = RemoteStore(HTTPTransport(url))
+    watcher.load()
+    setup = RemoteStore(HTTPTransport(url))
+    setup.load()
+    category_ids = [setup.add_category(f"分類{i}").id for i in range(max(1, clients // 2))]
+    for category_id in category_ids:
+        watcher.items(category_id)  # 快取分類，之後只靠推播更新
+
+    transport = HTTPTransport(url, pool_size=pool_size)  # 所有執行緒共用同一個連線池
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        local = []
+        for n in range(ops):
+            category_id = rng.choice(category_ids)
+            start = time.perf_counter()
+            if n % 4 == 3:
+                transport.request("GET", f"/categories/{category_id}/items")
+            else:
+                status, data = transport.request("POST", f"/categories/{category_id}/items",
+                                                 {"name": f"項目{index}-{n}"})
+                if n % 4 == 1:
+                    transport.request("PATCH", f"/categories/{category_id}/items/{data['id']}",
+                                      {"completed": 1})
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # 等待推播送達
+    expected = None
+    for _ in range(50):
+        time.sleep(0.1)
+        watcher.poll_changes()
+        reference = RemoteStore(HTTPTransport(url))
+        reference.load()
+        expected = snapshot(reference)
+        reference.close()
+        if snapshot(watcher) == expected:
+            break
+    consistent = snapshot(watcher) == expected
+
+    server.stop()
+    for store in (watcher, setup):
+        store.close()
+    transport.close()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "connections": transport.connections_opened,
+        "consistent": consistent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="並行客戶端（執行緒）數")
+    parser.add_argument("--ops", type=int, default=200, help="每個客戶端的操作數")
+    parser.add_argument("--pool-size", type=int, default=0, help="連線池大小（預設與客戶端數相同）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mismatches, items = check_loopback(4, args.ops * 4, random.Random(args.seed))
+    print(f"本機替身一致性：4 個客戶端、{args.ops * 4} 次隨機操作、{items} 個項目，不一致 {mismatches} 個")
+
+    failed = bool(mismatches)
+    for pool_size in sorted({1, args.pool_size or args.clients}):
+        result = run_http(args.clients, args.ops, pool_size, args.seed)
+        print(f"HTTP：{args.clients} 個客戶端、連線池 {pool_size}（建立 {result['connections']} 條連線）："
+              f"{result['requests'] / result['elapsed']:.0f} 次操作/秒，"
+              f"p50 {result['p50'] * 1000:.1f} ms、p95 {result['p95'] * 1000:.1f} ms，"
+              f"推播同步{'一致' if result['consistent'] else '不一致'}")
+        failed |= not result["consistent"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""依部分辨識結果預先分詞的延遲比較
+
+模擬說話時 Vosk 逐詞更新的部分結果（每個詞間隔 --word-ms 毫秒），說完後經過 --endpoint-ms
+毫秒的靜音才得到最終結果。比較「最終結果出現 → 指令執行完成」的延遲：
+不預先分詞時最終結果出現後才送出分詞；預先分詞時每次部分結果改變就送出，最終結果只需確認。
+另外輸出模型實際處理的句數，估計預先分詞多花的運算量。
+沒有 CKIP 模型時可用 --simulate 以「每次呼叫固定成本 + 每句成本」模擬模型耗時。
+
+    python benchmarks/bench_speculation.py --rounds 3
+    python benchmarks/bench_speculation.py --simulate 80,5 --word-ms 200 --endpoint-ms 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import todo_nlp  # noqa: E402
+from todo_engine import TodoEngine  # noqa: E402
+from todo_nlp import SegmentBatcher, normalize_tokens  # noqa: E402
+from todo_store import TodoStore, init_db  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_segment import simulated_segmenter  # noqa: E402
+
+# Vosk 中文模型的輸出以空白分隔詞
+UTTERANCES = [
+    "进入 分类 工作", "新增 项目 明天 下午 三点 开会", "新增 项目 写 周报", "完成 写 周报",
+    "把 开会 移到 最上面", "修改 项目 开会 为 部门 会议", "删除 项目 部门 会议", "返回",
+]
+
+
+def partials(utterance):
+    """說話過程中逐詞增加的部分結果"""
+    words = utterance.split()
+    return [" ".join(words[:n]) for n in range(1, len(words) + 1)]
+
+
+def run(engine, speculate, word_delay, endpoint_delay):
+    """依序「說出」每一句，回傳每句從最終結果到執行完成的延遲（秒）"""
+    latencies = []
+    for utterance in UTTERANCES:
+        speculation = None
+        for partial in partials(utterance):
+            if speculate:
+                speculation = engine.speculate(partial, speculation)
+            time.sleep(word_delay)
+            if speculation is not None:
+                engine.prepare(speculation)
+        time.sleep(endpoint_delay)  # 說完後的靜音，辨識器據此判斷句子結束
+        if speculation is not None:
+            engine.prepare(speculation)
+
+        final = time.perf_counter()
+        future = engine.confirm(speculation, utterance) if speculate else None
+        if future is None:
+            future = engine.submit_batch([utterance])[0]
+        engine.run_segmented([future.result()])
+        latencies.append(time.perf_counter() - final)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3, help="整組句子重複的次數")
+    parser.add_argument("--word-ms", type=float, default=250, help="部分結果增加一個詞的間隔")
+    parser.add_argument("--endpoint-ms", type=float, default=400, help="說完到得到最終結果的靜音時間")
+    parser.add_argument("--simulate", metavar="OVERHEAD_MS,PER_TEXT_MS",
+                        help="不使用 CKIP 模型，改以固定成本模擬，ex: 80,5")
+    args = parser.parse_args()
+
+    if args.simulate:
+        overhead, per_text = (float(value) / 1000 for value in args.simulate.split(","))
+        todo_nlp.batcher = SegmentBatcher(simulated_segmenter(overhead, per_text),
+                                          todo_nlp.batcher.batch_size, todo_nlp.batcher.max_delay)
+    # 預先載入模型與數字轉換，第一句不包含載入時間
+    normalize_tokens(todo_nlp.segment(["預熱"])[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "todo.db")
+        init_db(path)
+        store = TodoStore(path)
+        store.load()
+        store.add_category("工作")
+        engine = TodoEngine(store)
+
+        print(f"每詞 {args.word_ms:g} ms、句尾靜音 {args.endpoint_ms:g} ms，{len(UTTERANCES)} 句 × {args.rounds} 回合")
+        print("模式        p50(ms)  p95(ms)  平均(ms)  模型處理句數")
+        for speculate in (False, True):
+            latencies = []
+            texts = todo_nlp.batcher.texts
+            for _ in range(args.rounds):
+                latencies += run(engine, speculate, args.word_ms / 1000, args.endpoint_ms / 1000)
+            latencies.sort()
+            label = "預先分詞" if speculate else "最終結果後"
+            print(f"{label:<10}{statistics.median(latencies) * 1000:>8.1f}"
+                  f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>9.1f}"
+                  f"{statistics.mean(latencies) * 1000:>10.1f}{todo_nlp.batcher.texts - texts:>14}")
+        stats = engine.speculations
+        print(f"預先分詞：送出 {stats['submitted']} 次，命中 {stats['hits']} 句，未命中 {stats['misses']} 句")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""分類統計：彙總表與 COUNT(*) 掃描的比較
+
+建立含大量項目的資料庫，比較每次以 GROUP BY 掃描 items 計算各分類項目數／完成數，
+與直接讀取觸發器維護的 category_stats 的耗時，並確認兩者結果相同；
+另外以 todo_transfer 的大量匯入比較有無統計觸發器的寫入耗時，估計觸發器的額外成本。
+
+    python benchmarks/bench_stats.py --categories 200 --items 500
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_store import init_db  # noqa: E402
+from todo_transfer import import_rows  # noqa: E402
+
+STATS_TRIGGERS = ["categories_insert_stats", "categories_delete_stats", "items_insert_stats",
+                  "items_delete_stats", "items_update_stats"]
+SCAN_QUERY = ("SELECT c.id, COUNT(i.id), COALESCE(SUM(i.completed != 0), 0) "
+              "FROM categories c LEFT JOIN items i ON i.category_id = c.id GROUP BY c.id ORDER BY c.id")
+STATS_QUERY = "SELECT category_id, total, completed FROM category_stats ORDER BY category_id"
+
+
+def make_rows(categories, items, seed):
+    rng = random.Random(seed)
+    for c in range(categories):
+        for i in range(items):
+            yield f"分類{c}", f"項目{i}", int(rng.random() < 0.4), None, float(i + 1)
+
+
+def build(path, categories, items, seed, triggers=True):
+    """建立資料庫並匯入資料，回傳匯入耗時秒數"""
+    init_db(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    if not triggers:
+        for name in STATS_TRIGGERS:
+            conn.execute(f"DROP TRIGGER {name}")
+    start = time.perf_counter()
+    import_rows(conn, make_rows(categories, items, seed))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def best_of(conn, query, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = conn.execute(query).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500, help="每個分類的項目數")
+    parser.add_argument("--repeat", type=int, default=20, help="查詢次數（取最快一次）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = build(os.path.join(tmp, "plain.db"), args.categories, args.items, args.seed, triggers=False)
+        path = os.path.join(tmp, "stats.db")
+        with_stats = build(path, args.categories, args.items, args.seed)
+        total = args.categories * args.items
+        print(f"匯入 {total} 個項目：無統計觸發器 {plain:.2f} 秒，有統計觸發器 {with_stats:.2f} 秒"
+              f"（+{(with_stats / plain - 1) * 100:.0f}%）")
+
+        conn = sqlite3.connect(path)
+        scan, expected = best_of(conn, SCAN_QUERY, args.repeat)
+        stats, actual = best_of(conn, STATS_QUERY, args.repeat)
+        conn.close()
+        print(f"COUNT(*) 掃描：{scan * 1000:.2f} ms；讀取 category_stats：{stats * 1000:.2f} ms"
+              f"（快 {scan / stats:.0f} 倍）")
+        if actual != expected:
+            print("彙總表與掃描結果不同")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
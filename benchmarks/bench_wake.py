@@ -0,0 +1,94 @@
+"""喚醒詞待命的閒置 CPU 用量
+
+以與收音相同的區塊大小送入一段「沒有人下指令」的音訊（--wav 指定的錄音，或產生的低音量雜訊），
+比較完整辨識器（收音中的 AcceptWaveform + PartialResult）與只帶喚醒詞文法的 WakeWordDetector
+每秒音訊所花的 CPU 時間，換算為即時收音時佔用單一核心的百分比。
+另外確認錄音中喚醒詞被偵測到的次數（--wav 含喚醒詞時應大於 0，雜訊應為 0）。
+
+    python benchmarks/bench_wake.py --seconds 60
+    python benchmarks/bench_wake.py --wav idle_room.wav --wake-word 小助手
+"""
+import argparse
+import array
+import json
+import os
+import random
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from todo_audio import WakeWordDetector  # noqa: E402
+from todo_config import load_config  # noqa: E402
+
+
+def noise(seconds, sample_rate, level, seed):
+    """低音量的隨機雜訊（16-bit 單聲道 PCM），模擬沒有人說話的房間"""
+    rng = random.Random(seed)
+    samples = array.array("h", (int(rng.gauss(0, level)) for _ in range(int(seconds * sample_rate))))
+    return samples.tobytes()
+
+
+def read_wav(path, sample_rate):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != sample_rate:
+            raise SystemExit(f"{path} 需為 {sample_rate} Hz 單聲道 16-bit PCM")
+        return wav.readframes(wav.getnframes())
+
+
+def blocks(audio, block_size):
+    step = block_size * 2  # int16
+    return [audio[i:i + step] for i in range(0, len(audio), step)]
+
+
+def full_recognizer(recognizer, chunks):
+    for data in chunks:
+        if recognizer.AcceptWaveform(data):
+            json.loads(recognizer.Result())
+        else:
+            json.loads(recognizer.PartialResult())
+    return 0
+
+
+def wake_detector(detector, chunks):
+    return sum(detector.feed(data) for data in chunks)
+
+
+def cpu_time(function, *args):
+    """程序 CPU 時間（秒），不含等待音訊的時間"""
+    start = time.process_time()
+    result = function(*args)
+    return time.process_time() - start, result
+
+
+def main():
+    config = load_config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wav", help="閒置時的錄音（預設產生雜訊）")
+    parser.add_argument("--seconds", type=float, default=60, help="產生的雜訊秒數")
+    parser.add_argument("--level", type=float, default=300, help="雜訊的標準差（int16）")
+    parser.add_argument("--wake-word", default=config.get("wake_word"))
+    parser.add_argument("--model", help="Vosk 模型路徑（預設依設定檔）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+    SetLogLevel(-1)
+    sample_rate, block_size = config.get("sample_rate"), config.get("block_size")
+    model = Model(args.model or config.get("vosk_model"))
+    audio = read_wav(args.wav, sample_rate) if args.wav else noise(args.seconds, sample_rate, args.level, args.seed)
+    chunks = blocks(audio, block_size)
+    seconds = len(audio) / 2 / sample_rate
+
+    full, _ = cpu_time(full_recognizer, KaldiRecognizer(model, sample_rate), chunks)
+    wake, detections = cpu_time(wake_detector, WakeWordDetector(model, sample_rate, args.wake_word), chunks)
+    print(f"{seconds:.0f} 秒音訊，每塊 {block_size} 個取樣")
+    print("模式          CPU(秒)  即時收音佔用單核")
+    print(f"完整辨識器  {full:>9.2f}  {full / seconds:>14.1%}")
+    print(f"喚醒詞待命  {wake:>9.2f}  {wake / seconds:>14.1%}（少 {full / wake if wake else float('inf'):.1f} 倍）")
+    print(f"偵測到喚醒詞「{args.wake_word}」{detections} 次")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
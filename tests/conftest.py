@@ -0,0 +1,71 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 需在匯入 Qt 與 todo_nlp（匯入時讀取設定）之前設定：沒有顯示器也能開視窗，不讀取使用者的設定檔
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+os.environ["VTODO_CONFIG"] = os.path.join(tempfile.mkdtemp(prefix="vtodo-tests-"), "v_todo.json")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", help="一併執行標記為 slow 的大量資料測試")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: 大量資料與延遲預算的測試，需加上 --runslow 才執行")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip = pytest.mark.skip(reason="需加上 --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+def word_segmenter(texts, batch_size=256, show_progress=False):
+    """依空白分詞，取代 CKIP 模型；語音指令與 Vosk 的輸出相同，以空白分隔詞"""
+    return [text.split() for text in texts]
+
+
+@pytest.fixture
+def segmenter(monkeypatch):
+    import todo_nlp
+    batcher = todo_nlp.SegmentBatcher(word_segmenter, todo_nlp.batcher.batch_size, todo_nlp.batcher.max_delay)
+    monkeypatch.setattr(todo_nlp, "batcher", batcher)
+    return batcher
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(scope="session")
+def app_module(qapp):
+    # 主程式檔名含版本號，無法直接 import
+    spec = importlib.util.spec_from_file_location("v_todo_app", os.path.join(ROOT, "app_v0.9.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def window(app_module, qapp, segmenter, tmp_path, monkeypatch):
+    """以暫存資料庫開啟的主視窗；不在背景預先載入語音與分詞模型"""
+    from todo_memory import memory
+    monkeypatch.setenv("VTODO_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("VTODO_CONFIDENCE_LOG", "")
+    monkeypatch.setattr(memory, "preload", lambda names=None: None)
+    window = app_module.ToDoApp()
+    window.show()
+    yield window
+    window.close()
@@ -0,0 +1,12 @@
+"""主視窗的指令佇列"""
+import time
+
+
+def test_queue_commands_keeps_confidences_with_their_texts(window, qapp):
+    window.queue_commands(["", "新增 分類 甲", "  ", "新增 分類 乙"], confidences=[0.1, 0.9, 0.2, 0.8])
+    assert [confidence for _, _, confidence in window.pending_commands] == [0.9, 0.8]
+    deadline = time.monotonic() + 5
+    while window.pending_commands and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert {"甲", "乙"} <= set(window.store.category_map)
@@ -0,0 +1,51 @@
+"""完成記錄與封存"""
+import sqlite3
+
+import pytest
+
+from todo_archive import Archiver
+from todo_store import init_db
+
+DAY = 86400
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "todo.db")
+    init_db(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO categories (id, name) VALUES (1, '工作')")
+        conn.executemany("INSERT INTO items (id, category_id, name, completed, position) VALUES (?, 1, ?, 0, ?)",
+                         [(1, "未完成", 1), (2, "上個月完成", 2)])
+        conn.execute("UPDATE items SET completed = 1 WHERE id = 2")
+        conn.execute("UPDATE completions SET at = at - 40 * ? WHERE item_id = 2", (DAY,))
+        conn.execute("INSERT INTO items (id, category_id, name, completed, position) VALUES (3, 1, '匯入時已完成', 1, 3)")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def archiver(db_path):
+    archiver = Archiver(db_path)
+    yield archiver
+    archiver.close()
+
+
+def remaining(archiver):
+    return [row[0] for row in archiver.conn.execute("SELECT id FROM items ORDER BY id")]
+
+
+def test_only_checking_an_item_records_completion(archiver):
+    rows = archiver.conn.execute("SELECT item_id, completed FROM completions").fetchall()
+    assert rows == [(2, 1)]  # 新增時就已完成的項目不知道完成時間，不記錄
+
+
+def test_archive_skips_undated_items_by_default(archiver):
+    assert archiver.archive(30) == 1
+    assert remaining(archiver) == [1, 3]
+
+
+def test_archive_include_undated(archiver):
+    assert archiver.archive(30, include_undated=True) == 2
+    assert remaining(archiver) == [1]
@@ -0,0 +1,165 @@
+"""背景語音辨識（SpeechDecoder）與收音流程；以假的後端代替語音模型"""
+import queue
+import threading
+import time
+
+import pytest
+
+from todo_asr import SpeechDecoder
+
+END = b"|"  # 假音訊：一塊是一個詞，END 表示句尾靜音
+
+
+class FakeBackend:
+    """每塊音訊是一個詞；finish 時模擬較慢的解碼，並記錄在哪個執行緒執行"""
+    name = "fake"
+    supports_wake = False
+
+    def __init__(self, decode_seconds=0.0):
+        self.decode_seconds = decode_seconds
+        self.threads = set()
+        self.reset()
+
+    def feed(self, data):
+        self.threads.add(threading.current_thread().name)
+        if data == END:
+            return self.finish()
+        self.words.append(data.decode())
+        return None
+
+    def partial(self):
+        return " ".join(self.words)
+
+    def finish(self):
+        time.sleep(self.decode_seconds)
+        result = {"text": " ".join(self.words), "result": [{"word": word, "conf": 1.0} for word in self.words]}
+        self.reset()
+        return result
+
+    def reset(self):
+        self.words = []
+
+
+def words(text):
+    return [part.encode() for part in text.split()]
+
+
+def test_decoder_keeps_utterance_order():
+    backend = FakeBackend()
+    decoder = SpeechDecoder(backend)
+    for data in words("新增 分類 甲") + [END] + words("新增 分類 乙"):
+        decoder.feed(data)
+    decoder.finish().result(timeout=5)
+    assert [result["text"] for result in decoder.results()] == ["新增 分類 甲", "新增 分類 乙"]
+    assert threading.current_thread().name not in backend.threads
+    decoder.close()
+
+
+def test_decoder_reset_drops_pending_audio():
+    decoder = SpeechDecoder(FakeBackend())
+    for data in words("新增 分類") + [END] + words("刪除"):
+        decoder.feed(data)
+    decoder.reset()
+    decoder.finish().result(timeout=5)
+    assert [result["text"] for result in decoder.results()] == [""]
+    decoder.close()
+
+
+@pytest.fixture
+def voice_window(app_module, window, monkeypatch):
+    """收音時不開麥克風，音訊直接放進 audio_queue"""
+    def open_stream():
+        window.audio_queue = queue.Queue()
+        window.speech_timer.start(app_module.SPEECH_POLL)
+    monkeypatch.setattr(window, "open_stream", open_stream)
+    return window
+
+
+def wait_until(qapp, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_stop_decodes_the_last_utterance_in_the_background(voice_window, qapp, monkeypatch):
+    backend = FakeBackend(decode_seconds=0.5)
+    monkeypatch.setattr(voice_window.speech_slot, "loader", lambda: backend)
+    voice_window.toggle_voice_input()
+    for data in words("新增 分類 甲") + [END] + words("新增 分類 乙"):
+        voice_window.audio_queue.put(data)
+    wait_until(qapp, lambda: "甲" in voice_window.store.category_map)
+
+    start = time.perf_counter()
+    voice_window.toggle_voice_input()
+    assert time.perf_counter() - start < 0.3  # 不等最後一句辨識完成
+    assert voice_window.is_recording
+    wait_until(qapp, lambda: not voice_window.is_recording and not voice_window.pending_commands)
+    assert "乙" in voice_window.store.category_map
+    assert voice_window.asr is None
+
+
+def test_backend_load_error_falls_back_to_vosk(app_module, voice_window, monkeypatch):
+    def load_backend(config, profile=None, name=None):
+        if (name or config.get("asr_backend", profile)) == "whisper":
+            raise RuntimeError("Whisper 辨識需要安裝 faster-whisper")
+        return FakeBackend()
+    monkeypatch.setattr(app_module, "load_backend", load_backend)
+    monkeypatch.setitem(voice_window.config.values, "asr_backend", "whisper")
+    voice_window.toggle_voice_input()
+    assert isinstance(voice_window.asr.backend, FakeBackend)
+    assert "改用 Vosk" in voice_window.ui.labelSpeechResult.text()
+    voice_window.stop_voice_input(wait=True)
+
+
+def test_speech_model_load_error_is_reported(voice_window, monkeypatch):
+    def fail():
+        raise RuntimeError("找不到模型")
+    monkeypatch.setattr(voice_window.speech_slot, "loader", fail)
+    voice_window.toggle_voice_input()
+    assert not voice_window.is_recording
+    assert "找不到模型" in voice_window.ui.labelSpeechResult.text()
+    assert not voice_window.speech_slot._users  # 載入失敗不算使用中，之後仍可卸載
+
+
+class FakeWakeDetector:
+    def __init__(self, wake_word):
+        self.wake_word = wake_word
+
+    def feed(self, data):
+        return data == self.wake_word.encode()
+
+    def reset(self):
+        pass
+
+
+class FakeWakeBackend(FakeBackend):
+    supports_wake = True
+
+    def wake_detector(self, wake_word):
+        return FakeWakeDetector(wake_word)
+
+
+def test_wake_listen_on_start(app_module, qapp, segmenter, tmp_path, monkeypatch):
+    from todo_memory import memory
+    monkeypatch.setenv("VTODO_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("VTODO_CONFIDENCE_LOG", "")
+    monkeypatch.setenv("VTODO_WAKE_LISTEN", "true")
+    monkeypatch.setattr(memory, "preload", lambda names=None: None)
+    monkeypatch.setattr(app_module.ToDoApp, "load_speech_model", lambda self: FakeWakeBackend())
+
+    def open_stream(self):
+        self.audio_queue = queue.Queue()
+        self.speech_timer.start(app_module.SPEECH_POLL)
+    monkeypatch.setattr(app_module.ToDoApp, "open_stream", open_stream)
+    window = app_module.ToDoApp()
+    window.show()
+    try:
+        wait_until(qapp, lambda: window.wake_detector is not None)
+        assert window.wake_action.isChecked()
+        window.audio_queue.put(window.wake_detector.wake_word.encode())
+        wait_until(qapp, lambda: window.is_recording)
+    finally:
+        window.wake_action.setChecked(False)
+        window.close()
@@ -0,0 +1,374 @@
+"""資料層、畫面與撤銷路徑的一致性
+
+以暫存資料庫開啟主視窗，依 seed 隨機執行手動操作（按鈕、編輯框、確認對話框自動回答）、語音指令（直接送入
+辨識結果與逐詞信心，不需麥克風）、勾選、拖曳排序、撤銷，以及另一個連線寫入後的同步；每一步之後比對
+SQLite、TodoStore（category_map、分類統計、項目快取）與畫面（兩個列表、item_map）。
+大量資料的延遲預算需加上 --runslow。
+
+    python -m pytest tests/test_consistency.py
+    python -m pytest tests/test_consistency.py --runslow -k load
+"""
+import random
+import sqlite3
+import sys
+import time
+import traceback
+
+import pytest
+
+STEPS = 300
+
+# 毫秒，--load-items 100000 時的預算；進入分類主要是建立 10 萬個列表項目，移動與撤銷需要在列表中移動列
+LOAD_BUDGETS = {
+    "進入分類（讀取 SQLite）": 2500,
+    "進入分類（快取）": 1500,
+    "勾選項目": 30,
+    "語音新增項目": 60,
+    "移到最上面": 100,
+    "撤銷": 100,
+    "同步外部異動": 100,
+}
+
+CATEGORY_NAMES = ["工作", "家務", "購物", "學習", "旅行", "健身"]
+ITEM_NAMES = ["報告", "會議", "牛奶", "麵包", "洗衣", "跑步", "作業", "機票", "週報", "郵件"]
+
+
+class ModalAnswerer:
+    """對話框出現時自動回答：QMessageBox 在自己的事件迴圈中執行，以計時器找出並按下按鈕"""
+
+    def __init__(self, qapp):
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QMessageBox
+        self.qapp = qapp
+        self.QMessageBox = QMessageBox
+        self.answer = True
+        self.asked = 0
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.check)
+        self.timer.start(5)
+
+    def check(self):
+        box = self.qapp.activeModalWidget()
+        if not isinstance(box, self.QMessageBox):
+            return
+        self.asked += 1
+        yes_roles = (self.QMessageBox.YesRole, self.QMessageBox.AcceptRole)
+        buttons = box.buttons()
+        for button in buttons:
+            role = box.buttonRole(button)
+            if (role in yes_roles) == self.answer or len(buttons) == 1:
+                button.click()
+                return
+
+
+class Harness:
+    """以隨機操作驅動主視窗，並比對 SQLite、TodoStore 與畫面"""
+
+    def __init__(self, window, app_module, qapp, seed):
+        from PyQt5.QtCore import Qt
+        self.Qt = Qt
+        self.app = app_module
+        self.qapp = qapp
+        self.rng = random.Random(seed)
+        self.window = window
+        self.answerer = ModalAnswerer(qapp)
+        self.log = []
+        self.errors = []
+
+    def excepthook(self, kind, value, tb):
+        """Qt 槽中的例外只會交給 sys.excepthook，記下來視為失敗"""
+        self.errors.append("".join(traceback.format_exception(kind, value, tb)))
+
+    # 操作
+    def settle(self, timeout=5.0):
+        """處理事件，等背景分詞的指令都執行完"""
+        end = time.monotonic() + timeout
+        self.qapp.processEvents()
+        while self.window.pending_commands and time.monotonic() < end:
+            time.sleep(0.002)
+            self.qapp.processEvents()
+
+    def category_rows(self):
+        widget = self.window.ui.listWidgetCategories
+        return [widget.item(i) for i in range(widget.count())]
+
+    def item_rows(self):
+        widget = self.window.ui.listWidgetSubcategories
+        return [widget.item(i) for i in range(widget.count())]
+
+    def on_items_page(self):
+        return self.window.ui.stackedWidget.currentWidget() is self.window.ui.pageSubcategories
+
+    def pick_category(self):
+        rows = self.category_rows()
+        if not rows:
+            return None
+        row = self.rng.choice(rows)
+        self.window.select_category(row)
+        return row
+
+    def pick_item(self):
+        rows = self.item_rows()
+        if not rows:
+            return None
+        row = self.rng.choice(rows)
+        self.window.select_subcategory(row)
+        return row
+
+    def name(self, names):
+        return self.rng.choice(names) + ("" if self.rng.random() < 0.7 else str(self.rng.randrange(5)))
+
+    def op_add_category(self):
+        self.window.add_category()
+        self.window.ui.textEditEditTask.setText(self.name(CATEGORY_NAMES))
+        self.window.confirm_edit_task()
+
+    def op_rename_category(self):
+        if self.on_items_page() or self.pick_category() is None:
+            return
+        self.window.edit_category()
+        self.window.ui.textEditEditTask.setText(self.name(CATEGORY_NAMES))
+        self.window.confirm_edit_task()
+
+    def op_delete_category(self):
+        if self.on_items_page() or self.pick_category() is None:
+            return
+        self.answerer.answer = self.rng.random() < 0.7
+        self.window.delete_category()
+
+    def op_open_category(self):
+        if self.on_items_page():
+            self.window.back_to_categories()
+        elif self.pick_category() is not None:
+            self.window.manage_items()
+
+    def op_add_item(self):
+        if not self.on_items_page():
+            return self.op_open_category()
+        self.window.add_subcategory()
+        self.window.ui.textEditEditTask_2.setText(self.name(ITEM_NAMES))
+        self.window.confirm_edit_task_2()
+
+    def op_rename_item(self):
+        if not self.on_items_page() or self.pick_item() is None:
+            return
+        self.window.edit_subcategory()
+        self.window.ui.textEditEditTask_2.setText(self.name(ITEM_NAMES))
+        self.window.confirm_edit_task_2()
+
+    def op_delete_item(self):
+        if not self.on_items_page() or self.pick_item() is None:
+            return
+        self.answerer.answer = self.rng.random() < 0.7
+        self.window.delete_subcategory()
+
+    def op_toggle_item(self):
+        if not self.on_items_page():
+            return
+        rows = self.item_rows()
+        if rows:
+            row = self.rng.choice(rows)
+            row.setCheckState(self.Qt.Unchecked if row.checkState() == self.Qt.Checked else self.Qt.Checked)
+
+    def op_drag_item(self):
+        """拖曳排序：與 InternalMove 相同，由模型移動列後觸發 rowsMoved"""
+        from PyQt5.QtCore import QModelIndex
+        rows = self.item_rows()
+        if not self.on_items_page() or len(rows) < 2:
+            return
+        source = self.rng.randrange(len(rows))
+        destination = self.rng.randrange(len(rows) + 1)
+        self.window.ui.listWidgetSubcategories.model().moveRow(QModelIndex(), source, QModelIndex(), destination)
+
+    def op_voice(self):
+        """語音指令：送入 Vosk 格式的辨識結果，目標名稱可能不存在，信心隨機"""
+        categories = list(self.window.store.category_map) or CATEGORY_NAMES
+        items = [row.text() for row in self.item_rows()] or ITEM_NAMES
+        templates = [
+            lambda: f"新增 分类 {self.name(CATEGORY_NAMES)}",
+            lambda: f"删除 分类 {self.rng.choice(categories)}",
+            lambda: f"进入 分类 {self.rng.choice(categories)}",
+            lambda: f"修改 分类 {self.rng.choice(categories)} 为 {self.name(CATEGORY_NAMES)}",
+            lambda: f"新增 项目 {self.name(ITEM_NAMES)}",
+            lambda: f"删除 项目 {self.rng.choice(items)}",
+            lambda: f"完成 {self.rng.choice(items)}",
+            lambda: f"修改 项目 {self.rng.choice(items)} 为 {self.name(ITEM_NAMES)}",
+            lambda: f"把 {self.rng.choice(items)} 移到最上面",
+            lambda: "返回",
+            lambda: "撤销",
+        ]
+        text = self.rng.choice(templates)()
+        confidence = self.rng.choice([1.0, 0.9, 0.4])
+        self.answerer.answer = self.rng.random() < 0.5
+        result = {"text": text, "result": [{"word": word, "conf": confidence} for word in text.split()]}
+        self.log[-1] += f"：{text}（信心 {confidence}）"
+        self.window.finish_utterance(result)
+
+    def op_undo(self):
+        self.window.engine.undo_last_action()
+
+    def op_external(self):
+        """另一個連線（ex: 另一個視窗）寫入後同步"""
+        conn = sqlite3.connect(self.window.store.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        rows = conn.execute("SELECT id, name FROM items").fetchall()
+        if rows and self.rng.random() < 0.5:
+            item_id, name = self.rng.choice(rows)
+            conn.execute("UPDATE items SET name = ?, completed = 1 - completed WHERE id = ?", (name + "!", item_id))
+        else:
+            category = self.rng.choice(conn.execute("SELECT id FROM categories").fetchall() or [(None,)])[0]
+            if category is not None:
+                conn.execute("INSERT INTO items (category_id, name, position) VALUES (?, ?, ?)",
+                             (category, self.name(ITEM_NAMES), self.rng.random() * 1e6))
+        conn.commit()
+        conn.close()
+        self.window.poll_external_changes()
+
+    OPERATIONS = {
+        "op_add_category": 8, "op_rename_category": 4, "op_delete_category": 3, "op_open_category": 10,
+        "op_add_item": 12, "op_rename_item": 5, "op_delete_item": 5, "op_toggle_item": 8, "op_drag_item": 5,
+        "op_voice": 25, "op_undo": 8, "op_external": 4,
+    }
+
+    def step(self):
+        operation = self.rng.choices(list(self.OPERATIONS), list(self.OPERATIONS.values()))[0]
+        self.log.append(operation[3:])
+        getattr(self, operation)()
+        self.settle()
+
+    # 檢查
+    def check(self):
+        """比對 SQLite、TodoStore 與畫面，回傳差異的說明列表"""
+        Qt = self.Qt
+        window, store = self.window, self.window.store
+        problems = [f"例外：{error}" for error in self.errors]
+        self.errors.clear()
+        if store.conn.in_transaction:
+            problems.append("資料層留下未提交的交易（其他程序無法寫入）")
+        conn = sqlite3.connect(store.db_path)
+        categories = dict(conn.execute("SELECT id, name FROM categories"))
+        if {cid: category.name for cid, category in store.categories.items()} != categories:
+            problems.append(f"store.categories 與 SQLite 不同：{categories}")
+        if store.category_map != {name: cid for cid, name in categories.items()}:
+            problems.append(f"category_map 與 SQLite 不同：{store.category_map}")
+
+        counts = {cid: (total, completed) for cid, total, completed in conn.execute(
+            "SELECT c.id, COUNT(i.id), COALESCE(SUM(i.completed != 0), 0) "
+            "FROM categories c LEFT JOIN items i ON i.category_id = c.id GROUP BY c.id")}
+        stats = {cid: (total, completed) for cid, total, completed in conn.execute(
+            "SELECT category_id, total, completed FROM category_stats")}
+        if stats != counts:
+            problems.append(f"category_stats 與項目數不同：{stats} != {counts}")
+        for cid, category in store.categories.items():
+            if (category.total, category.completed) != counts.get(cid):
+                problems.append(f"分類 {category.name} 的統計 {(category.total, category.completed)} != {counts.get(cid)}")
+
+        items = {}
+        for cid in categories:
+            items[cid] = [(item_id, name, int(bool(completed))) for item_id, name, completed in conn.execute(
+                "SELECT id, name, completed FROM items WHERE category_id = ? ORDER BY position, id", (cid,))]
+            if store.is_cached(cid):
+                cached = [(item.id, item.name, int(bool(item.completed))) for item in store.items(cid)]
+                if cached != items[cid]:
+                    problems.append(f"分類 {categories[cid]} 的項目快取與 SQLite 不同：{cached} != {items[cid]}")
+        conn.close()
+
+        shown = {row.data(Qt.UserRole): row.text() for row in self.category_rows()}
+        if shown != categories or len(self.category_rows()) != len(categories):
+            problems.append(f"分類列表與 SQLite 不同：{shown}")
+        for row in self.category_rows():
+            cid = row.data(Qt.UserRole)
+            if cid in counts and row.data(self.app.COUNTS_ROLE) != (counts[cid][1], counts[cid][0]):
+                problems.append(f"分類列表 {row.text()} 的完成數/項目數 {row.data(self.app.COUNTS_ROLE)} 不正確")
+
+        if self.on_items_page():
+            cid = window.current_category_id
+            if cid not in categories:
+                problems.append(f"項目頁面的分類 {cid} 已不存在")
+            else:
+                if window.engine.current_category_id != cid:
+                    problems.append(f"引擎的目前分類 {window.engine.current_category_id} != 畫面的 {cid}")
+                rows = [(row.data(Qt.UserRole), row.text(), int(row.checkState() == Qt.Checked))
+                        for row in self.item_rows()]
+                if rows != items[cid]:
+                    problems.append(f"項目列表與 SQLite 不同：{rows} != {items[cid]}")
+                if set(window.item_rows) != {item_id for item_id, _, _ in items[cid]}:
+                    problems.append(f"item_rows 與 SQLite 不同：{sorted(window.item_rows)}")
+                names = {}
+                for item_id, name, _ in items[cid]:
+                    names.setdefault(name, set()).add(item_id)
+                if set(window.item_map) != set(names) or any(
+                        item_id not in names[name] for name, item_id in window.item_map.items()):
+                    problems.append(f"item_map 與 SQLite 不同：{window.item_map}")
+        return problems
+
+    # 大量資料
+    def load_test(self, count):
+        """在一個分類中建立 count 個項目，回傳 [(操作, 毫秒, 預算毫秒)]"""
+        window, store = self.window, self.window.store
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("INSERT INTO categories (name) VALUES ('大量')")
+        category_id = conn.execute("SELECT id FROM categories WHERE name = '大量'").fetchone()[0]
+        conn.executemany("INSERT INTO items (category_id, name, completed, position) VALUES (?, ?, ?, ?)",
+                         ((category_id, f"項目{n}", n % 3 == 0, (n + 1) * 1024.0) for n in range(count)))
+        conn.commit()
+        conn.close()
+        window.poll_external_changes()
+        self.settle()
+        results = []
+
+        def timed(label, action):
+            start = time.perf_counter()
+            action()
+            self.settle()
+            elapsed = (time.perf_counter() - start) * 1000
+            # 進入分類的耗時與項目數成正比，其他操作的預算不隨項目數縮小
+            scale = max(count / 100000, 0.1) if label.startswith("進入分類") else 1
+            results.append((label, elapsed, LOAD_BUDGETS[label] * scale))
+
+        window.engine.show_categories()
+        timed("進入分類（讀取 SQLite）", lambda: window.engine.open_category(category_id))
+        window.engine.show_categories()
+        timed("進入分類（快取）", lambda: window.engine.open_category(category_id))
+        row = window.ui.listWidgetSubcategories.item(count // 2)
+        timed("勾選項目", lambda: row.setCheckState(
+            self.Qt.Unchecked if row.checkState() == self.Qt.Checked else self.Qt.Checked))
+        timed("語音新增項目", lambda: window.finish_utterance({"text": "新增 项目 大量测试"}))
+        timed("移到最上面", lambda: window.engine.move_item(f"項目{count - 1}", 0))
+        timed("撤銷", window.engine.undo_last_action)
+
+        def external():
+            conn = sqlite3.connect(store.db_path)
+            conn.execute("UPDATE items SET name = '外部修改' WHERE category_id = ? AND name = ?",
+                         (category_id, f"項目{count // 3}"))
+            conn.commit()
+            conn.close()
+            window.poll_external_changes()
+        timed("同步外部異動", external)
+        return results
+
+
+@pytest.fixture
+def harness(request, window, app_module, qapp, monkeypatch):
+    harness = Harness(window, app_module, qapp, getattr(request, "param", 0))
+    monkeypatch.setattr(sys, "excepthook", harness.excepthook)
+    yield harness
+    harness.answerer.timer.stop()
+
+
+@pytest.mark.parametrize("harness", range(5), indirect=True, ids=lambda seed: f"seed{seed}")
+def test_random_operations_stay_consistent(harness):
+    for step in range(STEPS):
+        harness.step()
+        problems = harness.check()
+        assert not problems, (f"第 {step + 1} 步後不一致，最近的操作：\n  " + "\n  ".join(harness.log[-10:])
+                              + "\n" + "\n".join(problems))
+
+
+@pytest.mark.slow
+def test_load_budgets(harness):
+    results = harness.load_test(100000)
+    over = [f"{label}：{elapsed:.1f} ms > 預算 {budget:.0f} ms" for label, elapsed, budget in results
+            if elapsed > budget]
+    assert not over, "\n".join(over)
+    assert not harness.check()
@@ -0,0 +1,49 @@
+"""TodoEngine 的指令解析與預先分詞"""
+from concurrent.futures import Future
+
+import pytest
+
+from todo_engine import Speculation, TodoEngine
+from todo_store import TodoStore, init_db
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = str(tmp_path / "todo.db")
+    init_db(path)
+    store = TodoStore(path)
+    store.load()
+    yield TodoEngine(store)
+    store.close()
+
+
+@pytest.mark.parametrize("sentence, expected", [
+    ("把 報告 移到 最上面", ("move_item_top", "報告")),
+    ("報告 移至 最後面", ("move_item_bottom", "報告")),
+    ("報告 置頂", ("move_item_top", "報告")),
+    ("項目 報告 最下面", ("move_item_bottom", "報告")),
+    # 位置詞出現在名稱中、或與完成同時出現時不是移動
+    ("完成 最後面 的 報告", ("complete_item", "最後面的報告")),
+    ("打勾 置頂 文章", ("complete_item", "置頂文章")),
+    ("完成 報告 置頂", ("complete_item", "報告置頂")),
+    ("新增 項目 最上面 的 抽屜", ("add_item", "最上面的抽屜")),
+    ("置頂 文章", (None, "置頂文章")),
+    ("返回", ("return_to_categories", "")),
+])
+def test_parse_command(engine, sentence, expected):
+    assert engine.parse_command(sentence.split()) == expected
+
+
+def test_confirmed_speculation_runs_the_prepared_parse(engine, monkeypatch):
+    future = Future()
+    future.set_result(["新增", "分類", "工作"])
+    speculation = Speculation("新增分類工作", future)
+    engine.prepare(speculation)
+    assert speculation.result.result == ("add_category", "工作")
+
+    def parse_command(tokens):
+        raise AssertionError("已預先解析，不應再解析")
+    monkeypatch.setattr(engine, "parse_command", parse_command)
+    confirmed = engine.confirm(speculation, "新增分類工作")
+    assert engine.run_segmented([confirmed.result()]) == [("add_category", "工作")]
+    assert "工作" in engine.store.category_map
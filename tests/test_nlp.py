@@ -0,0 +1,61 @@
+"""中文數字／時間正規化：固定案例與以 cn2an 為對照的隨機性質檢查"""
+import random
+
+import pytest
+
+from todo_nlp import chinese_to_int, normalize_tokens
+
+pytest.importorskip("cn2an")
+from benchmarks.bench_normalizer import random_case, to_chinese  # noqa: E402  隨機案例與基準測試共用
+
+CASES = 2000
+
+
+@pytest.mark.parametrize("tokens, expected", [
+    (["三十五"], ["35"]),
+    (["兩千零五"], ["2005"]),
+    (["二零二五"], ["2025"]),
+    (["一萬零五"], ["10005"]),
+    (["三萬五千"], ["35000"]),
+    # 口語省略最後的單位
+    (["一萬五"], ["15000"]),
+    (["兩千五"], ["2500"]),
+    (["一百五"], ["150"]),
+    (["十五"], ["15"]),
+    (["十萬五"], ["150000"]),
+    (["三十萬五"], ["350000"]),
+    (["一百萬五"], ["1500000"]),
+    (["一億三千萬五"], ["135000000"]),
+    # 不以數字或「十」開頭的不是數字
+    (["千萬"], ["千萬"]),
+    (["萬"], ["萬"]),
+    (["萬一"], ["萬一"]),
+    (["百分之"], ["百分之"]),
+    (["一起"], ["一起"]),
+    (["第三"], ["第三"]),
+    # 時間與範圍
+    (["四點", "三十分"], ["4:30"]),
+    (["三點半"], ["3:30"]),
+    (["九點", "三刻"], ["9:45"]),
+    (["十點"], ["10點"]),
+    (["三", "到", "五"], ["3", "-", "5"]),
+    (["三點到五點"], ["3點-5點"]),
+])
+def test_normalize_tokens(tokens, expected):
+    assert normalize_tokens(tokens) == expected
+
+
+def test_chinese_to_int_matches_cn2an():
+    rng = random.Random(0)
+    for _ in range(CASES):
+        n = rng.randint(0, 999999999)
+        assert chinese_to_int(to_chinese(n)) == n, to_chinese(n)
+
+
+def test_random_commands():
+    rng = random.Random(0)
+    for _ in range(CASES):
+        tokens, expected_tail = random_case(rng)
+        result = normalize_tokens(tokens)
+        assert "".join(result).endswith(expected_tail), tokens
+        assert normalize_tokens(result) == result, tokens  # 冪等
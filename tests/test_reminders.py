@@ -0,0 +1,59 @@
+"""從項目名稱取出提醒時間，以及提醒排程"""
+from datetime import datetime
+
+import pytest
+
+from todo_reminders import ReminderScheduler, extract_due
+from todo_store import TodoStore, init_db
+
+NOW = datetime(2025, 3, 10, 10, 0).timestamp()  # 星期一上午十點
+
+
+def at(day, hour, minute=0):
+    return int(datetime(2025, 3, day, hour, minute).timestamp())
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("開會明天下午4:30", ("開會", at(11, 16, 30))),
+    ("晚上8點倒垃圾", ("倒垃圾", at(10, 20))),
+    ("繳費9點", ("繳費", at(10, 21))),        # 上午已過：今晚
+    ("早上9點繳費", ("繳費", at(11, 9))),     # 指定早上：明天
+    ("開會4:30", ("開會", at(10, 16, 30))),   # 上午說 4:30 指下午
+    ("後天凌晨12時", ("", at(12, 0))),
+])
+def test_extract_due(text, expected):
+    name, due_at = extract_due(text, NOW)
+    assert (name, due_at) == (expected[0] or text, expected[1])
+
+
+@pytest.mark.parametrize("text", [
+    "吃1點點東西",   # 「一點點」不是時間
+    "讀123點",       # 不是 23 點
+    "跑步25點",
+    "編號12:345",
+    "買蘋果",
+])
+def test_not_a_due_time(text):
+    assert extract_due(text, NOW) == (text, None)
+
+
+def test_overdue_reminders_are_summarized_once_per_load(tmp_path):
+    path = str(tmp_path / "todo.db")
+    init_db(path)
+    store = TodoStore(path)
+    store.load()
+    category = store.add_category("工作")
+    store.add_item(category.id, "繳費", due_at=at(9, 9))
+    store.add_item(category.id, "報稅", due_at=at(10, 9))
+    store.add_item(category.id, "開會", due_at=at(10, 16))
+    fired, overdue, armed = [], [], []
+    scheduler = ReminderScheduler(store, armed.append, fired.extend, clock=lambda: NOW, on_overdue=overdue.append)
+    scheduler.load()
+    scheduler.load()
+    assert overdue == [2, 2]                      # 每次載入只彙總一次，不逐一觸發
+    assert armed[-1] == at(10, 16) - NOW
+    scheduler.fire()
+    assert fired == []
+    scheduler.on_store_changed("reloaded", None)  # 外部異動重新載入時不再通知
+    assert overdue == [2, 2]
+    store.close()
@@ -0,0 +1,60 @@
+"""同步伺服器的請求處理；以 LoopbackTransport 代替網路"""
+import sqlite3
+
+import pytest
+
+from todo_client import LoopbackTransport, RemoteError, RemoteStore
+from todo_server import TodoServer
+from todo_store import TodoStore, init_db
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "todo.db")
+    init_db(path)
+    store = TodoStore(path)
+    store.load()
+    yield TodoServer(store)
+    store.close()
+
+
+@pytest.fixture
+def transport(server):
+    return LoopbackTransport(server)
+
+
+@pytest.mark.parametrize("method, path, payload", [
+    ("POST", "/categories", {}),
+    ("POST", "/categories", {"name": ""}),
+    ("POST", "/categories", {"name": 3}),
+    ("POST", "/categories", ["工作"]),
+    ("PATCH", "/categories/1", {}),
+    ("POST", "/categories/1/items", {"completed": 1}),
+    ("PATCH", "/categories/1/items/1", {"name": None}),
+])
+def test_invalid_body_is_bad_request(transport, method, path, payload):
+    assert transport.request("POST", "/categories", {"name": "工作"})[0] == 201
+    assert transport.request("POST", "/categories/1/items", {"name": "報告"})[0] == 201
+    status, data = transport.request(method, path, payload)
+    assert status == 400, data
+
+
+def test_unknown_category_or_item_is_not_found(transport):
+    assert transport.request("PATCH", "/categories/9", {"name": "工作"})[0] == 404
+    assert transport.request("POST", "/categories/9/items", {"name": "報告"})[0] == 404
+    transport.request("POST", "/categories", {"name": "工作"})
+    assert transport.request("DELETE", "/categories/1/items/9")[0] == 404
+    assert transport.request("PUT", "/categories")[0] == 405
+
+
+def test_remote_store_errors(server):
+    remote = RemoteStore(LoopbackTransport(server))
+    remote.load()
+    category = remote.add_category("工作")
+    with pytest.raises(sqlite3.IntegrityError):
+        remote.add_category("工作")
+    with pytest.raises(KeyError):
+        remote.rename_category(category.id + 1, "生活")
+    with pytest.raises(RemoteError) as error:
+        remote.add_item(category.id, "")
+    assert error.value.status == 400
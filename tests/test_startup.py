@@ -0,0 +1,37 @@
+"""啟動時間回歸檢查：以 --profile-startup 模式在子程序中重複啟動主程式，首個視窗時間的中位數須在預算內，
+且啟動時不匯入較大的函式庫。較慢的機器可以 VTODO_STARTUP_BUDGET（毫秒）放寬預算。"""
+import os
+import statistics
+
+import pytest
+
+from todo_startup import profile_startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app_v0.9.4.py")
+RUNS = 3
+STARTUP_BUDGET = float(os.environ.get("VTODO_STARTUP_BUDGET", 1500))  # 毫秒
+# 第一次使用時才匯入的套件
+DEFERRED_PACKAGES = {"sounddevice", "vosk", "opencc", "ckip_transformers", "torch", "transformers", "cn2an",
+                     "faster_whisper"}
+
+
+@pytest.fixture(scope="module")
+def startups(tmp_path_factory):
+    """RUNS 次啟動的 (首個視窗毫秒數, {套件: 微秒})；資料庫建在暫存目錄"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("VTODO_DATA_DIR", str(tmp_path_factory.mktemp("startup")))
+        return [profile_startup(APP)[::2] for _ in range(RUNS)]
+
+
+def test_first_window_within_budget(startups):
+    median = statistics.median(first_window for first_window, imports in startups)
+    slowest = max(startups, key=lambda result: result[0])[1]
+    top = ", ".join(f"{package} {microseconds / 1000:.0f} ms"
+                    for package, microseconds in sorted(slowest.items(), key=lambda item: -item[1])[:5])
+    assert median <= STARTUP_BUDGET, f"首個視窗中位數 {median:.1f} ms > 預算 {STARTUP_BUDGET:g} ms；匯入最久：{top}"
+
+
+def test_heavy_packages_are_deferred(startups):
+    for first_window, imports in startups:
+        assert not DEFERRED_PACKAGES & set(imports)
@@ -0,0 +1,96 @@
+"""TodoStore 偵測並套用其他連線的異動"""
+import sqlite3
+
+import pytest
+
+import todo_store
+from todo_store import POSITION_GAP, TodoStore, init_db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "todo.db")
+    init_db(path)
+    return path
+
+
+@pytest.fixture
+def store(db_path):
+    store = TodoStore(db_path)
+    store.load()
+    yield store
+    store.close()
+
+
+class ListMirror:
+    """依事件維護一份項目列表，與 App 的項目列表相同的更新方式"""
+
+    def __init__(self, store, category_id):
+        self.category_id = category_id
+        self.ids = [item.id for item in store.items(category_id)]
+        self.events = []
+        store.subscribe(self)
+
+    def __call__(self, event, record, *extra):
+        self.events.append(event)
+        if event == "reloaded" or getattr(record, "category_id", None) != self.category_id:
+            return
+        if event == "item_added":
+            self.ids.append(record.id)
+        elif event == "item_deleted":
+            self.ids.remove(record.id)
+        elif event == "item_moved":
+            self.ids.remove(record.id)
+            self.ids.insert(extra[0], record.id)
+
+
+def external(db_path, statements):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for sql, params in statements:
+            conn.execute(sql, params)
+    conn.close()
+
+
+def test_external_changes_keep_the_list_order(db_path, store):
+    category = store.add_category("工作")
+    for i in range(20):
+        store.add_item(category.id, f"項目{i}")
+    mirror = ListMirror(store, category.id)
+    ids = mirror.ids[:]
+    external(db_path, [
+        ("INSERT INTO items (category_id, name, completed, position) VALUES (?, ?, 0, ?)",
+         (category.id, "插在中間", 5.5 * POSITION_GAP)),
+        ("INSERT INTO items (category_id, name, completed, position) VALUES (?, ?, 0, ?)",
+         (category.id, "排最前面", 0.5)),
+        ("UPDATE items SET position = ? WHERE id = ?", (100 * POSITION_GAP, ids[0])),
+        ("UPDATE items SET position = ? WHERE id = ?", (2.5 * POSITION_GAP, ids[-1])),
+        ("DELETE FROM items WHERE id = ?", (ids[10],)),
+    ])
+    assert store.poll_changes() == 5 + 1  # 加上分類統計
+    assert "reloaded" not in mirror.events
+    assert mirror.ids == [item.id for item in store.items(category.id)]
+    assert mirror.ids == [row[0] for row in store.conn.execute(
+        "SELECT id FROM items WHERE category_id = ? ORDER BY position, id", (category.id,))]
+
+
+def test_many_external_changes_reload(db_path, store, monkeypatch):
+    monkeypatch.setattr(todo_store, "POLL_RELOAD_THRESHOLD", 10)
+    category = store.add_category("工作")
+    mirror = ListMirror(store, category.id)
+    external(db_path, [("INSERT INTO items (category_id, name, completed, position) VALUES (?, ?, 0, ?)",
+                        (category.id, f"項目{i}", i)) for i in range(11)])
+    store.poll_changes()
+    assert mirror.events == ["reloaded"]
+    assert len(store.items(category.id)) == 11
+    assert store.categories[category.id].total == 11
+
+
+def test_poll_trims_the_change_log(db_path, store, monkeypatch):
+    monkeypatch.setattr(todo_store, "CHANGE_LOG_LIMIT", 5)
+    category = store.add_category("工作")
+    external(db_path, [("INSERT INTO items (category_id, name, completed, position) VALUES (?, ?, 0, ?)",
+                        (category.id, f"項目{i}", i)) for i in range(10)])
+    store.poll_changes()
+    assert store.conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 5
+    assert len(store.items(category.id)) == 10
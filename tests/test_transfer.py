@@ -0,0 +1,46 @@
+"""匯出／匯入"""
+import io
+import sqlite3
+
+from todo_transfer import export_db, import_db
+
+
+def items(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT c.name, i.name, i.completed FROM items i JOIN categories c ON c.id = i.category_id "
+                            "ORDER BY c.name, i.position, i.id").fetchall()
+    finally:
+        conn.close()
+
+
+EXPORT = "\n".join([
+    '{"category": "購物", "item": "買牛奶", "completed": 0, "position": 1}',
+    '{"category": "購物", "item": "買牛奶", "completed": 1, "position": 2}',
+    '{"category": "購物", "item": "買麵包", "completed": 0, "position": 3}',
+    '{"category": "空分類"}',
+]) + "\n"
+
+
+def test_import_keeps_items_with_the_same_name(tmp_path):
+    path = str(tmp_path / "todo.db")
+    assert import_db(path, io.StringIO(EXPORT)) == (4, 2, 3)
+    assert items(path) == [("購物", "買牛奶", 0), ("購物", "買牛奶", 1), ("購物", "買麵包", 0)]
+
+
+def test_reimport_skips_existing_items(tmp_path):
+    path = str(tmp_path / "todo.db")
+    import_db(path, io.StringIO(EXPORT))
+    assert import_db(path, io.StringIO(EXPORT)) == (4, 0, 0)
+    assert len(items(path)) == 3
+
+
+def test_round_trip(tmp_path):
+    path, copy = str(tmp_path / "todo.db"), str(tmp_path / "copy.db")
+    import_db(path, io.StringIO(EXPORT))
+    for fmt in ("jsonl", "csv"):
+        stream = io.StringIO()
+        export_db(path, stream, fmt)
+        stream.seek(0)
+        import_db(copy, stream, fmt)
+        assert items(copy) == items(path)
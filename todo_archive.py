@@ -0,0 +1,283 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from todo_config import open_profile_db
+from todo_store import apply_pragmas
+
+ARCHIVE_BATCH = 500  # 每個交易搬移的項目數；交易越短，其他程序等待寫入鎖的時間越短
+UNDATED = "undated"  # 完成時間未知（升級前已完成）的項目所在的分區
+
+# 封存後從 items 刪除的項目；category 保留分類名稱，分類被刪除後仍可查詢
+ITEMS_PARTITION = '''
+    CREATE TABLE IF NOT EXISTS archive.{table} (
+        id INTEGER PRIMARY KEY,
+        category_id INTEGER,
+        category TEXT,
+        name TEXT,
+        due_at INTEGER,
+        position REAL,
+        completed_at INTEGER,
+        archived_at INTEGER NOT NULL
+    )
+'''
+COMPLETIONS_PARTITION = '''
+    CREATE TABLE IF NOT EXISTS archive.{table} (
+        id INTEGER PRIMARY KEY,
+        item_id INTEGER NOT NULL,
+        category_id INTEGER,
+        category TEXT,
+        name TEXT,
+        completed INTEGER NOT NULL,
+        at INTEGER NOT NULL
+    )
+'''
+
+# 已完成且最後一次完成早於期限的項目；第二個參數為真時也包含完成時間未知的項目
+CANDIDATES_QUERY = '''
+    SELECT i.id, i.category_id, c.name, i.name, i.due_at, i.position,
+           (SELECT MAX(l.at) FROM completions l WHERE l.item_id = i.id AND l.completed = 1) AS completed_at
+    FROM items i JOIN categories c ON c.id = i.category_id
+    WHERE i.completed != 0 AND (completed_at < ? OR (? AND completed_at IS NULL))
+    ORDER BY i.id
+    LIMIT ?
+'''
+
+
+def archive_path_for(db_path):
+    """資料庫對應的封存檔：todo.db -> todo-archive.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}-archive{ext or '.db'}"
+
+
+def partition_key(timestamp):
+    """依完成時間（當地時間）的年月分區，ex: 202610"""
+    if timestamp is None:
+        return UNDATED
+    return time.strftime("%Y%m", time.localtime(timestamp))
+
+
+def month_range(key):
+    """分區涵蓋的時間範圍 [開始, 結束)（Unix 秒）"""
+    year, month = int(key[:4]), int(key[4:])
+    start = time.mktime((year, month, 1, 0, 0, 0, 0, 0, -1))
+    end = time.mktime((year + month // 12, month % 12 + 1, 1, 0, 0, 0, 0, 0, -1))
+    return start, end
+
+
+class Archiver:
+    """把完成已久的項目從 items 分批搬到封存檔，封存檔依完成月份分成多個表格
+
+    封存檔以 ATTACH 開在同一個連線上，搬移與刪除在同一個交易內完成；
+    刪除會經由觸發器寫入異動記錄與分類統計，開著的視窗在下次 poll_changes() 時移除這些項目
+    """
+
+    def __init__(self, db_path, archive_path=None, pragmas=None, busy_timeout=5000):
+        self.db_path = db_path
+        self.archive_path = archive_path or archive_path_for(db_path)
+        # 交易由 archive_batch 自行控制
+        self.conn = sqlite3.connect(db_path, timeout=busy_timeout / 1000, isolation_level=None)
+        apply_pragmas(self.conn, pragmas)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+
+    def partitions(self, kind="items"):
+        """封存檔中的分區：[年月或 undated]，由舊到新"""
+        prefix = f"{kind}_"
+        rows = self.conn.execute("SELECT name FROM archive.sqlite_master WHERE type = 'table' AND name LIKE ?",
+                                 (prefix + "%",))
+        return sorted(name[len(prefix):] for name, in rows)
+
+    def _partitions_between(self, kind, since, until):
+        """與 [since, until) 重疊的分區；未知完成時間的分區只在沒有指定開始時間時列入"""
+        keys = []
+        for key in self.partitions(kind):
+            if key == UNDATED:
+                if since is None:
+                    keys.append(key)
+                continue
+            start, end = month_range(key)
+            if (since is None or end > since) and (until is None or start < until):
+                keys.append(key)
+        return keys
+
+    def archive_batch(self, cutoff, batch_size=ARCHIVE_BATCH, include_undated=False):
+        """搬移一批最後一次完成早於 cutoff（Unix 秒）的項目與其完成記錄，回傳搬移的項目數
+
+        include_undated 為真時也搬移沒有完成記錄（升級前已完成）的項目
+        """
+        self.conn.execute("BEGIN IMMEDIATE")  # 先取得寫入鎖，其他程序寫入時依 busy_timeout 等待
+        try:
+            rows = self.conn.execute(CANDIDATES_QUERY, (cutoff, include_undated, batch_size)).fetchall()
+            if not rows:
+                self.conn.execute("COMMIT")
+                return 0
+            now = int(time.time())
+            category_names = {}  # 項目 id -> 分類名稱
+            by_partition = {}
+            for item_id, category_id, category, name, due_at, position, completed_at in rows:
+                category_names[item_id] = category
+                by_partition.setdefault(partition_key(completed_at), []).append(
+                    (item_id, category_id, category, name, due_at, position, completed_at, now))
+            for key, values in by_partition.items():
+                self.conn.execute(ITEMS_PARTITION.format(table=f"items_{key}"))
+                self.conn.executemany(f"INSERT OR REPLACE INTO archive.items_{key} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      values)
+
+            item_ids = [row[0] for row in rows]
+            placeholders = ", ".join("?" * len(item_ids))
+            events = {}
+            for event in self.conn.execute(
+                    f"SELECT id, item_id, category_id, name, completed, at FROM completions "
+                    f"WHERE item_id IN ({placeholders})", item_ids):
+                event_id, item_id, category_id, name, completed, at = event
+                events.setdefault(partition_key(at), []).append(
+                    (event_id, item_id, category_id, category_names[item_id], name, completed, at))
+            for key, values in events.items():
+                self.conn.execute(COMPLETIONS_PARTITION.format(table=f"completions_{key}"))
+                self.conn.executemany(f"INSERT OR REPLACE INTO archive.completions_{key} "
+                                      f"VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+
+            self.conn.execute(f"DELETE FROM completions WHERE item_id IN ({placeholders})", item_ids)
+            self.conn.execute(f"DELETE FROM items WHERE id IN ({placeholders})", item_ids)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def archive(self, older_than_days, batch_size=ARCHIVE_BATCH, progress=None, now=None, include_undated=False):
+        """分批封存完成超過 older_than_days 天的項目，直到沒有可封存的項目，回傳總數"""
+        cutoff = (time.time() if now is None else now) - older_than_days * 86400
+        total = 0
+        while True:
+            moved = self.archive_batch(cutoff, batch_size, include_undated)
+            if not moved:
+                return total
+            total += moved
+            if progress:
+                progress(total)
+
+    def history(self, since=None, until=None, category=None, limit=None):
+        """完成記錄（包含已封存的部分），新的在前：[(時間, 完成/取消完成, 分類, 項目, 項目 id)]
+
+        只讀取與時間範圍重疊的月份分區
+        """
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("at < ?")
+            params.append(until)
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        selects = [f"SELECT id, at, completed, category, name, item_id FROM "
+                   f"(SELECT l.id, l.at, l.completed, c.name AS category, l.name, l.item_id FROM completions l "
+                   f"LEFT JOIN categories c ON c.id = l.category_id){where}"]
+        for key in self._partitions_between("completions", since, until):
+            selects.append(f"SELECT id, at, completed, category, name, item_id FROM archive.completions_{key}{where}")
+        # 封存時保留記錄 id，同一秒內的記錄依 id 排序
+        sql = (f"SELECT at, completed, category, name, item_id FROM ({' UNION ALL '.join(selects)}) "
+               f"ORDER BY at DESC, id DESC")
+        all_params = params * len(selects)
+        if limit is not None:
+            sql += " LIMIT ?"
+            all_params.append(limit)
+        return self.conn.execute(sql, all_params).fetchall()
+
+    def daily_counts(self, since=None, until=None):
+        """每天完成的項目數（當地日期）：[(YYYY-MM-DD, 數量)]，依日期排序"""
+        counts = {}
+        for at, completed, _, _, _ in self.history(since, until):
+            if completed:
+                day = time.strftime("%Y-%m-%d", time.localtime(at))
+                counts[day] = counts.get(day, 0) + 1
+        return sorted(counts.items())
+
+    def archived_items(self, since=None, until=None, search=None, limit=None):
+        """已封存的項目，新的在前：[(完成時間, 分類, 項目, 封存時間)]；search 比對項目名稱的一部分"""
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("completed_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("completed_at < ?")
+            params.append(until)
+        if search:
+            conditions.append("name LIKE ?")
+            params.append(f"%{search}%")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        selects = [f"SELECT completed_at, category, name, archived_at FROM archive.items_{key}{where}"
+                   for key in self._partitions_between("items", since, until)]
+        if not selects:
+            return []
+        # 完成時間未知的排在最後
+        sql = f"SELECT * FROM ({' UNION ALL '.join(selects)}) ORDER BY completed_at IS NULL, completed_at DESC"
+        all_params = params * len(selects)
+        if limit is not None:
+            sql += " LIMIT ?"
+            all_params.append(limit)
+        return self.conn.execute(sql, all_params).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def format_time(timestamp):
+    return "-" if timestamp is None else time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def main(argv=None):
+    """封存完成已久的項目，或查詢完成記錄與已封存的項目"""
+    parser = argparse.ArgumentParser(description="V-Todo 完成記錄與封存")
+    parser.add_argument("action", choices=["archive", "history", "daily", "archived"])
+    parser.add_argument("--db", help="SQLite 資料庫路徑（預設依設定檔）")
+    parser.add_argument("--profile-name", dest="profile_name", help="使用的設定檔名稱")
+    parser.add_argument("--archive", help="封存檔路徑（預設為資料庫名稱加上 -archive）")
+    parser.add_argument("--days", type=float,
+                        help="archive：封存完成超過幾天的項目（預設依設定檔）；查詢：只列出最近幾天")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH, help="每個交易搬移的項目數")
+    parser.add_argument("--include-undated", dest="include_undated", action="store_true",
+                        help="archive：一併封存沒有完成時間（升級前已完成）的項目")
+    parser.add_argument("--category", help="history：只列出此分類")
+    parser.add_argument("--search", help="archived：項目名稱包含的文字")
+    parser.add_argument("--limit", type=int, default=50, help="查詢最多列出幾筆")
+    args = parser.parse_args(argv)
+
+    config, db_path, pragmas, busy_timeout = open_profile_db(parser, args)
+    archiver = Archiver(db_path, args.archive, pragmas, busy_timeout)
+    try:
+        if args.action == "archive":
+            days = args.days if args.days is not None else config.get("archive_after_days", args.profile_name)
+            if not days:
+                parser.error("請以 --days 或設定 archive_after_days 指定封存期限")
+            start = time.perf_counter()
+            moved = archiver.archive(days, max(1, args.batch_size), include_undated=args.include_undated)
+            print(f"已封存 {moved} 個項目到 {archiver.archive_path}，耗時 {time.perf_counter() - start:.2f} 秒",
+                  file=sys.stderr)
+            return 0
+
+        since = time.time() - args.days * 86400 if args.days else None
+        if args.action == "history":
+            for at, completed, category, name, _ in archiver.history(since, None, args.category, args.limit):
+                print(f"{format_time(at)}\t{'完成' if completed else '取消完成'}\t{category or '-'}\t{name}")
+        elif args.action == "daily":
+            for day, count in archiver.daily_counts(since):
+                print(f"{day}\t{count}")
+        else:
+            for completed_at, category, name, archived_at in archiver.archived_items(
+                    since, None, args.search, args.limit):
+                print(f"{format_time(completed_at)}\t{category}\t{name}\t封存於 {format_time(archived_at)}")
+        return 0
+    finally:
+        archiver.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import io
+import json
+import queue
+import sys
+import wave
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# Whisper 不是串流模型：以音量判斷句子的起訖，一句結束後才辨識
+SILENCE_LEVEL = 500            # int16 平均絕對振幅，低於此值視為靜音
+END_SILENCE_SECONDS = 0.6      # 句尾連續靜音多久視為一句結束
+MAX_UTTERANCE_SECONDS = 20.0   # 一句最長秒數，超過時不等靜音直接辨識
+PRE_ROLL_SECONDS = 0.3         # 說話前保留的音訊，避免切掉第一個字
+# 提示 Whisper 指令的常用詞，並傾向輸出繁體中文
+COMMAND_PROMPT = "新增分類，刪除分類，進入分類，新增項目，刪除項目，完成，撤銷，返回。"
+
+
+class VoskBackend:
+    """Vosk（預設）：串流辨識，句尾靜音時自動斷句，有部分結果與逐詞信心，也能以喚醒詞文法待命"""
+    name = "vosk"
+    supports_wake = True
+
+    def __init__(self, model_path, sample_rate):
+        from vosk import KaldiRecognizer, Model
+        self.sample_rate = sample_rate
+        self.model = Model(model_path)
+        self.recognizer = KaldiRecognizer(self.model, sample_rate)
+        self.recognizer.SetWords(True)  # 結果附上逐詞信心（計算指令信心，不影響解碼速度）
+
+    def feed(self, data):
+        """送入一段 16-bit 單聲道 PCM；一句結束時回傳結果 {"text", "result": [{"word", "conf"}]}，否則 None"""
+        if self.recognizer.AcceptWaveform(data):
+            return json.loads(self.recognizer.Result())
+        return None
+
+    def partial(self):
+        """目前這句的部分結果"""
+        return json.loads(self.recognizer.PartialResult()).get("partial", "").strip()
+
+    def finish(self):
+        """取得最後一句的結果並重設"""
+        return json.loads(self.recognizer.FinalResult())
+
+    def reset(self):
+        self.recognizer.Reset()
+
+    def wake_detector(self, wake_word):
+        from todo_audio import WakeWordDetector
+        return WakeWordDetector(self.model, self.sample_rate, wake_word)
+
+
+class WhisperBackend:
+    """faster-whisper（CPU、int8 量化）：準確度較高但不是串流模型，依音量偵測句尾後辨識整句，
+    一句結束時才有結果；partial_interval 秒（0 表示不提供）重新辨識一次目前的音訊作為部分結果"""
+    name = "whisper"
+    supports_wake = False
+
+    def __init__(self, model, sample_rate, threads=0, partial_interval=0.0, language="zh"):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("Whisper 辨識需要安裝 faster-whisper：pip install faster-whisper") from None
+        # model 可為模型名稱（ex: small，第一次使用時下載）或已轉換的 CTranslate2 模型目錄
+        self.model = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=threads)
+        self.sample_rate = sample_rate
+        self.partial_interval = partial_interval
+        self.language = language
+        self.reset()
+
+    def feed(self, data):
+        chunk = array("h", data)
+        if sys.byteorder == "big":
+            chunk.byteswap()
+        loud = bool(chunk) and sum(map(abs, chunk)) / len(chunk) >= SILENCE_LEVEL
+        self.samples.extend(chunk)
+        if loud:
+            self.speech = True
+            self.silent = 0
+        elif not self.speech:
+            del self.samples[:-int(PRE_ROLL_SECONDS * self.sample_rate)]
+        else:
+            self.silent += len(chunk)
+        if self.speech and (self.silent >= END_SILENCE_SECONDS * self.sample_rate
+                            or len(self.samples) >= MAX_UTTERANCE_SECONDS * self.sample_rate):
+            return self.finish()
+        return None
+
+    def partial(self):
+        if (self.partial_interval and self.speech
+                and len(self.samples) - self.partial_at >= self.partial_interval * self.sample_rate):
+            self.partial_at = len(self.samples)
+            self.partial_text = self.transcribe()["text"]
+        return self.partial_text
+
+    def finish(self):
+        result = self.transcribe() if self.speech else {"text": ""}
+        self.reset()
+        return result
+
+    def reset(self):
+        self.samples = array("h")
+        self.speech = False     # 這句已經出現聲音
+        self.silent = 0         # 句尾連續靜音的取樣數
+        self.partial_at = 0     # 上次部分結果時的取樣數
+        self.partial_text = ""
+
+    def transcribe(self):
+        """辨識目前的音訊，回傳與 Vosk 相同格式的結果；逐詞信心為 Whisper 的詞機率"""
+        # 以記憶體中的 WAV 交給 faster-whisper 解碼，其他取樣率由它轉換為 16 kHz
+        audio = io.BytesIO()
+        with wave.open(audio, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.samples.tobytes())
+        audio.seek(0)
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1, word_timestamps=True,
+                                            initial_prompt=COMMAND_PROMPT, condition_on_previous_text=False)
+        segments = list(segments)  # 產生器，逐段解碼
+        words = [{"word": word.word.strip(), "conf": word.probability}
+                 for segment in segments for word in segment.words or []]
+        return {"text": "".join(segment.text for segment in segments).strip(), "result": words}
+
+    def wake_detector(self, wake_word):
+        raise RuntimeError("喚醒詞待命需使用 Vosk 辨識")
+
+
+BACKENDS = {"vosk": VoskBackend, "whisper": WhisperBackend}
+
+
+class SpeechDecoder:
+    """在單一背景執行緒依序執行語音辨識後端的 feed／partial／finish／reset，呼叫端（GUI 執行緒）送出後立即返回
+
+    Whisper 辨識一句需要數百毫秒到數秒，不能卡住介面；只有一個工作執行緒，後端仍依送出順序處理音訊。
+    一句結束的結果由 results() 取回，finish() 回傳的 Future 完成後最後一句也已在 results() 中
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.partial_text = ""
+        self._results = queue.Queue()
+        self._partial = None  # 進行中的部分結果
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-decoder")
+
+    def feed(self, data):
+        self._executor.submit(self._feed, data)
+
+    def _feed(self, data):
+        result = self.backend.feed(data)
+        if result is not None:
+            self.partial_text = ""
+            self._results.put(result)
+
+    def results(self):
+        """已辨識完成的句子，依說話順序，不等待"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def partial(self):
+        """上次背景更新的部分結果；前一次更新已完成時再送出一次"""
+        if self._partial is None or self._partial.done():
+            self._partial = self._executor.submit(self._update_partial)
+        return self.partial_text
+
+    def _update_partial(self):
+        self.partial_text = self.backend.partial()
+
+    def finish(self):
+        """辨識最後一句，回傳 Future"""
+        return self._executor.submit(self._finish)
+
+    def _finish(self):
+        self._results.put(self.backend.finish())
+        self.partial_text = ""
+
+    def reset(self):
+        """捨棄目前的音訊與尚未取回的結果"""
+        self.partial_text = ""
+        self._executor.submit(self._reset)
+
+    def _reset(self):
+        self.backend.reset()
+        self.results()
+        self.partial_text = ""
+
+    def close(self):
+        """不再送出新的工作；已送出的在背景執行完"""
+        self._executor.shutdown(wait=False)
+
+
+def load_backend(config, profile=None, name=None):
+    """依設定（asr_backend）載入語音辨識後端；name 可指定其他後端"""
+    name = name or config.get("asr_backend", profile)
+    sample_rate = config.get("sample_rate", profile)
+    if name == "vosk":
+        return VoskBackend(config.get("vosk_model", profile), sample_rate)
+    if name == "whisper":
+        return WhisperBackend(config.get("whisper_model", profile), sample_rate,
+                              config.get("whisper_threads", profile), config.get("whisper_partial_interval", profile))
+    raise ValueError(f"未知的語音辨識後端：{name}（可用 {'、'.join(BACKENDS)}）")
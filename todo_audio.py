@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+from array import array
+
+from todo_config import open_profile_db
+
+# 每次送進辨識器的音框數
+CHUNK_FRAMES = 4000
+# 長音檔切段：每段約 SEGMENT_SECONDS 秒，在邊界前後 SEARCH_SECONDS 秒內找最安靜的位置切開
+SEGMENT_SECONDS = 30.0
+SEARCH_SECONDS = 3.0
+QUIET_WINDOW_SECONDS = 0.1
+
+# 工作程序內的模型與辨識器：每個程序只載入一次模型，每種取樣率一個辨識器
+_model = None
+_recognizers = {}
+
+
+def init_worker(model_path):
+    """ProcessPoolExecutor 的 initializer：在工作程序載入 Vosk 模型"""
+    global _model
+    from vosk import Model, SetLogLevel
+    SetLogLevel(-1)
+    _model = Model(model_path)
+    _recognizers.clear()
+
+
+def recognizer_for(sample_rate):
+    recognizer = _recognizers.get(sample_rate)
+    if recognizer is None:
+        from vosk import KaldiRecognizer
+        recognizer = _recognizers[sample_rate] = KaldiRecognizer(_model, sample_rate)
+    return recognizer
+
+
+def open_wav(path):
+    """開啟 WAV 檔；Vosk 只接受單聲道 16-bit PCM，格式不符或檔案損壞時丟出 ValueError"""
+    try:
+        wav = wave.open(path, "rb")
+    except (wave.Error, EOFError):
+        raise ValueError(f"{path}：不是有效的 WAV 檔") from None
+    if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+        wav.close()
+        raise ValueError(f"{path}：只支援單聲道 16-bit PCM WAV")
+    return wav
+
+
+def quietest_frame(wav, start, end, window):
+    """在 [start, end) 音框範圍內找出音量最小的視窗起點；同樣安靜時取最接近中央的"""
+    wav.setpos(start)
+    samples = array("h", wav.readframes(end - start))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    center = (len(samples) - window) // 2
+    best = min(range(0, max(1, len(samples) - window), window),
+               key=lambda offset: (sum(map(abs, samples[offset:offset + window])), abs(offset - center)))
+    return start + best
+
+
+def split_wav(path, segment_seconds=SEGMENT_SECONDS):
+    """將音檔切成 (路徑, 起始音框, 結束音框) 的片段，切點選在停頓處，避免把一句話切成兩半"""
+    with open_wav(path) as wav:
+        rate, total = wav.getframerate(), wav.getnframes()
+        segment = int(segment_seconds * rate) if segment_seconds else 0
+        if not segment or total <= segment * 1.5:
+            return [(path, 0, total)]
+        search = min(int(SEARCH_SECONDS * rate), segment // 2)
+        window = max(1, int(QUIET_WINDOW_SECONDS * rate))
+        segments, start = [], 0
+        while total - start > segment * 1.5:
+            boundary = start + segment
+            cut = quietest_frame(wav, boundary - search, boundary + search, window) + window // 2
+            segments.append((path, start, cut))
+            start = cut
+        segments.append((path, start, total))
+        return segments
+
+
+def transcribe_segment(task):
+    """在工作程序中辨識一個片段，回傳 (路徑, 起始音框, 每句文字, 音訊秒數)"""
+    path, start, end = task
+    utterances = []
+    with open_wav(path) as wav:
+        recognizer = recognizer_for(wav.getframerate())
+        wav.setpos(start)
+        remaining = end - start
+        while remaining > 0:
+            data = wav.readframes(min(CHUNK_FRAMES, remaining))
+            if not data:
+                break
+            remaining -= len(data) // 2
+            if recognizer.AcceptWaveform(data):
+                utterances.append(json.loads(recognizer.Result()).get("text", ""))
+        utterances.append(json.loads(recognizer.FinalResult()).get("text", ""))  # 同時重設辨識器
+        seconds = (end - start) / wav.getframerate()
+    return path, start, [text.strip() for text in utterances if text.strip()], seconds
+
+
+class WakeWordDetector:
+    """待命時監聽喚醒詞：KaldiRecognizer 只帶喚醒詞與 [unk] 的文法，搜尋空間極小，
+    運算量遠低於完整辨識，麥克風可以一直開著；聽到喚醒詞後再把音訊交給完整的辨識器"""
+
+    def __init__(self, model, sample_rate, wake_word):
+        from vosk import KaldiRecognizer
+        self.wake_word = wake_word.replace(" ", "")
+        # 文法中的詞需在模型詞典內；沒有以空白分詞時逐字拆開，中文模型的詞典都有單字
+        phrase = wake_word if " " in wake_word else " ".join(wake_word)
+        self.recognizer = KaldiRecognizer(model, sample_rate, json.dumps([phrase, "[unk]"], ensure_ascii=False))
+        self.detections = 0
+
+    def feed(self, data):
+        """送入一段音訊，聽到喚醒詞時回傳 True（部分結果出現即觸發，不等句尾靜音）"""
+        if self.recognizer.AcceptWaveform(data):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+        else:
+            text = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if self.wake_word in text.replace(" ", ""):
+            self.reset()
+            self.detections += 1
+            return True
+        return False
+
+    def reset(self):
+        self.recognizer.Reset()
+
+
+class AudioImporter:
+    """以多個程序平行辨識音檔；每個工作程序只載入一次模型，長音檔在停頓處切段分給不同程序
+
+    使用 spawn 啟動工作程序，不會繼承主程式的 Qt 與分詞模型
+    """
+
+    def __init__(self, model_path, workers=None, segment_seconds=SEGMENT_SECONDS):
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.segment_seconds = segment_seconds
+        self._executor = None
+
+    def executor(self):
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"),
+                                                 initializer=init_worker, initargs=(self.model_path,))
+        return self._executor
+
+    def submit(self, paths):
+        """送出辨識工作，回傳依音檔與時間排序的 Future 清單；結果為 transcribe_segment 的回傳值"""
+        tasks = [task for path in paths for task in split_wav(path, self.segment_seconds)]
+        executor = self.executor()
+        return [executor.submit(transcribe_segment, task) for task in tasks]
+
+    def transcribe(self, paths):
+        """依序產生每個片段的 (路徑, 起始音框, 每句文字, 音訊秒數)"""
+        for future in self.submit(paths):
+            yield future.result()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def main(argv=None):
+    """離線辨識 WAV 音檔：輸出每句文字，或以口述模式交給指令引擎執行"""
+    parser = argparse.ArgumentParser(description="V-Todo 語音檔匯入")
+    parser.add_argument("paths", nargs="+", help="單聲道 16-bit PCM WAV 檔")
+    parser.add_argument("--workers", type=int, default=0, help="工作程序數（預設為 CPU 核心數）")
+    parser.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS,
+                        help=f"長音檔切段的秒數，0 表示不切段（預設 {SEGMENT_SECONDS:g}）")
+    parser.add_argument("--execute", action="store_true",
+                        help="將每句交給指令引擎執行；無法識別的句子在項目頁面新增為項目")
+    parser.add_argument("--db", help="SQLite 資料庫路徑（預設依設定檔，搭配 --execute）")
+    parser.add_argument("--profile-name", dest="profile_name", help="使用的設定檔名稱")
+    args = parser.parse_args(argv)
+
+    # 只有 --execute 時才開啟資料庫
+    config, db_path, pragmas, busy_timeout = open_profile_db(parser, args, init=args.execute)
+
+    engine = store = None
+    if args.execute:
+        from todo_engine import TodoEngine
+        from todo_store import TodoStore
+        store = TodoStore(db_path, pragmas=pragmas, busy_timeout=busy_timeout)
+        store.load()
+        engine = TodoEngine(store)
+        engine.subscribe(lambda event, *a: event == "message" and print(a[0]))
+
+    importer = AudioImporter(config.get("vosk_model", args.profile_name), args.workers or None,
+                             args.segment_seconds)
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    utterances = 0
+    try:
+        for path, frame, texts, seconds in importer.transcribe(args.paths):
+            audio_seconds += seconds
+            utterances += len(texts)
+            if engine is not None:
+                engine.run_batch(texts, dictation=True)
+            else:
+                for text in texts:
+                    print(text)
+    finally:
+        importer.close()
+        if store is not None:
+            store.close()
+    elapsed = time.perf_counter() - start
+    print(f"已辨識 {len(args.paths)} 個音檔、{utterances} 句，音訊 {audio_seconds:.1f} 秒，耗時 {elapsed:.1f} 秒"
+          f"（{audio_seconds / elapsed if elapsed else 0:.1f} 倍速，{importer.workers} 個程序）", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+import http.client
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from todo_store import Category, Item
+
+# 推播連線中斷後重新連線的等待秒數上限
+MAX_RECONNECT_DELAY = 5.0
+
+
+class RemoteError(Exception):
+    """同步伺服器回傳的錯誤"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def raise_for_status(status, data):
+    """將伺服器錯誤轉為與 TodoStore 相同的例外：404 -> KeyError、409 -> sqlite3.IntegrityError"""
+    if status < 400:
+        return data
+    message = data.get("error", "") if isinstance(data, dict) else str(data)
+    if status == 404:
+        raise KeyError(message)
+    if status == 409:
+        raise sqlite3.IntegrityError(message)
+    raise RemoteError(status, message)
+
+
+class HTTPTransport:
+    """連線池：最多 pool_size 條 keep-alive 連線，多個執行緒共用時重複使用閒置連線"""
+
+    def __init__(self, url, pool_size=4, timeout=10, client_id=None):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 8765
+        self.timeout = timeout
+        self.client_id = client_id or uuid.uuid4().hex  # 伺服器依此記錄各客戶端的撤銷動作
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._closed = False
+        self.connections_opened = 0
+
+    def _connect(self):
+        self.connections_opened += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, payload=None):
+        """送出請求，回傳 (狀態碼, JSON)；重複使用的連線已被關閉時自動重連一次"""
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode()
+        headers = {"Content-Type": "application/json", "X-Client-Id": self.client_id}
+        with self._slots:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            while True:
+                try:
+                    conn.request(method, path, body, headers)
+                    response = conn.getresponse()
+                    data = json.loads(response.read() or b"null")
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    conn.close()
+                    if not reused:
+                        raise
+                    conn, reused = self._connect(), False
+            self._idle.put(conn)
+        return response.status, data
+
+    def listen(self, callback):
+        """在背景執行緒接收推播（Server-Sent Events），斷線時重連並送出 reloaded"""
+        threading.Thread(target=self._listen, args=(callback,), name="todo-events", daemon=True).start()
+
+    def _listen(self, callback):
+        delay = 0.5
+        connected_before = False
+        while not self._closed:
+            conn = http.client.HTTPConnection(self.host, self.port)
+            try:
+                conn.request("GET", "/events", headers={"X-Client-Id": self.client_id})
+                response = conn.getresponse()
+                if connected_before:
+                    callback({"event": "reloaded", "record": None, "extra": []})  # 斷線期間可能漏掉異動
+                connected_before = True
+                delay = 0.5
+                while not self._closed:
+                    line = response.fp.readline()
+                    if not line:
+                        break
+                    if line.startswith(b"data: "):
+                        callback(json.loads(line[6:]))
+            except (OSError, http.client.HTTPException):
+                pass
+            finally:
+                conn.close()
+            if not self._closed:
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def close(self):
+        self._closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class LoopbackTransport:
+    """測試用的本機替身：直接呼叫 TodoServer.handle，不經過網路，推播也同步送出"""
+
+    def __init__(self, server, client_id=None):
+        self.server = server
+        self.url = "loopback:"
+        self.client_id = client_id or uuid.uuid4().hex
+
+    def request(self, method, path, payload=None):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode()
+        return self.server.handle(method, path, body, self.client_id)
+
+    def listen(self, callback):
+        self.server.add_listener(callback)
+
+    def close(self):
+        pass
+
+
+class RemoteStore:
+    """透過同步伺服器操作資料的 TodoStore 替代品，介面與通知事件與 TodoStore 相同
+
+    寫入結果會立即套用到本機快取；其他客戶端的異動由推播收進佇列，
+    在主執行緒呼叫 poll_changes() 時才套用並通知訂閱者（與 TodoStore 偵測外部異動的方式相同）
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.db_path = transport.url
+        self.categories = {}      # id -> Category
+        self.category_map = {}    # 名稱 -> id
+        self._items = {}          # category_id -> {item_id: Item}，依排序鍵排列
+        self.recent_categories = deque(maxlen=8)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prefetched = 0
+        self._events = queue.Queue()
+        self._listeners = []
+        transport.listen(self._events.put)
+
+    # 訂閱
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, record, *extra):
+        for listener in list(self._listeners):
+            listener(event, record, *extra)
+
+    def _request(self, method, path, payload=None):
+        return raise_for_status(*self.transport.request(method, path, payload))
+
+    # 讀取
+    def load(self):
+        self.categories.clear()
+        self.category_map.clear()
+        self._items.clear()
+        for data in self._request("GET", "/categories"):
+            self.categories[data["id"]] = Category(data["id"], data["name"], data["total"], data["completed"])
+            self.category_map[data["name"]] = data["id"]
+
+    def category_id(self, name):
+        return self.category_map.get(name)
+
+    def _item_dict(self, category_id, record=False):
+        items = self._items.get(category_id)
+        if items is not None:
+            if record:
+                self.cache_hits += 1
+            return items
+        if record:
+            self.cache_misses += 1
+        items = {}
+        for data in self._request("GET", f"/categories/{category_id}/items"):
+            items[data["id"]] = Item(data["id"], category_id, data["name"], data["completed"],
+                                     data["due_at"], data["position"])
+        self._items[category_id] = items
+        return items
+
+    def items(self, category_id):
+        if category_id not in self.categories:
+            return []
+        if category_id in self.recent_categories:
+            self.recent_categories.remove(category_id)
+        self.recent_categories.appendleft(category_id)
+        return list(self._item_dict(category_id, record=True).values())
+
+    def is_cached(self, category_id):
+        return category_id in self._items
+
+    def find_item(self, category_id, name):
+        if category_id not in self.categories:
+            return None
+        for item in self._item_dict(category_id).values():
+            if item.name == name:
+                return item
+        return None
+
+    def get_item(self, category_id, item_id):
+        if category_id not in self.categories:
+            return None
+        return self._item_dict(category_id).get(item_id)
+
+    def pending_reminders(self):
+        return [tuple(row) for row in self._request("GET", "/reminders")]
+
+    # 與 TodoStore 相容；伺服器端已有快取，本機不另外預取
+    def start_prefetcher(self):
+        return None
+
+    def prefetch(self, category_id):
+        pass
+
+    def prefetch_recent(self):
+        pass
+
+    @contextmanager
+    def batch(self):
+        yield self
+
+    def cache_stats(self):
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "prefetched": self.prefetched,
+            "cached_categories": len(self._items),
+        }
+
+    # 套用伺服器的狀態；已是最新時不通知，因此自己的異動被推播回來時不會重複處理
+    def _apply_category(self, data, deleted=False):
+        category_id = data["id"]
+        category = self.categories.get(category_id)
+        if deleted:
+            if category is None:
+                return 0
+            del self.categories[category_id]
+            del self.category_map[category.name]
+            self._items.pop(category_id, None)
+            if category_id in self.recent_categories:
+                self.recent_categories.remove(category_id)
+            self._notify("category_deleted", category)
+        elif category is None:
+            category = Category(category_id, data["name"], data["total"], data["completed"])
+            self.categories[category_id] = category
+            self.category_map[category.name] = category_id
+            self._notify("category_added", category)
+        elif category.name != data["name"]:
+            old_name = category.name
+            del self.category_map[old_name]
+            category.name = data["name"]
+            self.category_map[category.name] = category_id
+            self._notify("category_renamed", category, old_name)
+        elif (category.total, category.completed) != (data["total"], data["completed"]):
+            # 項目數由伺服器推播，本機的項目異動不自行計算
+            category.total, category.completed = data["total"], data["completed"]
+            self._notify("category_counts", category)
+        else:
+            return 0
+        return 1
+
+    def _sort_items(self, category_id):
+        items = self._items[category_id]
+        ordered = sorted(items.values(), key=lambda item: (item.position, item.id))
+        items.clear()
+        items.update((item.id, item) for item in ordered)
+        return list(items)
+
+    def _apply_item(self, data, deleted=False):
+        category_id, item_id = data["category_id"], data["id"]
+        items = self._items.get(category_id)
+        if items is None:
+            return 0  # 分類未快取，進入時才向伺服器讀取
+        item = items.get(item_id)
+        if deleted:
+            if item is None:
+                return 0
+            del items[item_id]
+            self._notify("item_deleted", item)
+            return 1
+        if item is None:
+            item = Item(item_id, category_id, data["name"], data["completed"], data["due_at"], data["position"])
+            items[item_id] = item
+            self._notify("item_added", item)
+            self._notify("item_moved", item, self._sort_items(category_id).index(item_id))
+            return 1
+
+        changed = 0
+        item.due_at = data["due_at"]
+        if item.name != data["name"]:
+            old_name, item.name = item.name, data["name"]
+            self._notify("item_renamed", item, old_name)
+            changed = 1
+        if item.completed != data["completed"]:
+            item.completed = data["completed"]
+            self._notify("item_completed", item)
+            changed = 1
+        if item.position != data["position"]:
+            item.position = data["position"]
+            self._notify("item_moved", item, self._sort_items(category_id).index(item_id))
+            changed = 1
+        return changed
+
+    def poll_changes(self):
+        """套用推播收到的異動，回傳套用的數量（在主執行緒呼叫）"""
+        applied = 0
+        while True:
+            try:
+                payload = self._events.get_nowait()
+            except queue.Empty:
+                return applied
+            event, data = payload["event"], payload["record"]
+            if event == "reloaded":
+                self.load()
+                self._notify("reloaded", None)
+                applied += 1
+            elif event.startswith("category_"):
+                applied += self._apply_category(data, deleted=event == "category_deleted")
+            elif event.startswith("item_"):
+                applied += self._apply_item(data, deleted=event == "item_deleted")
+
+    # 分類異動
+    def add_category(self, name, category_id=None):
+        payload = {"name": name} if category_id is None else {"name": name, "id": category_id}
+        data = self._request("POST", "/categories", payload)
+        self._apply_category(data)
+        return self.categories[data["id"]]
+
+    def rename_category(self, category_id, new_name):
+        self._apply_category(self._request("PATCH", f"/categories/{category_id}", {"name": new_name}))
+        return self.categories[category_id]
+
+    def delete_category(self, category_id):
+        category = self.categories[category_id]
+        self._apply_category(self._request("DELETE", f"/categories/{category_id}"), deleted=True)
+        return category
+
+    # 項目異動
+    def _update_item(self, category_id, item_id, payload):
+        self._item_dict(category_id)
+        self._apply_item(self._request("PATCH", f"/categories/{category_id}/items/{item_id}", payload))
+        return self._items[category_id][item_id]
+
+    def add_item(self, category_id, name, completed=0, item_id=None, due_at=None, position=None):
+        self._item_dict(category_id)
+        payload = {"name": name, "completed": completed, "id": item_id, "due_at": due_at, "position": position}
+        data = self._request("POST", f"/categories/{category_id}/items", payload)
+        self._apply_item(data)
+        return self._items[category_id][data["id"]]
+
+    def rename_item(self, category_id, item_id, new_name):
+        return self._update_item(category_id, item_id, {"name": new_name})
+
+    def delete_item(self, category_id, item_id):
+        item = self._item_dict(category_id)[item_id]
+        self._apply_item(self._request("DELETE", f"/categories/{category_id}/items/{item_id}"), deleted=True)
+        return item
+
+    def set_completed(self, category_id, item_id, completed):
+        return self._update_item(category_id, item_id, {"completed": 1 if completed else 0})
+
+    def move_item(self, category_id, item_id, index):
+        return self._update_item(category_id, item_id, {"index": index})
+
+    def set_position(self, category_id, item_id, position):
+        return self._update_item(category_id, item_id, {"position": position})
+
+    def undo(self):
+        """撤銷此客戶端在伺服器上最近一次的動作"""
+        return self._request("POST", "/undo")["undone"]
+
+    def close(self):
+        self.transport.close()
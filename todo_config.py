@@ -0,0 +1,177 @@
+import json
+import os
+
+from todo_store import TodoStore, init_db
+
+# 預設設定；設定檔與環境變數只需寫要覆蓋的部分
+DEFAULTS = {
+    "data_dir": ".",                          # 相對路徑的資料庫放在此目錄下
+    "db_path": "todo.db",
+    "asr_backend": "vosk",                    # 語音辨識後端：vosk（串流）或 whisper（faster-whisper，CPU int8）
+    "vosk_model": "vosk-model-small-cn-0.22",
+    "whisper_model": "small",                 # Whisper 模型名稱（第一次使用時下載）或 CTranslate2 模型目錄
+    "whisper_threads": 0,                     # Whisper 使用的 CPU 執行緒數，0 表示預設
+    "whisper_partial_interval": 0,            # 秒，Whisper 每收到多少音訊重新辨識一次作為部分結果，0 表示不提供
+    "ckip_model": "bert-base",
+    "segment_batch_size": 16,                 # 分詞模型每批句數
+    "segment_max_delay": 5,                   # 毫秒，分詞前等待其他文字合併為同一批的時間上限
+    "model_idle_timeout": 0,                  # 秒，語音與分詞模型閒置多久後卸載，0 表示一直保留
+    "speculate_partial": True,                # 收音中依部分辨識結果預先分詞，說完時直接執行
+    "confidence_threshold": 0.5,              # 語音指令信心（最低的逐詞信心）低於此值時模糊比對目標、刪除前確認
+    "confidence_log": "confidence.jsonl",     # 語音指令信心記錄檔（相對於 data_dir），空字串表示不記錄
+    "command_history": True,                  # 記錄執行過的指令，重複的指令不再分詞與解析，並提供常用指令清單
+    "wake_word": "小助手",                    # 待命模式的喚醒詞；可用空白標出模型詞典中的詞，ex: "小 助手"
+    "wake_listen": False,                     # 啟動後即進入喚醒詞待命
+    "wake_timeout": 6,                        # 秒，喚醒後沒有說話時回到待命
+    "sample_rate": 16000,
+    "block_size": 8000,
+    "pragmas": {},                            # 開啟資料庫時執行的 PRAGMA，ex: {"journal_mode": "WAL"}
+    "busy_timeout": 5000,                     # 毫秒，等待其他程序釋放寫入鎖
+    "poll_interval": 1000,                    # 毫秒，檢查其他程序異動的間隔，0 表示不檢查
+    "server": None,                           # 同步伺服器網址，ex: http://127.0.0.1:8765；設定後不直接開啟資料庫
+    "archive_after_days": 0,                  # 天，完成超過幾天的項目移到封存檔，0 表示不自動封存
+}
+
+CONFIG_FILE = "v_todo.json"
+
+# 環境變數 -> (設定鍵, 型別)
+ENV_VARS = {
+    "VTODO_DATA_DIR": ("data_dir", str),
+    "VTODO_DB": ("db_path", str),
+    "VTODO_ASR_BACKEND": ("asr_backend", str),
+    "VTODO_VOSK_MODEL": ("vosk_model", str),
+    "VTODO_WHISPER_MODEL": ("whisper_model", str),
+    "VTODO_WHISPER_THREADS": ("whisper_threads", int),
+    "VTODO_WHISPER_PARTIAL_INTERVAL": ("whisper_partial_interval", float),
+    "VTODO_CKIP_MODEL": ("ckip_model", str),
+    "VTODO_SEGMENT_BATCH_SIZE": ("segment_batch_size", int),
+    "VTODO_SEGMENT_MAX_DELAY": ("segment_max_delay", float),
+    "VTODO_MODEL_IDLE_TIMEOUT": ("model_idle_timeout", float),
+    "VTODO_SPECULATE_PARTIAL": ("speculate_partial", json.loads),
+    "VTODO_CONFIDENCE_THRESHOLD": ("confidence_threshold", float),
+    "VTODO_CONFIDENCE_LOG": ("confidence_log", str),
+    "VTODO_COMMAND_HISTORY": ("command_history", json.loads),
+    "VTODO_WAKE_WORD": ("wake_word", str),
+    "VTODO_WAKE_LISTEN": ("wake_listen", json.loads),
+    "VTODO_WAKE_TIMEOUT": ("wake_timeout", float),
+    "VTODO_SAMPLE_RATE": ("sample_rate", int),
+    "VTODO_BLOCK_SIZE": ("block_size", int),
+    "VTODO_PRAGMAS": ("pragmas", json.loads),
+    "VTODO_BUSY_TIMEOUT": ("busy_timeout", int),
+    "VTODO_POLL_INTERVAL": ("poll_interval", int),
+    "VTODO_SERVER": ("server", str),
+    "VTODO_ARCHIVE_AFTER_DAYS": ("archive_after_days", float),
+}
+
+
+class Config:
+    """合併預設值、設定檔與環境變數後的設定；profiles 可覆蓋任一設定（通常是資料庫路徑）
+
+    設定檔格式（JSON）：
+    {"sample_rate": 16000, "profile": "個人",
+     "profiles": {"個人": {"db_path": "todo.db"}, "團隊": {"db_path": "team.db"}}}
+    """
+
+    def __init__(self, values=None, profiles=None, profile=None):
+        self.values = dict(DEFAULTS)
+        self.values.update(values or {})
+        self.profiles = dict(profiles or {})
+        self.profile = profile or next(iter(self.profiles), "default")
+        if self.profile not in self.profiles:
+            self.profiles[self.profile] = {}
+
+    def profile_names(self):
+        return list(self.profiles)
+
+    def settings(self, profile=None):
+        """某個設定檔的完整設定"""
+        name = profile or self.profile
+        if name not in self.profiles:
+            raise KeyError(f"找不到設定檔：{name}")
+        settings = dict(self.values)
+        settings.update(self.profiles[name])
+        return settings
+
+    def get(self, key, profile=None):
+        return self.settings(profile)[key]
+
+    def db_path(self, profile=None):
+        settings = self.settings(profile)
+        return os.path.join(settings["data_dir"], settings["db_path"])
+
+
+def load_config(path=None, environ=None):
+    """讀取設定：預設值 < 設定檔 < 環境變數；設定檔路徑可由 VTODO_CONFIG 指定，不存在時只用預設值"""
+    environ = os.environ if environ is None else environ
+    path = path or environ.get("VTODO_CONFIG", CONFIG_FILE)
+    data = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+    profiles = data.pop("profiles", {})
+    profile = data.pop("profile", None)
+    for name, (key, convert) in ENV_VARS.items():
+        if name in environ:
+            data[key] = convert(environ[name])
+    return Config(data, profiles, environ.get("VTODO_PROFILE", profile))
+
+
+def open_profile_db(parser, args, init=True):
+    """命令列工具共用：讀取設定，檢查 --profile-name，並初始化 --db 或設定檔指定的資料庫
+
+    回傳 (設定, 資料庫路徑, pragmas, busy_timeout)；設定檔不存在時以 parser.error 結束
+    """
+    config = load_config()
+    if args.profile_name and args.profile_name not in config.profiles:
+        parser.error(f"找不到設定檔：{args.profile_name}")
+    db_path = args.db or config.db_path(args.profile_name)
+    pragmas = config.get("pragmas", args.profile_name)
+    busy_timeout = config.get("busy_timeout", args.profile_name)
+    if init:
+        init_db(db_path, pragmas, busy_timeout)
+    return config, db_path, pragmas, busy_timeout
+
+
+class ProfileManager:
+    """管理多個設定檔的資料庫：第一次使用時才初始化並載入，之後切換不需重新開啟
+
+    設定檔指定 server 時改用 RemoteStore 連線到同步伺服器，不直接開啟資料庫
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.active = config.profile
+        self._stores = {}  # 設定檔名稱 -> TodoStore 或 RemoteStore
+
+    def store(self, profile=None):
+        """取得設定檔的 TodoStore，尚未開啟時才建立"""
+        name = profile or self.active
+        store = self._stores.get(name)
+        if store is None and self.config.get("server", name):
+            from todo_client import HTTPTransport, RemoteStore
+            store = RemoteStore(HTTPTransport(self.config.get("server", name)))
+            store.load()
+            self._stores[name] = store
+        elif store is None:
+            settings = self.config.settings(name)
+            db_path = self.config.db_path(name)
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            init_db(db_path, settings["pragmas"], settings["busy_timeout"])
+            store = TodoStore(db_path, pragmas=settings["pragmas"], busy_timeout=settings["busy_timeout"])
+            store.load()
+            self._stores[name] = store
+        return store
+
+    def switch(self, profile):
+        """切換目前的設定檔，回傳其 TodoStore"""
+        store = self.store(profile)
+        self.active = profile
+        return store
+
+    def close(self):
+        for store in self._stores.values():
+            store.close()
+        self._stores.clear()
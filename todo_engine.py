@@ -0,0 +1,755 @@
+import argparse
+import difflib
+import itertools
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from todo_config import open_profile_db
+from todo_history import CommandHistory, Shortcut, command_key
+from todo_store import TodoStore
+from todo_reminders import extract_due, format_due
+
+ITEM_COMMANDS = ["add_item", "delete_item", "edit_item", "complete_item", "move_item_top", "move_item_bottom"]
+
+# 移動項目的關鍵詞片段，解析名稱時一併去除
+MOVE_TOP_FRAGMENTS = ["移到最上面", "移到最前面", "最上面", "最前面", "置頂"]
+MOVE_BOTTOM_FRAGMENTS = ["移到最下面", "移到最後面", "最下面", "最後面", "置底"]
+MOVE_VERBS = ["移到", "移至"]
+MOVE_FILLER_WORDS = MOVE_VERBS + ["把", "將", "項目"]
+
+# 低信心時需要使用者確認的指令，以及目標為現有分類／項目名稱（可模糊比對）的指令
+DESTRUCTIVE_COMMANDS = ["delete_category", "delete_item"]
+CATEGORY_TARGET_COMMANDS = ["delete_category", "edit_category", "enter_category"]
+ITEM_TARGET_COMMANDS = ["delete_item", "edit_item", "complete_item", "move_item_top", "move_item_bottom"]
+FUZZY_CUTOFF = 0.5  # difflib 相似度下限；兩個字的名稱錯一個字為 0.5
+
+
+def result_confidence(result):
+    """Vosk 辨識結果（SetWords(True)）的指令信心：各詞信心的最小值，只要一個詞聽錯指令就可能不同；
+    沒有逐詞資訊時回傳 None"""
+    words = result.get("result")
+    if not words:
+        return None
+    return min(word.get("conf", 1.0) for word in words)
+
+
+class Speculation:
+    """根據語音的部分辨識結果預先送出的分詞；最終結果相同時直接沿用，不必再等分詞模型"""
+    __slots__ = ("text", "future", "result")
+
+    def __init__(self, text, future):
+        self.text = text          # 簡轉繁後送去分詞的文字
+        self.future = future      # 分詞結果
+        self.result = None        # 分詞完成後預先解析的 Shortcut（數字轉換後的分詞與 parse_command 結果）
+
+    @property
+    def prepared(self):
+        return self.result is not None
+
+
+class TodoEngine:
+    """不依賴 PyQt 的指令引擎：解析指令、透過 TodoStore 操作資料並支援撤銷
+
+    介面透過 subscribe(listener) 接收 listener(event, *args)：
+    message(文字) / tokens(分詞結果) / navigate(頁面, 分類 id) /
+    undo_recorded(動作，撤銷後為 None) / confidence(語音指令的信心記錄 dict)
+    資料本身的異動則由 TodoStore 的通知傳遞
+    """
+
+    def __init__(self, store, clock=time.time):
+        self.store = store
+        self.clock = clock                # 解析提醒時間用的現在時間
+        self.store.subscribe(self.on_store_changed)
+        self.page = "categories"          # categories 或 items
+        self.current_category_id = None   # 目前進入的分類
+        self.last_action = None           # 只記錄最近一次的可撤銷動作
+        self.timings = defaultdict(float) # 各階段累計耗時（秒），供效能分析
+        self.speculations = defaultdict(int)  # 預先分詞的次數：submitted / hits / misses
+        self.confidence_threshold = 0.0   # 語音指令信心低於此值時模糊比對目標並確認刪除
+        self.ask_confirmation = None      # ask_confirmation(訊息) -> bool；None 表示不詢問直接執行
+        self.history = None               # CommandHistory；重複的指令直接沿用先前的分詞與解析結果
+        self._listeners = []
+
+    # 訂閱
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _emit(self, event, *args):
+        for listener in list(self._listeners):
+            listener(event, *args)
+
+    def message(self, text, kind="result"):
+        """kind："result" 為指令的執行結果；"echo" 為辨識出的文字，緊接著會有執行結果取代"""
+        self._emit("message", text, kind)
+
+    def record_undo(self, action):
+        """覆蓋先前的撤銷動作"""
+        self.last_action = action
+        self._emit("undo_recorded", action)
+
+    def set_store(self, store):
+        """改用另一個資料庫（切換設定檔），回到分類頁面並清除撤銷記錄"""
+        self.store.unsubscribe(self.on_store_changed)
+        self.store = store
+        store.subscribe(self.on_store_changed)
+        self.current_category_id = None
+        self.last_action = None
+        self._emit("undo_recorded", None)
+        self.show_categories()
+
+    def on_store_changed(self, event, record, *extra):
+        """目前的分類被刪除（撤銷、其他視窗）時回到分類頁面"""
+        if (event == "category_deleted" and record.id == self.current_category_id
+                or event == "reloaded" and self.current_category_id not in self.store.categories):
+            self.current_category_id = None
+            if self.page == "items":
+                self.show_categories()
+
+    # 文字指令
+    def normalize(self, text):
+        """簡轉繁 + 數字轉換"""
+        from todo_nlp import convert_simplified_to_traditional, convert_chinese_numbers
+        return convert_chinese_numbers(convert_simplified_to_traditional(text))
+
+    def run_text(self, text):
+        """處理一段文字指令：正規化、分詞、解析並執行"""
+        results = self.run_batch([text])
+        return results[0] if results else None
+
+    def run_batch(self, texts, dictation=False):
+        """批次處理文字指令：整批只呼叫一次分詞模型，數字轉換直接套用在分詞結果上，
+        並合併為一次資料庫交易。回傳每個指令的 parse_command 結果
+
+        dictation 為口述模式（語音檔匯入）：無法識別為指令的句子在項目頁面直接新增為項目"""
+        from todo_nlp import convert_simplified_to_traditional, segment
+        texts = [convert_simplified_to_traditional(text.strip()) for text in texts if text.strip()]
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        entries = [self.shortcut(text) for text in texts]
+        misses = [text for text, entry in zip(texts, entries) if entry is None]
+        if misses:
+            token_lists = iter(segment(misses))
+            entries = [entry if entry is not None else next(token_lists) for entry in entries]
+        self.timings["segment"] += time.perf_counter() - start
+        return self.run_segmented(entries, dictation)
+
+    def submit_batch(self, texts):
+        """簡轉繁後送出分詞但不等待，回傳每段文字的 Future；完成後將結果交給 run_segmented。
+        分詞在背景執行緒進行，並與同時送出的其他文字合併為一批；指令記錄中已有的指令不送出分詞，
+        Future 直接完成，結果為 Shortcut"""
+        from todo_nlp import convert_simplified_to_traditional, submit_segment
+        texts = [convert_simplified_to_traditional(text) for text in texts if text.strip()]
+        futures = [self.shortcut_future(text) for text in texts]
+        misses = [text for text, future in zip(texts, futures) if future is None]
+        if misses:
+            submitted = iter(submit_segment(misses))
+            futures = [future if future is not None else next(submitted) for future in futures]
+        return futures
+
+    def shortcut(self, text):
+        """指令記錄中相同指令（已簡轉繁的文字）的 Shortcut，沒有時為 None"""
+        if self.history is None:
+            return None
+        return self.history.lookup(command_key(text))
+
+    def shortcut_future(self, text):
+        shortcut = self.shortcut(text)
+        if shortcut is None:
+            return None
+        return self._resolved(shortcut)
+
+    @staticmethod
+    def _resolved(shortcut):
+        future = Future()
+        future.set_result(shortcut)
+        return future
+
+    def _parse(self, entry):
+        """分詞結果或 Shortcut -> (比對用的鍵, 數字轉換後的分詞, parse_command 結果)"""
+        from todo_nlp import normalize_tokens
+        if isinstance(entry, Shortcut):
+            return entry.key, entry.tokens, entry.result
+        tokens = normalize_tokens(entry)
+        return command_key("".join(entry)), tokens, self.parse_command(tokens)
+
+    # 預先分詞
+    def speculate(self, partial, previous=None):
+        """依部分辨識結果預先送出分詞；文字與上一次相同時沿用 previous，不同時取消尚未開始的舊分詞"""
+        from todo_nlp import convert_simplified_to_traditional, submit_segment
+        text = convert_simplified_to_traditional(partial.strip())
+        if previous is not None:
+            if previous.text == text:
+                return previous
+            previous.future.cancel()
+        if not text:
+            return None
+        future = self.shortcut_future(text)
+        if future is not None:
+            return Speculation(text, future)
+        self.speculations["submitted"] += 1
+        return Speculation(text, submit_segment([text])[0])
+
+    def prepare(self, speculation):
+        """分詞完成後預先解析指令並預取要進入的分類，最終結果確認後即可直接執行"""
+        if speculation.prepared or not speculation.future.done() or speculation.future.cancelled():
+            return
+        if speculation.future.exception() is not None:
+            return
+        shortcut = Shortcut(*self._parse(speculation.future.result()))
+        if shortcut.result[0] == "enter_category":
+            category_id = self.store.category_id(shortcut.result[1])
+            if category_id is not None:
+                self.store.prefetch(category_id)
+        speculation.result = shortcut
+
+    def confirm(self, speculation, final_text):
+        """最終辨識結果與預先分詞的文字相同時回傳其分詞 Future（可能已完成；已預先解析時結果為 Shortcut，
+        執行時不再解析），否則取消並回傳 None"""
+        from todo_nlp import convert_simplified_to_traditional
+        if speculation is None:
+            return None
+        if speculation.text == convert_simplified_to_traditional(final_text.strip()) \
+                and not speculation.future.cancelled():
+            self.speculations["hits"] += 1
+            if speculation.prepared:
+                return self._resolved(speculation.result)
+            return speculation.future
+        speculation.future.cancel()
+        self.speculations["misses"] += 1
+        return None
+
+    def run_segmented(self, token_lists, dictation=False, confidences=None):
+        """執行已分詞的指令：數字轉換後逐一解析執行，合併為一次資料庫交易；
+        token_lists 的元素也可以是 Shortcut（已解析過的指令），confidences 為各句的語音辨識信心（文字指令為 None）"""
+        start = time.perf_counter()
+        parsed_list = [self._parse(entry) for entry in token_lists]
+        normalized = time.perf_counter()
+
+        results = []
+        with self.store.batch():
+            for (key, tokens, parsed), confidence in zip(parsed_list, confidences or itertools.repeat(None)):
+                numeric_text = "".join(tokens)
+                self.message(f"語音辨識結果：{numeric_text}", "echo")
+                self._emit("tokens", tokens)
+                result = self.run_tokens(tokens, numeric_text, dictation, confidence, parsed)
+                results.append(result)
+                if self.history is not None:
+                    outcome = ("unknown" if parsed[0] is None else "cancelled" if result is None
+                               else "corrected" if result != parsed else "executed")
+                    self.history.record(key, tokens, parsed, outcome)
+            if self.history is not None:
+                self.history.flush()
+        executed = time.perf_counter()
+
+        self.timings["normalize"] += normalized - start
+        self.timings["execute"] += executed - normalized
+        return results
+
+    def run_tokens(self, tokens, text=None, dictation=False, confidence=None, parsed=None):
+        """解析分詞結果並執行，回傳實際執行的 parse_command 結果（使用者取消時為 None）；
+        parsed 為已解析的結果（來自指令記錄）時不再解析"""
+        text = text if text is not None else "".join(tokens)
+        result = parsed if parsed is not None else self.parse_command(tokens)
+        if dictation and result[0] is None and self.page == "items":
+            result = ("add_item", "".join(tokens))
+        parsed = result
+        if confidence is not None and confidence < self.confidence_threshold:
+            result = self.check_low_confidence(result, confidence)
+        if result is not None:
+            self.execute(result, text)
+        if confidence is not None:
+            action = "cancelled" if result is None else "corrected" if result != parsed else "executed"
+            self._emit("confidence", {"time": self.clock(), "text": text, "command": parsed[0],
+                                      "target": parsed[1], "confidence": round(confidence, 3),
+                                      "low": confidence < self.confidence_threshold, "action": action,
+                                      "corrected": result[1] if action == "corrected" else None})
+        return result
+
+    def check_low_confidence(self, result, confidence):
+        """信心低的指令：目標名稱不存在時改用最相近的現有名稱，刪除前先詢問使用者；取消時回傳 None"""
+        command, target = result[0], result[1]
+        names = None
+        if command in CATEGORY_TARGET_COMMANDS:
+            names = list(self.store.category_map)
+        elif command in ITEM_TARGET_COMMANDS and self.page == "items" and self.current_category_id is not None:
+            names = [item.name for item in self.store.items(self.current_category_id)]
+        if names and target and target not in names:
+            match = difflib.get_close_matches(target, names, n=1, cutoff=FUZZY_CUTOFF)
+            if match:
+                result = (command, match[0], *result[2:])
+        if command in DESTRUCTIVE_COMMANDS and self.ask_confirmation is not None:
+            kind = "分類" if command == "delete_category" else "項目"
+            if not self.ask_confirmation(f"語音辨識的信心較低（{confidence:.0%}），確定要刪除{kind}「{result[1]}」嗎？"):
+                self.message(f"已取消刪除{kind}：{result[1]}")
+                return None
+        return result
+
+    def execute(self, result, text=""):
+        command = result[0]
+
+        # 若指令屬於項目操作，但目前不在項目頁面，則拒絕執行
+        if command in ITEM_COMMANDS and self.page != "items":
+            self.message("請先進入項目頁面操作項目")
+            return False
+
+        if command == "add_category" and result[1]:
+            self.add_category(result[1])
+        elif command == "delete_category" and result[1]:
+            self.delete_category(result[1])
+        elif command == "edit_category" and result[1] and result[2]:
+            self.edit_category(result[1], result[2])
+        elif command == "enter_category" and result[1]:
+            self.enter_category(result[1])
+        elif command == "add_item" and result[1]:
+            self.add_item(result[1])
+        elif command == "delete_item" and result[1]:
+            self.delete_item(result[1])
+        elif command == "edit_item" and result[1] and result[2]:
+            self.edit_item(result[1], result[2])
+        elif command == "complete_item" and result[1]:
+            self.complete_item(result[1])
+        elif command == "move_item_top" and result[1]:
+            self.move_item(result[1], 0)
+        elif command == "move_item_bottom" and result[1]:
+            self.move_item(result[1], -1)
+        elif command == "return_to_categories":
+            self.return_to_categories()
+        elif command == "undo_last_action":
+            self.undo_last_action()
+        else:
+            self.message(f"無法識別的指令：{text}")
+            return False
+        return True
+
+    def parse_command(self, tokens):
+        """解析語音分詞結果，轉換為指令與目標"""
+        command = None
+        target_old = ""
+        target_new = ""
+
+        # 統一異體字
+        tokens = [token.replace("爲", "為") for token in tokens]
+
+        # 去除每個 token 內部的空格
+        tokens = [token.replace(" ", "") for token in tokens]
+
+        # 關鍵詞片段定義（模糊匹配）
+        return_fragments = {"返回", "回到", "上1頁", "前頁", "首頁"}
+        complete_fragments = {"完成", "標記", "勾選", "打勾"}
+        undo_fragment = {"撤銷", "復原"}
+
+        # 判斷指令
+        if "新增" in tokens and "分類" in tokens:
+            command = "add_category"
+        elif "刪除" in tokens and "分類" in tokens:
+            command = "delete_category"
+        elif "修改" in tokens and "分類" in tokens and "為" in tokens:
+            command = "edit_category"
+        elif "進入" in tokens and "分類" in tokens:
+            command = "enter_category"
+        elif "新增" in tokens and "項目" in tokens:
+            command = "add_item"
+        elif "刪除" in tokens and "項目" in tokens:
+            command = "delete_item"
+        elif "修改" in tokens and "項目" in tokens and "為" in tokens:
+            command = "edit_item"
+        elif any(fragment in token for token in tokens for fragment in complete_fragments):
+            command = "complete_item"
+        elif self._is_move(tokens, MOVE_TOP_FRAGMENTS):
+            command = "move_item_top"
+        elif self._is_move(tokens, MOVE_BOTTOM_FRAGMENTS):
+            command = "move_item_bottom"
+        elif any(fragment in "".join(tokens) for fragment in return_fragments):
+            command = "return_to_categories"
+        elif any(fragment in "".join(tokens) for fragment in undo_fragment):
+            command = "undo_last_action"
+
+        # 找出名稱
+        if command in ["edit_category", "edit_item"]:
+            try:
+                old_index = tokens.index("項目") + 1 if "項目" in tokens else tokens.index("分類") + 1
+                new_index = tokens.index("為") + 1
+
+                target_old = "".join(tokens[old_index:new_index-1])
+                target_new = "".join(tokens[new_index:])
+            except ValueError:
+                pass  # 如果格式錯誤，則不做處理
+        elif command in ["move_item_top", "move_item_bottom"]:
+            # 分詞可能把「移到最上面」切開，直接從整句去除關鍵詞
+            target_old = "".join(tokens)
+            for fragment in MOVE_TOP_FRAGMENTS + MOVE_BOTTOM_FRAGMENTS + MOVE_FILLER_WORDS:
+                target_old = target_old.replace(fragment, "")
+        else:
+            start_index = -1
+            for i, token in enumerate(tokens):
+                if token in ["新增", "刪除", "修改", "分類", "項目", "為", "進入", "返回", "完成", "標記", "勾選", "打勾"]:
+                    continue
+                if start_index == -1:
+                    start_index = i
+                target_old += token
+
+        if command in ["edit_category", "edit_item"]:
+            return command, target_old.strip(), target_new.strip()
+        else:
+            return command, target_old.strip()
+
+    @staticmethod
+    def _is_move(tokens, fragments):
+        """有「移到／移至」或以位置詞結尾才算移動，避免「最後面」等出現在項目名稱中時誤判"""
+        sentence = "".join(tokens)
+        if any(verb in sentence for verb in MOVE_VERBS):
+            return any(fragment in sentence for fragment in fragments)
+        return sentence.endswith(tuple(fragments))
+
+    # 頁面
+    def open_category(self, category_id):
+        """進入分類的項目頁面"""
+        self.current_category_id = category_id
+        self.page = "items"
+        self._emit("navigate", "items", category_id)
+
+    def show_categories(self):
+        self.page = "categories"
+        self._emit("navigate", "categories", self.current_category_id)
+
+    # 分類指令
+    def add_category(self, category_name):
+        """新增分類，並存入 SQLite，同時支援撤銷"""
+        # 檢查記憶體中的分類名稱，避免不必要的 SQL 操作
+        if category_name in self.store.category_map:
+            self.message(f"分類「{category_name}」已存在")
+            return None
+
+        category = self.store.add_category(category_name)
+        self.record_undo(("add_category", category_name, category.id))
+        self.message(f"已新增分類：{category_name}")
+        return category
+
+    def delete_category(self, category_name):
+        """刪除分類，並同步 SQLite"""
+        category_id = self.store.category_map.get(category_name)
+        if category_id is None:
+            self.message(f"找不到分類：{category_name}")
+            return None
+
+        category = self.store.delete_category(category_id)
+        self.record_undo(("delete_category", category_name, category_id))
+        self.message(f"已刪除分類：{category_name}")
+        return category
+
+    def edit_category(self, old_category_name, new_category_name):
+        """修改分類名稱，並確保名稱不重複"""
+        if old_category_name not in self.store.category_map:
+            self.message(f"找不到分類：{old_category_name}")
+            return None
+
+        if new_category_name in self.store.category_map:
+            self.message(f"分類「{new_category_name}」已存在，無法修改")
+            return None
+
+        category_id = self.store.category_map[old_category_name]
+        category = self.store.rename_category(category_id, new_category_name)
+        self.record_undo(("edit_category", new_category_name, old_category_name, category_id))
+        self.message(f"已將分類「{old_category_name}」修改為「{new_category_name}」")
+        return category
+
+    def enter_category(self, category_name):
+        """進入分類"""
+        category_id = self.store.category_map.get(category_name)
+        if category_id is None:
+            self.message(f"找不到分類：{category_name}")
+            return False
+
+        self.open_category(category_id)
+        self.message(f"已進入分類：{category_name}")
+        return True
+
+    def return_to_categories(self):
+        """返回分類主頁"""
+        self.show_categories()
+        self.message("已返回分類頁面")
+
+    # 項目指令
+    def add_item(self, item_name):
+        """新增項目，並存入 SQLite；名稱中的時間（如 明天下午4:30）會設為提醒時間"""
+        category_id = self.current_category_id
+        if category_id is None:
+            self.message("請先選擇分類")
+            return None
+
+        item_name, due_at = extract_due(item_name, self.clock())
+
+        # 避免重複新增
+        if self.store.find_item(category_id, item_name):
+            self.message(f"項目「{item_name}」已存在")
+            return None
+
+        item = self.store.add_item(category_id, item_name, due_at=due_at)
+        category_name = self.store.categories[category_id].name
+        self.record_undo(("add_item", item_name, category_name, item.id))
+        if due_at is None:
+            self.message(f"已新增項目：{item_name}")
+        else:
+            self.message(f"已新增項目：{item_name}（提醒時間 {format_due(due_at)}）")
+        return item
+
+    def delete_item(self, item_name):
+        """刪除項目，並同步 SQLite"""
+        category_id = self.current_category_id
+        if category_id is None:
+            self.message("請先選擇分類")
+            return None
+
+        item = self.store.find_item(category_id, item_name)
+        if item is None:
+            self.message(f"找不到項目：{item_name}")
+            return None
+
+        self.store.delete_item(category_id, item.id)
+        category_name = self.store.categories[category_id].name
+        self.record_undo(("delete_item", item_name, category_name, item.id, item.due_at, item.position))
+        self.message(f"已刪除項目：{item_name}")
+        return item
+
+    def edit_item(self, old_name, new_name):
+        """修改項目名稱，並確保名稱不重複"""
+        category_id = self.current_category_id
+        if category_id is None:
+            self.message("請先選擇分類")
+            return None
+
+        # 檢查新名稱是否重複
+        if self.store.find_item(category_id, new_name):
+            self.message(f"項目「{new_name}」已存在")
+            return None
+
+        item = self.store.find_item(category_id, old_name)
+        if item is None:
+            self.message(f"找不到項目：{old_name}")
+            return None
+
+        self.store.rename_item(category_id, item.id, new_name)
+        category_name = self.store.categories[category_id].name
+        self.record_undo(("edit_item", new_name, old_name, category_name, item.id))
+        self.message(f"已修改項目：{old_name} → {new_name}")
+        return item
+
+    def complete_item(self, item_name):
+        """標記項目為完成，並存入 SQLite"""
+        item = self.store.find_item(self.current_category_id, item_name)
+        if item is None:
+            self.message(f"找不到項目：{item_name}")
+            return None
+
+        self.store.set_completed(item.category_id, item.id, 1)
+        category_name = self.store.categories[item.category_id].name
+        self.record_undo(("uncomplete_item", item_name, category_name, item.id))
+        self.message(f"已標記完成：{item_name}")
+        return item
+
+    def move_item(self, item_name, index):
+        """將項目移到指定位置（0 為最上面，-1 為最下面）"""
+        item = self.store.find_item(self.current_category_id, item_name)
+        if item is None:
+            self.message(f"找不到項目：{item_name}")
+            return None
+
+        self.move_item_to(item.id, index)
+        self.message(f"已將「{item_name}」移到{'最上面' if index == 0 else '最下面' if index == -1 else '新位置'}")
+        return item
+
+    def move_item_to(self, item_id, index):
+        """依 id 移動目前分類中的項目（拖曳排序），並記錄撤銷"""
+        category_id = self.current_category_id
+        item = self.store.get_item(category_id, item_id)
+        if item is None:
+            return None
+        old_position = item.position
+        self.store.move_item(category_id, item_id, index)
+        category_name = self.store.categories[category_id].name
+        self.record_undo(("move_item", item.name, category_name, item_id, old_position))
+        return item
+
+    # 撤銷
+    def undo_last_action(self):
+        """回到上一個動作，並同步 SQLite"""
+        if not self.last_action:
+            self.message("沒有可撤銷的動作")
+            return False
+
+        action = self.last_action
+        self.last_action = None
+        self._emit("undo_recorded", None)
+        category_map = self.store.category_map
+
+        if not self.can_undo(action):
+            # 目標已被手動操作或其他視窗刪除
+            self.message("要撤銷的分類或項目已不存在，無法撤銷")
+            return False
+
+        if action[0] == "delete_category":
+            category_name, category_id = action[1], action[2]
+            self.store.add_category(category_name, category_id=category_id)
+
+        elif action[0] == "add_category":
+            category_id = action[2]
+            self.store.delete_category(category_id)
+
+        elif action[0] == "edit_category":
+            old_name, category_id = action[2], action[3]
+            self.store.rename_category(category_id, old_name)
+
+        elif action[0] == "add_item":
+            category_name, item_id = action[2], action[3]
+            self.store.delete_item(category_map.get(category_name), item_id)
+
+        elif action[0] == "delete_item":
+            item_name, category_name, item_id = action[1], action[2], action[3]
+            category_id = category_map.get(category_name)
+            # 檢查該 id 是否已存在
+            due_at = action[4] if len(action) > 4 else None
+            position = action[5] if len(action) > 5 else None
+            if self.store.get_item(category_id, item_id) is None:
+                self.store.add_item(category_id, item_name, item_id=item_id, due_at=due_at, position=position)
+
+        elif action[0] == "edit_item":
+            old_name, category_name, item_id = action[2], action[3], action[4]
+            self.store.rename_item(category_map.get(category_name), item_id, old_name)
+
+        elif action[0] == "uncomplete_item":
+            category_name, item_id = action[2], action[3]
+            self.store.set_completed(category_map.get(category_name), item_id, 0)
+
+        elif action[0] == "move_item":
+            category_name, item_id, position = action[2], action[3], action[4]
+            self.store.set_position(category_map.get(category_name), item_id, position)
+
+        self.message("已撤銷上一個動作")
+        return True
+
+    def can_undo(self, action):
+        """撤銷的目標是否仍存在；刪除分類的撤銷需要名稱與 id 都未被使用"""
+        store = self.store
+        if action[0] == "delete_category":
+            return action[1] not in store.category_map and action[2] not in store.categories
+        if action[0] in ("add_category", "edit_category"):
+            return action[-1] in store.categories
+        # 項目的動作：(動作, 名稱, 分類名稱, 項目 id, ...)，edit_item 多一個舊名稱
+        offset = 1 if action[0] == "edit_item" else 0
+        category_id = store.category_map.get(action[2 + offset])
+        if category_id is None:
+            return False
+        return action[0] == "delete_item" or store.get_item(category_id, action[3 + offset]) is not None
+
+    def clear_undo(self):
+        """清除撤銷動作（逾時後執行）"""
+        self.last_action = None
+        self.message("撤銷時間已過，無法回復")
+
+
+def iter_batches(lines, batch_size):
+    """將輸入串流切成批次，略過空白行"""
+    lines = (line for line in lines if line.strip())
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_repl(engine):
+    """互動模式：逐行輸入文字指令"""
+    print("V-Todo 文字指令模式，輸入 exit 或按 Ctrl-D 離開")
+    while True:
+        try:
+            line = input("> ")
+        except EOFError:
+            print()
+            return
+        if line.strip() in ("exit", "quit"):
+            return
+        engine.run_text(line)
+
+
+def main(argv=None):
+    """執行文字指令：從檔案或標準輸入串流讀取，繞過語音辨識直接走正規化、解析與執行流程"""
+    parser = argparse.ArgumentParser(description="V-Todo 文字指令批次執行")
+    parser.add_argument("commands", nargs="?", default="-",
+                        help="指令檔路徑，每行一個文字指令；省略或為 - 時讀取標準輸入")
+    parser.add_argument("--db", help="SQLite 資料庫路徑（預設依設定檔）")
+    parser.add_argument("--profile-name", dest="profile_name", help="使用的設定檔名稱")
+    parser.add_argument("-b", "--batch-size", type=int, default=64,
+                        help="每批指令數，整批共用一次分詞與一次資料庫交易（預設 64）")
+    parser.add_argument("--report-every", type=int, default=0,
+                        help="每處理 N 個指令輸出一次進度與指令/秒")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="-",
+                        help="以 cProfile 分析執行過程，結果寫入 FILE（省略則輸出前 25 名）")
+    parser.add_argument("--no-history", dest="no_history", action="store_true",
+                        help="不使用也不寫入指令記錄（每個指令都重新分詞與解析）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="輸出每個指令的訊息")
+    args = parser.parse_args(argv)
+
+    from todo_nlp import segmenter_slot
+    segmenter_slot.get()  # 先載入轉換器與分詞模型，避免計入吞吐量
+    config, db_path, pragmas, busy_timeout = open_profile_db(parser, args)
+    store = TodoStore(db_path, pragmas=pragmas, busy_timeout=busy_timeout)
+    store.load()
+    engine = TodoEngine(store)
+    if config.get("command_history", args.profile_name) and not args.no_history:
+        engine.history = CommandHistory(store).load()
+    if args.verbose:
+        engine.subscribe(lambda event, *a: event == "message" and print(a[0]))
+
+    if args.commands == "-" and sys.stdin.isatty():
+        # 互動模式
+        engine.subscribe(lambda event, *a: event == "message" and not args.verbose and print(a[0]))
+        run_repl(engine)
+        store.close()
+        return 0
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    source = sys.stdin if args.commands == "-" else open(args.commands, encoding="utf-8")
+    count = 0
+    next_report = args.report_every
+    start = time.perf_counter()
+    with source:
+        for batch in iter_batches(source, max(1, args.batch_size)):
+            engine.run_batch(batch)
+            count += len(batch)
+            if args.report_every and count >= next_report:
+                elapsed = time.perf_counter() - start
+                print(f"{count} 個指令，{count / elapsed:.0f} 指令/秒", file=sys.stderr)
+                next_report += args.report_every
+    elapsed = time.perf_counter() - start
+
+    if profiler is not None:
+        import pstats
+        profiler.disable()
+        if args.profile == "-":
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        else:
+            profiler.dump_stats(args.profile)
+    store.close()
+
+    print(f"已執行 {count} 個指令，耗時 {elapsed:.2f} 秒（{count / elapsed if elapsed else 0:.0f} 指令/秒）")
+    print("各階段耗時：" + "、".join(f"{stage} {seconds:.2f} 秒" for stage, seconds in engine.timings.items()))
+    if engine.history is not None:
+        print(f"指令記錄命中 {engine.history.hits} 個，未命中 {engine.history.misses} 個")
+    from todo_nlp import batcher
+    if batcher.batches:
+        print(f"分詞模型呼叫 {batcher.batches} 次，平均每批 {batcher.texts / batcher.batches:.1f} 句"
+              f"（batch_size {batcher.batch_size}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
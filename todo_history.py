@@ -0,0 +1,97 @@
+import json
+import time
+
+HISTORY_LIMIT = 10000  # 資料庫保留的指令記錄筆數，載入時刪除更舊的
+INDEX_SIZE = 500  # 記憶體索引最多的指令數，超過時淘汰分數最低（少用且久未使用）的
+HALF_LIFE = 14 * 86400  # 秒，排序與淘汰時使用次數的半衰期
+IGNORED_CHARS = " \t\r\n，。、！？；：,.!?;:"  # 比對時忽略的空白與標點
+
+
+def command_key(text):
+    """比對用的指令文字：去除空白與標點，分詞前後的文字得到相同的鍵；輸入需已簡轉繁"""
+    return "".join(char for char in text if char not in IGNORED_CHARS)
+
+
+class Shortcut:
+    """曾經執行過的指令：重複時直接沿用分詞與解析結果，不必再呼叫分詞模型"""
+    __slots__ = ("key", "tokens", "result", "uses", "last_used")
+
+    def __init__(self, key, tokens, result, uses=0, last_used=0.0):
+        self.key = key
+        self.tokens = tokens      # 數字轉換後的分詞結果
+        self.result = result      # parse_command 的結果
+        self.uses = uses
+        self.last_used = last_used
+
+    def score(self, now):
+        """使用次數依最後使用時間衰減，常用且最近用過的分數高"""
+        return self.uses * 0.5 ** ((now - self.last_used) / HALF_LIFE)
+
+
+class CommandHistory:
+    """指令記錄與頻率索引：每個指令寫入資料庫的 command_history 表，記憶體中以正規化文字為鍵索引
+    可辨識的指令，重複（或只差空白、標點、簡繁）的指令直接取得 Shortcut；也依分數排序常用指令的建議"""
+
+    def __init__(self, store, size=INDEX_SIZE, clock=time.time):
+        self.store = store
+        self.size = size
+        self.clock = clock
+        self.index = {}           # key -> Shortcut
+        self.pending = []         # 尚未寫入資料庫的記錄
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def load(self):
+        """刪除過舊的記錄並從資料庫建立索引"""
+        self.store.prune_command_history(HISTORY_LIMIT)
+        self.index.clear()
+        for key, tokens, command, target, target_new, uses, last_used in self.store.command_history():
+            result = (command, target) if target_new is None else (command, target, target_new)
+            self.index[key] = Shortcut(key, json.loads(tokens), result, uses, last_used)
+        while len(self.index) > self.size:
+            self._evict()
+        return self
+
+    def lookup(self, key):
+        shortcut = self.index.get(key)
+        if shortcut is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return shortcut
+
+    def record(self, key, tokens, result, outcome):
+        """記錄一個執行過的指令；result 為解析結果，outcome 為 executed / corrected / cancelled / unknown"""
+        now = self.clock()
+        command, target = result[0], result[1]
+        target_new = result[2] if len(result) > 2 else None
+        self.pending.append((key, json.dumps(tokens, ensure_ascii=False), command, target, target_new, outcome, now))
+        if command is None or outcome == "cancelled":
+            return
+        shortcut = self.index.get(key)
+        if shortcut is None:
+            if len(self.index) >= self.size:
+                self._evict()
+            shortcut = self.index[key] = Shortcut(key, tokens, result)
+        shortcut.uses += 1
+        shortcut.last_used = now
+
+    def flush(self):
+        """寫入累積的記錄（在 store.batch() 中時隨批次提交）"""
+        if self.pending:
+            rows, self.pending = self.pending, []
+            self.store.log_commands(rows)
+
+    def _evict(self):
+        now = self.clock()
+        del self.index[min(self.index.values(), key=lambda shortcut: shortcut.score(now)).key]
+        self.evicted += 1
+
+    def suggestions(self, query="", limit=10):
+        """包含 query（需已簡轉繁）的常用指令，分數高的在前"""
+        query = command_key(query)
+        now = self.clock()
+        matches = [shortcut for shortcut in self.index.values() if query in shortcut.key]
+        matches.sort(key=lambda shortcut: shortcut.score(now), reverse=True)
+        return matches[:limit]
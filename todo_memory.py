@@ -0,0 +1,174 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def rss_bytes():
+    """目前程序的常駐記憶體（RSS）位元組數；無法取得時回傳 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # 沒有 /proc 時只能取得峰值
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def release_freed_memory():
+    """回收循環參照並請 glibc 把空出的堆積還給系統，卸載後 RSS 才會實際下降"""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def format_bytes(size):
+    if size is None:
+        return "-"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class ModelSlot:
+    """延遲載入、可在閒置時卸載的元件（模型）；記錄載入／卸載耗時與 RSS 變化
+
+    使用時以 with slot.use() as model 取得，使用中不會被卸載
+    """
+
+    def __init__(self, name, loader, unloadable=True):
+        self.name = name
+        self.loader = loader
+        self.unloadable = unloadable
+        self.value = None
+        self.last_used = None
+        self.loads = 0
+        self.load_seconds = None      # 最近一次載入耗時
+        self.unload_seconds = None    # 最近一次卸載耗時
+        self.loaded_rss = None        # 最近一次載入增加的 RSS
+        self.freed_rss = None         # 最近一次卸載減少的 RSS
+        self._users = 0
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self):
+        return self.value is not None
+
+    def get(self):
+        """取得元件，尚未載入時才載入"""
+        with self._lock:
+            if self.value is None:
+                before = rss_bytes()
+                start = time.perf_counter()
+                self.value = self.loader()
+                self.load_seconds = time.perf_counter() - start
+                after = rss_bytes()
+                self.loaded_rss = None if before is None or after is None else after - before
+                self.loads += 1
+            self.last_used = time.monotonic()
+            return self.value
+
+    @contextmanager
+    def use(self):
+        with self._lock:
+            value = self.get()
+            self._users += 1
+        try:
+            yield value
+        finally:
+            with self._lock:
+                self._users -= 1
+                self.last_used = time.monotonic()
+
+    def acquire(self):
+        """長時間使用（ex: 收音中）期間不卸載，結束時呼叫 release()"""
+        with self._lock:
+            value = self.get()  # 載入失敗時不計入使用中
+            self._users += 1
+            return value
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            self.last_used = time.monotonic()
+
+    def idle_seconds(self, now=None):
+        if self.value is None or self._users:
+            return 0.0
+        return (now if now is not None else time.monotonic()) - self.last_used
+
+    def unload(self):
+        """卸載元件，回傳是否有卸載；使用中或不可卸載時略過"""
+        with self._lock:
+            if self.value is None or self._users or not self.unloadable:
+                return False
+            before = rss_bytes()
+            start = time.perf_counter()
+            self.value = None
+            release_freed_memory()
+            self.unload_seconds = time.perf_counter() - start
+            after = rss_bytes()
+            self.freed_rss = None if before is None or after is None else before - after
+            return True
+
+
+class MemoryManager:
+    """管理各元件的載入狀態：閒置超過 idle_timeout 秒的元件在 collect_idle() 時卸載，下次使用時再載入"""
+
+    def __init__(self, idle_timeout=0):
+        self.idle_timeout = idle_timeout  # 0 表示不自動卸載
+        self.slots = {}
+
+    def register(self, name, loader, unloadable=True):
+        slot = self.slots[name] = ModelSlot(name, loader, unloadable)
+        return slot
+
+    def preload(self, names=None):
+        """在背景執行緒預先載入，避免第一次使用時等待"""
+        slots = [self.slots[name] for name in names] if names else list(self.slots.values())
+
+        def load():
+            for slot in slots:
+                with slot.use():
+                    pass
+        thread = threading.Thread(target=load, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def collect_idle(self, now=None):
+        """卸載閒置過久的元件，回傳卸載的名稱"""
+        if not self.idle_timeout:
+            return []
+        now = time.monotonic() if now is None else now
+        return [slot.name for slot in self.slots.values()
+                if slot.unloadable and slot.idle_seconds(now) >= self.idle_timeout and slot.unload()]
+
+    def unload_all(self):
+        return [slot.name for slot in self.slots.values() if slot.unload()]
+
+    def report(self):
+        """各元件的狀態：[{name, loaded, idle, loads, load_seconds, unload_seconds, loaded_rss, freed_rss}]"""
+        now = time.monotonic()
+        return [{
+            "name": slot.name,
+            "loaded": slot.loaded,
+            "idle": slot.idle_seconds(now),
+            "loads": slot.loads,
+            "load_seconds": slot.load_seconds,
+            "unload_seconds": slot.unload_seconds,
+            "loaded_rss": slot.loaded_rss,
+            "freed_rss": slot.freed_rss,
+        } for slot in self.slots.values()]
+
+
+# 程序內共用的管理器；各模組在此登記自己的模型
+memory = MemoryManager()
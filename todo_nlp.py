@@ -0,0 +1,284 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+
+from todo_config import load_config
+from todo_memory import memory
+
+
+_config = load_config()
+
+
+def _load_segmenter():
+    """載入繁體中文分詞模型（模型名稱見設定）；第一次載入時一併匯入 PyTorch"""
+    from ckip_transformers.nlp import CkipWordSegmenter
+    return CkipWordSegmenter(model=_config.get("ckip_model"))
+
+
+# 分詞模型第一次使用時才載入，閒置過久時可由記憶體管理卸載
+segmenter_slot = memory.register("CKIP 分詞模型", _load_segmenter)
+
+
+def ws_driver(texts, **options):
+    """以分詞模型分詞，模型未載入時先載入"""
+    with segmenter_slot.use() as model:
+        return model(texts, **options)
+
+
+class SegmentBatcher:
+    """分詞微批次：收集各處送來的文字最多 max_delay 秒（或湊滿 batch_size 句），合併為一次模型呼叫
+
+    只有背景執行緒會呼叫模型，因此多個執行緒（語音、語音檔匯入、同步伺服器）可同時送出文字
+    """
+
+    def __init__(self, segmenter, batch_size=16, max_delay=0.005):
+        self.segmenter = segmenter
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.batches = 0       # 模型呼叫次數（每次最多 batch_size 句）
+        self.texts = 0         # 分詞的文字數
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts):
+        """送出多段文字，回傳對應的 Future 列表，結果為 token 列表"""
+        futures = []
+        for text in texts:
+            future = Future()
+            futures.append(future)
+            self._queue.put((text, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="segment-batcher", daemon=True)
+                    self._thread.start()
+        return futures
+
+    def segment(self, texts):
+        """送出並等待分詞結果"""
+        return [future.result() for future in self.submit(texts)]
+
+    def _collect(self):
+        """等待第一段文字，之後最多再等 max_delay 秒或直到湊滿 batch_size 句"""
+        pending = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(pending) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                results = self.segmenter([text for text, future in pending], batch_size=self.batch_size,
+                                         show_progress=False)
+            except Exception as e:
+                for text, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(pending)
+            for (text, future), tokens in zip(pending, results):
+                future.set_result(tokens)
+
+
+# 所有分詞都經由同一個微批次（批次大小與等待毫秒數見設定）
+batcher = SegmentBatcher(ws_driver, _config.get("segment_batch_size"), _config.get("segment_max_delay") / 1000)
+
+def _load_converter():
+    """簡轉繁轉換器（s2t 代表簡體轉繁體），第一次使用時才匯入 OpenCC 並載入字典"""
+    import opencc
+    return opencc.OpenCC('s2t')
+
+
+# 字典很小且每個指令都會用到，載入後不卸載
+converter_slot = memory.register("OpenCC 簡轉繁", _load_converter, unloadable=False)
+
+
+def convert_simplified_to_traditional(text):
+    """將簡體中文轉為繁體"""
+    converter = converter_slot.value or converter_slot.get()
+    return converter.convert(text)
+
+# 中文數字對應表（模組載入時建立一次）
+CHINESE_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "兩": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000}
+CHINESE_BIG_UNITS = {"萬": 10000, "億": 100000000}
+NUMERAL_CHARS = frozenset(CHINESE_DIGITS) | frozenset(CHINESE_UNITS) | frozenset(CHINESE_BIG_UNITS)
+# 數字須以數字或「十」開頭，避免誤轉「千萬」、「萬一」這類詞
+NUMERAL_STARTS = frozenset(CHINESE_DIGITS) | {"十"}
+# 口語省略最後的單位：「一萬五」是 15000、「兩千五」是 2500，單位之後的個位數乘上下一級單位；
+# 萬、億之前的數以最低一位為準：「十萬五」是 150000、「一百萬五」是 1500000
+IMPLIED_UNITS = frozenset("百千萬億")
+ASCII_DIGITS = frozenset("0123456789")
+HOUR_UNITS = frozenset("點時")
+RANGE_WORDS = frozenset(["到", "至", "~", "～", "-"])
+
+
+@lru_cache(maxsize=4096)
+def chinese_to_int(text):
+    """將中文數字轉為整數，例如 三十五 -> 35、兩千零五 -> 2005、一萬五 -> 15000、二零二五 -> 2025"""
+    if not any(ch in CHINESE_UNITS or ch in CHINESE_BIG_UNITS for ch in text):
+        # 沒有單位時逐位讀出（年份、編號）
+        value = 0
+        for ch in text:
+            value = value * 10 + CHINESE_DIGITS[ch]
+        return value
+
+    total = wan = section = number = 0
+    place = 1     # 目前這一節最後讀到的位數
+    implied = 1   # 最後一個單位之後省略的單位
+    for ch in text:
+        if ch in CHINESE_DIGITS:
+            number = CHINESE_DIGITS[ch]
+            place = 1
+        elif ch in CHINESE_UNITS:
+            section += (number or 1) * CHINESE_UNITS[ch]  # 「十五」的十前面省略了一
+            number = 0
+            place = CHINESE_UNITS[ch]
+            implied = place // 10
+        elif ch == "萬":
+            wan = (section + number) * 10000
+            section = number = 0
+            implied = place * 1000
+            place = 1
+        else:
+            total = (total + wan + section + number) * 100000000
+            wan = section = number = 0
+            implied = place * 10000000
+            place = 1
+    if len(text) >= 2 and text[-1] in CHINESE_DIGITS and text[-2] in IMPLIED_UNITS:
+        number *= implied
+    return total + wan + section + number
+
+
+def _read_number(token, i):
+    """從位置 i 讀取連續的中文或阿拉伯數字，回傳 (數值, 結束位置)；沒有數字時數值為 None"""
+    n = len(token)
+    j = i
+    if j < n and token[j] in NUMERAL_STARTS:
+        while j < n and token[j] in NUMERAL_CHARS:
+            j += 1
+        return chinese_to_int(token[i:j]), j
+    while j < n and token[j] in ASCII_DIGITS:
+        j += 1
+    if j > i:
+        return int(token[i:j]), j
+    return None, i
+
+
+def _read_minutes(token, i):
+    """讀取整點之後的分鐘：三十分、三十、半、一刻／三刻，回傳 (分鐘, 結束位置)"""
+    if i < len(token) and token[i] == "半":
+        return 30, i + 1
+    value, j = _read_number(token, i)
+    if value is None:
+        return None, i
+    if j < len(token) and token[j] == "刻":
+        return value * 15, j + 1
+    if j < len(token) and token[j] == "分":
+        j += 1
+    return value, j
+
+
+def _convert_token(token):
+    """單次掃描轉換一個 token，回傳 (文字, 種類)
+
+    種類：number（純數字）、hour（整點）、time（時:分）、minute（X分）；無法轉換時為 None
+    與舊版相同，數字必須位於 token 開頭，避免誤轉「一起」、「第三」這類詞
+    """
+    value, i = _read_number(token, 0)
+    if value is None:
+        return token, None
+    n = len(token)
+    if i == n:
+        return str(value), "number"
+
+    unit = token[i]
+    if unit in HOUR_UNITS:
+        minutes, j = _read_minutes(token, i + 1)
+        if minutes is None or minutes >= 60:
+            head, kind, j = f"{value}{unit}", "hour", i + 1
+        else:
+            head, kind = f"{value}:{minutes:02d}", "time"
+    elif unit == "分":
+        head, kind, j = f"{value}分", "minute", i + 1
+    elif unit in RANGE_WORDS:
+        head, kind, j = str(value), "number", i
+    else:
+        return token, None
+
+    # 範圍：三到五、三點到五點
+    if j < n and token[j] in RANGE_WORDS:
+        tail, tail_kind = _convert_token(token[j + 1:])
+        if tail_kind is not None:
+            return f"{head}-{tail}", tail_kind
+    return head + token[j:], kind
+
+
+def _minutes_token(token):
+    """跨 token 的分鐘：整點之後的「三十分」、「三十」、「半」、「一刻」"""
+    minutes, j = _read_minutes(token, 0)
+    if minutes is None or j != len(token) or minutes >= 60:
+        return None
+    return minutes
+
+
+def normalize_tokens(tokens):
+    """將分詞結果中的中文數字、時間與範圍轉為阿拉伯數字，一次線性掃描完成
+
+    例：["四點", "三十分"] -> ["4:30"]、["三點半"] -> ["3:30"]、["三", "到", "五"] -> ["3", "-", "5"]
+    """
+    converted = []
+    kinds = []
+    for raw_token in tokens:
+        # 先去除前後空白
+        token = raw_token.strip()
+        if not token:
+            continue
+
+        # 前一個 token 是整點：合併分鐘，ex: 四點 + 三十分 -> 4:30
+        if kinds and kinds[-1] == "hour":
+            minutes = _minutes_token(token)
+            if minutes is not None:
+                hour = converted[-1][:-1]
+                converted[-1] = f"{hour}:{minutes:02d}"
+                kinds[-1] = "time"
+                continue
+
+        text, kind = _convert_token(token)
+
+        # 範圍：數字 + 到/至 + 數字 -> 數字-數字
+        if kind is not None and len(kinds) >= 2 and converted[-1] in RANGE_WORDS and kinds[-2] is not None:
+            converted[-1] = "-"
+
+        converted.append(text)
+        kinds.append(kind)
+    return converted
+
+
+def convert_chinese_numbers(text):
+    """根據分詞結果，轉換時間格式及數字"""
+    return "".join(normalize_tokens(batcher.segment([text])[0]))
+
+
+def segment(texts):
+    """批次分詞，回傳每段文字的 token 列表；與其他執行緒同時送出的文字會合併為一次模型呼叫"""
+    return batcher.segment(texts)
+
+
+def submit_segment(texts):
+    """非同步分詞，回傳 Future 列表，不阻塞呼叫端（ex: GUI 執行緒）"""
+    return batcher.submit(texts)
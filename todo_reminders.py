@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import re
+import time
+from datetime import datetime, timedelta
+
+# 正規化後文字中的提醒時間，ex: 明天下午4:30、晚上8點
+# 時、分前後不可緊接其他數字（ex: 123點），「點」之後不可再接「點」（ex: 1點點）
+DUE_PATTERN = re.compile(r"(今天|明天|後天)?(早上|上午|中午|下午|傍晚|晚上|凌晨)?(?<!\d)(\d{1,2})(?::(\d{2})(?!\d)|時|點(?!點))")
+DAY_OFFSETS = {"今天": 0, "明天": 1, "後天": 2}
+AFTERNOON_PERIODS = {"下午", "傍晚", "晚上"}
+
+
+def extract_due(text, now=None):
+    """從正規化後的項目名稱取出提醒時間，回傳 (去掉時間的名稱, Unix 秒或 None)
+
+    沒有指定日期且時間已過時，視為接下來最近的同一時刻（今天下午或明天）
+    """
+    match = DUE_PATTERN.search(text)
+    if not match:
+        return text, None
+    day, period, hour, minute = match.group(1), match.group(2), int(match.group(3)), int(match.group(4) or 0)
+    if hour > 24 or minute > 59:
+        return text, None
+    if period in AFTERNOON_PERIODS and hour < 12:
+        hour += 12
+    elif period == "凌晨" and hour == 12:
+        hour = 0
+    hour %= 24
+
+    now = datetime.fromtimestamp(now) if now is not None else datetime.now()
+    due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day is not None:
+        due += timedelta(days=DAY_OFFSETS[day])
+    elif due <= now and period is None and hour < 12 and due + timedelta(hours=12) > now:
+        due += timedelta(hours=12)  # 「4:30」在上午十點說，指的是下午
+    elif due <= now:
+        due += timedelta(days=1)
+
+    name = (text[:match.start()] + text[match.end():]).strip()
+    return (name or text), int(due.timestamp())
+
+
+def format_due(due_at):
+    """提醒時間的顯示格式"""
+    due = datetime.fromtimestamp(due_at)
+    if due.date() == datetime.now().date():
+        return due.strftime("%H:%M")
+    return due.strftime("%m/%d %H:%M")
+
+
+class ReminderQueue:
+    """以最小堆積管理提醒：插入 O(log n)；取消只做標記（O(1)），取出時略過已取消的項目"""
+
+    def __init__(self):
+        self._heap = []           # [due_at, 序號, item_id, payload, 有效]
+        self._entries = {}        # item_id -> 堆積中的有效項目
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item_id):
+        return item_id in self._entries
+
+    def push(self, item_id, due_at, payload=None):
+        """加入或更新提醒"""
+        self.cancel(item_id)
+        entry = [due_at, next(self._counter), item_id, payload, True]
+        self._entries[item_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def cancel(self, item_id):
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return False
+        entry[-1] = False
+        # 已取消的項目過多時重建堆積，避免佔用記憶體
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [e for e in self._heap if e[-1]]
+            heapq.heapify(self._heap)
+        return True
+
+    def cancel_where(self, predicate):
+        """取消 payload 符合條件的提醒，回傳取消數量"""
+        item_ids = [item_id for item_id, entry in self._entries.items() if predicate(entry[3])]
+        for item_id in item_ids:
+            self.cancel(item_id)
+        return len(item_ids)
+
+    def next_due(self):
+        """最早的提醒時間，沒有提醒時回傳 None"""
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """取出所有已到期的提醒 [(item_id, due_at, payload)]"""
+        due = []
+        while self._heap and (not self._heap[0][-1] or self._heap[0][0] <= now):
+            due_at, _, item_id, payload, valid = heapq.heappop(self._heap)
+            if valid:
+                del self._entries[item_id]
+                due.append((item_id, due_at, payload))
+        return due
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+
+class ReminderScheduler:
+    """依 TodoStore 的異動維護提醒堆積，只在最早的提醒時間喚醒一次，不做輪詢
+
+    arm(秒數或 None) 由介面實作（例如單一 QTimer），on_due(到期列表) 負責顯示提醒，
+    on_overdue(數量) 在載入時彙總已過期的提醒（只提示一次，不逐一觸發）
+    """
+
+    def __init__(self, store, arm, on_due, clock=time.time, on_overdue=None):
+        self.store = store
+        self.queue = ReminderQueue()
+        self._arm = arm
+        self._on_due = on_due
+        self._on_overdue = on_overdue
+        self._clock = clock
+        store.subscribe(self.on_store_changed)
+
+    def set_store(self, store):
+        """改為排程另一個資料庫的提醒（切換設定檔）"""
+        self.store.unsubscribe(self.on_store_changed)
+        self.store = store
+        store.subscribe(self.on_store_changed)
+        self.load()
+
+    def load(self, report_overdue=True):
+        """從資料庫載入尚未到期的提醒；已過期的不再觸發，只在 report_overdue 時彙總通知一次"""
+        self.queue.clear()
+        now = self._clock()
+        overdue = 0
+        for item_id, category_id, name, due_at in self.store.pending_reminders():
+            if due_at > now:
+                self.queue.push(item_id, due_at, (category_id, name))
+            else:
+                overdue += 1
+        self.rearm()
+        if overdue and report_overdue and self._on_overdue:
+            self._on_overdue(overdue)
+
+    def rearm(self):
+        next_due = self.queue.next_due()
+        self._arm(None if next_due is None else max(0.0, next_due - self._clock()))
+
+    def fire(self):
+        """計時器到期時呼叫：通知所有到期的提醒並重新設定計時器"""
+        due = self.queue.pop_due(self._clock())
+        if due:
+            self._on_due(due)
+        self.rearm()
+
+    def on_store_changed(self, event, record, *extra):
+        if event == "reloaded":
+            self.load(report_overdue=False)
+            return
+        if event == "category_deleted":
+            changed = self.queue.cancel_where(lambda payload: payload[0] == record.id)
+        elif event in ("item_added", "item_completed", "item_renamed"):
+            if record.due_at is not None and not record.completed:
+                self.queue.push(record.id, record.due_at, (record.category_id, record.name))
+                changed = True
+            else:
+                changed = self.queue.cancel(record.id)
+        elif event == "item_deleted":
+            changed = self.queue.cancel(record.id)
+        else:
+            changed = False
+        if changed:
+            self.rearm()
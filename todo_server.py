@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+import sys
+import threading
+
+from todo_config import open_profile_db
+from todo_engine import TodoEngine
+from todo_store import TodoStore, init_db
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+# (方法, 路徑, 處理函式)；路徑中的數字為分類 id 與項目 id
+ROUTES = [
+    ("GET", r"/categories", "list_categories"),
+    ("POST", r"/categories", "create_category"),
+    ("PATCH", r"/categories/(\d+)", "rename_category"),
+    ("DELETE", r"/categories/(\d+)", "delete_category"),
+    ("GET", r"/categories/(\d+)/items", "list_items"),
+    ("POST", r"/categories/(\d+)/items", "create_item"),
+    ("PATCH", r"/categories/(\d+)/items/(\d+)", "update_item"),
+    ("DELETE", r"/categories/(\d+)/items/(\d+)", "delete_item"),
+    ("GET", r"/reminders", "list_reminders"),
+    ("POST", r"/undo", "undo"),
+]
+ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+
+# 推播佇列上限，客戶端跟不上時中斷連線，由客戶端重新連線並重新載入
+EVENT_QUEUE_SIZE = 1024
+
+
+def record_to_dict(record):
+    """Category / Item 轉為 JSON 物件"""
+    if record is None:
+        return None
+    return {slot: getattr(record, slot) for slot in record.__slots__}
+
+
+class TodoServer:
+    """本機同步伺服器：獨佔 SQLite 資料庫，以 HTTP + JSON 提供分類、項目與撤銷操作，
+    並以 Server-Sent Events（GET /events）推播 TodoStore 的異動通知給所有客戶端
+
+    handle() 不涉及網路，可直接作為測試用的本機替身（見 todo_client.LoopbackTransport）
+    """
+
+    def __init__(self, store, poll_interval=1000):
+        self.store = store
+        self.engine = TodoEngine(store)  # 沿用指令引擎的撤銷邏輯
+        self.poll_interval = poll_interval
+        self._undo = {}                  # 客戶端 id -> 最近一次的可撤銷動作
+        self._subscribers = set()        # 推播用的 asyncio.Queue
+        self._listeners = []             # 同一程序內的訂閱者（本機替身）
+        self._loop = None
+        self._server = None
+        self._poll_task = None
+        self._connections = {}           # 處理中的連線 task -> writer
+        store.subscribe(self._broadcast)
+
+    # 推播
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _broadcast(self, event, record, *extra):
+        payload = {"event": event, "record": record_to_dict(record), "extra": list(extra)}
+        for listener in list(self._listeners):
+            listener(payload)
+        data = ("data: " + json.dumps(payload, ensure_ascii=False) + "\n\n").encode()
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(data)
+            except asyncio.QueueFull:
+                # 客戶端跟不上：清空佇列並結束連線，客戶端重新連線後會重新載入
+                self._subscribers.discard(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
+
+    # 請求處理
+    def handle(self, method, path, body=b"", client_id=""):
+        """處理一個請求，回傳 (狀態碼, JSON 物件)"""
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                payload = json.loads(body) if body else {}
+                if not isinstance(payload, dict):
+                    raise ValueError("請求內容須為 JSON 物件")
+                return getattr(self, handler)(client_id, payload, *map(int, match.groups()))
+            except KeyError as e:
+                return 404, {"error": f"找不到：{e.args[0] if e.args else path}"}
+            except sqlite3.IntegrityError as e:
+                return 409, {"error": str(e)}
+            except (ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+        return (405, {"error": "不支援的方法"}) if allowed else (404, {"error": f"找不到：{path}"})
+
+    def _category(self, category_id):
+        if category_id not in self.store.categories:
+            raise KeyError(f"分類 {category_id}")
+        return self.store.categories[category_id]
+
+    def _item(self, category_id, item_id):
+        self._category(category_id)
+        item = self.store.get_item(category_id, item_id)
+        if item is None:
+            raise KeyError(f"項目 {item_id}")
+        return item
+
+    @staticmethod
+    def _name(payload, required=True):
+        """取出請求中的名稱；缺少或不是非空字串時回應 400（KeyError 保留給找不到分類／項目的 404）"""
+        if "name" not in payload:
+            if required:
+                raise ValueError("缺少欄位：name")
+            return None
+        name = payload["name"]
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("name 須為非空字串")
+        return name
+
+    def list_categories(self, client_id, payload):
+        return 200, [record_to_dict(category) for category in self.store.categories.values()]
+
+    def create_category(self, client_id, payload):
+        name = self._name(payload)
+        if name in self.store.category_map:
+            raise sqlite3.IntegrityError(f"分類「{name}」已存在")
+        category = self.store.add_category(name, category_id=payload.get("id"))
+        self._undo[client_id] = ("add_category", name, category.id)
+        return 201, record_to_dict(category)
+
+    def rename_category(self, client_id, payload, category_id):
+        category = self._category(category_id)
+        name = self._name(payload)
+        if name == category.name:
+            return 200, record_to_dict(category)
+        if name in self.store.category_map:
+            raise sqlite3.IntegrityError(f"分類「{name}」已存在")
+        old_name = category.name
+        self.store.rename_category(category_id, name)
+        self._undo[client_id] = ("edit_category", name, old_name, category_id)
+        return 200, record_to_dict(category)
+
+    def delete_category(self, client_id, payload, category_id):
+        category = self._category(category_id)
+        self.store.delete_category(category_id)
+        self._undo[client_id] = ("delete_category", category.name, category_id)
+        return 200, record_to_dict(category)
+
+    def list_items(self, client_id, payload, category_id):
+        self._category(category_id)
+        return 200, [record_to_dict(item) for item in self.store.items(category_id)]
+
+    def create_item(self, client_id, payload, category_id):
+        category = self._category(category_id)
+        item = self.store.add_item(category_id, self._name(payload), completed=payload.get("completed", 0),
+                                   item_id=payload.get("id"), due_at=payload.get("due_at"),
+                                   position=payload.get("position"))
+        self._undo[client_id] = ("add_item", item.name, category.name, item.id)
+        return 201, record_to_dict(item)
+
+    def update_item(self, client_id, payload, category_id, item_id):
+        """依欄位修改項目：name 改名、completed 勾選、index 移到指定位置、position 直接設定排序鍵"""
+        category = self._category(category_id)
+        item = self._item(category_id, item_id)
+        name = self._name(payload, required=False)
+        if name is not None and name != item.name:
+            old_name = item.name
+            self.store.rename_item(category_id, item_id, name)
+            self._undo[client_id] = ("edit_item", item.name, old_name, category.name, item_id)
+        if "completed" in payload and bool(payload["completed"]) != bool(item.completed):
+            self.store.set_completed(category_id, item_id, payload["completed"])
+            if item.completed:
+                self._undo[client_id] = ("uncomplete_item", item.name, category.name, item_id)
+        if "index" in payload or "position" in payload:
+            old_position = item.position
+            if "index" in payload:
+                self.store.move_item(category_id, item_id, int(payload["index"]))
+            else:
+                self.store.set_position(category_id, item_id, float(payload["position"]))
+            self._undo[client_id] = ("move_item", item.name, category.name, item_id, old_position)
+        return 200, record_to_dict(item)
+
+    def delete_item(self, client_id, payload, category_id, item_id):
+        category = self._category(category_id)
+        item = self._item(category_id, item_id)
+        self.store.delete_item(category_id, item_id)
+        self._undo[client_id] = ("delete_item", item.name, category.name, item_id, item.due_at, item.position)
+        return 200, record_to_dict(item)
+
+    def list_reminders(self, client_id, payload):
+        return 200, [list(row) for row in self.store.pending_reminders()]
+
+    def undo(self, client_id, payload):
+        """撤銷該客戶端最近一次的動作"""
+        self.engine.last_action = self._undo.pop(client_id, None)
+        return 200, {"undone": self.engine.undo_last_action()}
+
+    # HTTP
+    async def _handle_connection(self, reader, writer):
+        """HTTP/1.1 keep-alive：同一條連線可連續處理多個請求"""
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                path = target.partition("?")[0]
+
+                if method == "GET" and path == "/events":
+                    await self._stream_events(writer)
+                    break
+                try:
+                    status, payload = self.handle(method, path, body, headers.get("x-client-id", ""))
+                except Exception as e:  # 不讓單一請求的錯誤中斷伺服器
+                    status, payload = 500, {"error": str(e)}
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def _stream_events(self, writer):
+        subscriber = asyncio.Queue(EVENT_QUEUE_SIZE)
+        self._subscribers.add(subscriber)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n"
+                     b": connected\n\n")
+        try:
+            await writer.drain()
+            while True:
+                data = await subscriber.get()
+                if data is None:
+                    break
+                writer.write(data)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def _poll_changes(self):
+        """直接寫入資料庫的其他程序（如匯入工具）所做的異動也推播給客戶端"""
+        while True:
+            await asyncio.sleep(self.poll_interval / 1000)
+            try:
+                self.store.poll_changes()
+            except sqlite3.Error as e:
+                print("同步失敗：", e)
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        if self.poll_interval > 0:
+            self._poll_task = self._loop.create_task(self._poll_changes())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        port = await self.start(host, port)
+        print(f"V-Todo 同步伺服器：http://{host}:{port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def shutdown(self):
+        """關閉監聽、結束所有連線後停止事件迴圈"""
+        self._server.close()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        for subscriber in list(self._subscribers):
+            while not subscriber.empty():
+                subscriber.get_nowait()
+            subscriber.put_nowait(None)
+        for writer in list(self._connections.values()):
+            writer.close()  # 等待中的讀取會收到 EOF，連線處理自行結束
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=1)
+        self._loop.stop()
+
+    def stop(self):
+        """從其他執行緒停止伺服器（搭配 start_server_thread）"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self._loop)
+
+
+def start_server_thread(db_path, host="127.0.0.1", port=0, **store_options):
+    """在背景執行緒啟動伺服器（嵌入或測試用），回傳 (TodoServer, 實際埠號)"""
+    started = threading.Event()
+    result = {}
+
+    def run():
+        init_db(db_path)
+        store = TodoStore(db_path, **store_options)
+        store.load()
+        server = TodoServer(store)
+        loop = asyncio.new_event_loop()
+        result["server"] = server
+        result["port"] = loop.run_until_complete(server.start(host, port))
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            store.close()
+            loop.close()
+
+    threading.Thread(target=run, name="todo-server", daemon=True).start()
+    started.wait()
+    return result["server"], result["port"]
+
+
+def main(argv=None):
+    """啟動本機同步伺服器，讓多個 V-Todo 客戶端共用同一個資料庫"""
+    parser = argparse.ArgumentParser(description="V-Todo 本機同步伺服器")
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址（預設只接受本機連線）")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", help="SQLite 資料庫路徑（預設依設定檔）")
+    parser.add_argument("--profile-name", dest="profile_name", help="使用的設定檔名稱")
+    args = parser.parse_args(argv)
+
+    config, db_path, pragmas, busy_timeout = open_profile_db(parser, args)
+    store = TodoStore(db_path, pragmas=pragmas, busy_timeout=busy_timeout)
+    store.load()
+    server = TodoServer(store, config.get("poll_interval", args.profile_name))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
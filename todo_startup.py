@@ -0,0 +1,94 @@
+import os
+import re
+import subprocess
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "VTODO_PROFILE_STARTUP"  # 由 run_profile 設定，表示目前是被分析的子程序
+
+# -X importtime 的輸出：import time: self [us] | cumulative | imported package
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+FIRST_WINDOW_LINE = re.compile(r"^first_window\t([\d.]+)$", re.M)
+PHASE_LINE = re.compile(r"^phase\t(.+)\t([\d.]+)$", re.M)
+
+
+class StartupTimer:
+    """記錄啟動各階段的耗時；需在其他模組之前匯入，時間從匯入本模組開始計算"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # (階段名稱, 秒)
+        self.first_window = None
+        self._last = self.start
+
+    @property
+    def profiling(self):
+        return os.environ.get(PROFILE_ENV) == "1"
+
+    def mark(self, name):
+        """結束一個階段：記錄距離上一個階段結束的時間"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def window_shown(self, quit=None):
+        """事件迴圈開始處理、視窗已顯示時呼叫；被分析時輸出各階段耗時後結束程式"""
+        self.mark("顯示視窗")
+        self.first_window = time.perf_counter() - self.start
+        if self.profiling:
+            for name, seconds in self.phases:
+                print(f"phase\t{name}\t{seconds * 1000:.1f}")
+            print(f"first_window\t{self.first_window * 1000:.1f}", flush=True)
+            if quit is not None:
+                quit()
+
+
+startup = StartupTimer()
+
+
+def package_import_times(lines):
+    """彙總 -X importtime 的輸出：{最上層套件: 自身匯入耗時（微秒）}"""
+    totals = defaultdict(int)
+    for line in lines:
+        match = IMPORT_LINE.match(line)
+        if match:
+            totals[match.group(4).split(".")[0]] += int(match.group(1))
+    return totals
+
+
+def pad(text, width):
+    """依顯示寬度補空白（中文字佔兩格）"""
+    used = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    return text + " " * max(0, width - used)
+
+
+def profile_startup(script, argv=(), timeout=120):
+    """以 -X importtime 在子程序中啟動程式到第一個視窗顯示為止，
+    回傳 (首個視窗毫秒數, [(階段, 毫秒)], {套件: 微秒}, 子程序總耗時秒數)；子程序失敗時丟出 RuntimeError"""
+    env = dict(os.environ, **{PROFILE_ENV: "1"})
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", script, *argv], env=env,
+                            capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - start
+    first_window = FIRST_WINDOW_LINE.search(result.stdout)
+    if first_window is None:
+        raise RuntimeError(f"啟動失敗（結束代碼 {result.returncode}）：\n{result.stderr[-2000:]}")
+    phases = [(name, float(ms)) for name, ms in PHASE_LINE.findall(result.stdout)]
+    return float(first_window.group(1)), phases, package_import_times(result.stderr.splitlines()), wall
+
+
+def run_profile(script, argv=(), top=15):
+    """--profile-startup：輸出各模組的匯入耗時與各初始化階段的耗時"""
+    first_window, phases, imports, wall = profile_startup(script, argv)
+    print(f"匯入耗時前 {top} 名（自身耗時，依最上層套件彙總）：")
+    for package, microseconds in sorted(imports.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {pad(package, 24)}{microseconds / 1000:>9.1f} ms")
+    print(f"  {pad('（全部）', 24)}{sum(imports.values()) / 1000:>9.1f} ms")
+    print("啟動階段：")
+    for name, ms in phases:
+        print(f"  {pad(name, 24)}{ms:>9.1f} ms")
+    print(f"首個視窗：{first_window:.1f} ms（含直譯器啟動的程序總耗時 {wall * 1000:.0f} ms）")
+    return 0
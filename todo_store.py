@@ -0,0 +1,817 @@
+import bisect
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+# 新項目的排序鍵間隔；移動時取前後項目的中間值，只更新一列
+POSITION_GAP = 1024.0
+# 異動記錄保留的筆數，落後更多的程序改為完整重新載入
+CHANGE_LOG_LIMIT = 10000
+# 一次輪詢到的外部異動超過此數時不逐列套用，改為完整重新載入
+POLL_RELOAD_THRESHOLD = 1000
+# 其他程序鎖住資料庫時的重試次數與初始等待秒數（每次加倍）
+BUSY_RETRIES = 5
+RETRY_DELAY = 0.05
+
+
+def init_db(db_path="todo.db", pragmas=None, busy_timeout=5000):
+    """初始化 SQLite 資料庫"""
+    conn = sqlite3.connect(db_path, timeout=busy_timeout / 1000)
+    apply_pragmas(conn, pragmas)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_id INTEGER,
+            name TEXT,
+            completed INTEGER DEFAULT 0,
+            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE
+        )
+    ''')
+    # 舊資料庫補上新欄位
+    add_column(cursor, "items", "due_at", "INTEGER")  # 提醒時間（Unix 秒），沒有則為 NULL
+    add_column(cursor, "items", "position", "REAL")   # 排序鍵，數值之間保留間隔
+    # 舊資料依建立順序補上排序鍵
+    cursor.execute(f"UPDATE items SET position = id * {POSITION_GAP} WHERE position IS NULL")
+    # 提醒排程只查詢有設定時間的項目
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_due ON items(due_at) WHERE due_at IS NOT NULL")
+    # 涵蓋索引：依分類讀取排序後的項目不需回表也不需額外排序
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_category_position "
+                   "ON items(category_id, position, id, name, completed, due_at)")
+    # 依分類與名稱查詢項目（匯入時略過已存在的項目）
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_category_name ON items(category_id, name)")
+    create_change_log(cursor)
+    create_category_stats(cursor)
+    create_completion_log(cursor)
+    create_command_history(cursor)
+    conn.commit()
+    conn.close()
+
+
+def create_change_log(cursor):
+    """建立異動記錄表與觸發器：任何連線（包含其他程序）寫入時都會留下 (表格, 列 id)，
+    讓其他程序只需重新讀取變動的列"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            category_id INTEGER
+        )
+    ''')
+    for op, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS categories_{op.lower()}_log AFTER {op} ON categories "
+                       f"BEGIN INSERT INTO changes (table_name, row_id) VALUES ('categories', {row}.id); END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS items_{op.lower()}_log AFTER {op} ON items "
+                       f"BEGIN INSERT INTO changes (table_name, row_id, category_id) "
+                       f"VALUES ('items', {row}.id, {row}.category_id); END")
+    trim_change_log(cursor)
+
+
+def trim_change_log(cursor):
+    """只保留最近 CHANGE_LOG_LIMIT 筆異動記錄"""
+    cursor.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (CHANGE_LOG_LIMIT,))
+
+
+def create_category_stats(cursor):
+    """建立各分類的項目數與完成數彙總表，由觸發器隨項目新增、修改、刪除即時更新，
+    顯示統計時只需讀取每個分類一列，不必對 items 做 COUNT(*)"""
+    created = not cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_stats'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS category_stats (
+            category_id INTEGER PRIMARY KEY REFERENCES categories(id) ON DELETE CASCADE,
+            total INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS categories_insert_stats AFTER INSERT ON categories "
+                   "BEGIN INSERT OR IGNORE INTO category_stats (category_id) VALUES (NEW.id); END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS categories_delete_stats AFTER DELETE ON categories "
+                   "BEGIN DELETE FROM category_stats WHERE category_id = OLD.id; END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS items_insert_stats AFTER INSERT ON items BEGIN "
+                   "UPDATE category_stats SET total = total + 1, completed = completed + (NEW.completed != 0) "
+                   "WHERE category_id = NEW.category_id; END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS items_delete_stats AFTER DELETE ON items BEGIN "
+                   "UPDATE category_stats SET total = total - 1, completed = completed - (OLD.completed != 0) "
+                   "WHERE category_id = OLD.category_id; END")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS items_update_stats AFTER UPDATE OF completed, category_id ON items "
+                   "WHEN (OLD.completed != 0) != (NEW.completed != 0) OR OLD.category_id != NEW.category_id BEGIN "
+                   "UPDATE category_stats SET total = total - 1, completed = completed - (OLD.completed != 0) "
+                   "WHERE category_id = OLD.category_id; "
+                   "UPDATE category_stats SET total = total + 1, completed = completed + (NEW.completed != 0) "
+                   "WHERE category_id = NEW.category_id; END")
+    if created:
+        # 舊資料庫：以現有資料計算一次
+        cursor.execute("INSERT OR REPLACE INTO category_stats (category_id, total, completed) "
+                       "SELECT c.id, COUNT(i.id), COALESCE(SUM(i.completed != 0), 0) "
+                       "FROM categories c LEFT JOIN items i ON i.category_id = c.id GROUP BY c.id")
+
+
+def create_completion_log(cursor):
+    """建立完成記錄表：項目每次被勾選完成或取消完成時，由觸發器記下時間（Unix 秒）與當時的名稱，
+    項目被刪除或封存後仍可查詢；升級前已完成或新增時就已完成的項目沒有記錄，完成時間視為未知"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS completions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL,
+            category_id INTEGER,
+            name TEXT,
+            completed INTEGER NOT NULL,
+            at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completions_at ON completions(at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_completions_item ON completions(item_id, at)")
+    # 封存只掃描已完成的項目
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_completed ON items(id) WHERE completed != 0")
+    cursor.execute("CREATE TRIGGER IF NOT EXISTS items_completed_history AFTER UPDATE OF completed ON items "
+                   "WHEN (OLD.completed != 0) != (NEW.completed != 0) BEGIN "
+                   "INSERT INTO completions (item_id, category_id, name, completed, at) "
+                   "VALUES (NEW.id, NEW.category_id, NEW.name, NEW.completed != 0, "
+                   "CAST(strftime('%s', 'now') AS INTEGER)); END")
+    # 新增時就已完成（ex: 匯入）不知道實際的完成時間，不記錄；移除先前版本建立的觸發器
+    cursor.execute("DROP TRIGGER IF EXISTS items_completed_insert_history")
+
+
+def create_command_history(cursor):
+    """建立指令記錄表：每個執行過的語音或文字指令的正規化文字（key）、分詞結果（JSON）、
+    解析出的指令與目標，以及結果（executed / corrected / cancelled / unknown）"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS command_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            tokens TEXT NOT NULL,
+            command TEXT,
+            target TEXT,
+            target_new TEXT,
+            outcome TEXT NOT NULL,
+            at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_command_history_key ON command_history(key, at)")
+
+
+def is_busy_error(error):
+    """其他連線正在寫入（database is locked / busy）"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def apply_pragmas(conn, pragmas):
+    """執行設定中的 PRAGMA，ex: {"journal_mode": "WAL", "synchronous": "NORMAL"}"""
+    for name, value in (pragmas or {}).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def add_column(cursor, table, column, declaration):
+    """若欄位不存在則新增（用於升級舊的資料庫）"""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+class Category:
+    """記憶體中的分類紀錄；total / completed 為項目數與完成數（來自 category_stats）"""
+    __slots__ = ("id", "name", "total", "completed")
+
+    def __init__(self, category_id, name, total=0, completed=0):
+        self.id = category_id
+        self.name = name
+        self.total = total
+        self.completed = completed
+
+
+ITEM_COLUMNS = "id, name, completed, due_at, position"
+# 依排序鍵讀取分類項目，走 idx_items_category_position 涵蓋索引
+ITEMS_QUERY = f"SELECT {ITEM_COLUMNS} FROM items WHERE category_id = ? ORDER BY position, id"
+
+
+class Item:
+    """記憶體中的項目紀錄"""
+    __slots__ = ("id", "category_id", "name", "completed", "due_at", "position")
+
+    def __init__(self, item_id, category_id, name, completed=0, due_at=None, position=0.0):
+        self.id = item_id
+        self.category_id = category_id
+        self.name = name
+        self.completed = completed
+        self.due_at = due_at
+        self.position = position
+
+
+def make_items(category_id, rows):
+    """由 SELECT ITEM_COLUMNS 的結果建立 {item_id: Item}，順序與查詢結果相同"""
+    return {row[0]: Item(row[0], category_id, row[1], row[2], row[3], row[4]) for row in rows}
+
+
+class TodoStore:
+    """分類與項目的記憶體快取，啟動時載入一次，每次異動同步寫回 SQLite 並通知訂閱者
+
+    通知格式為 listener(event, record, *extra)，event 可能是：
+    category_added / category_renamed(舊名稱) / category_deleted / category_counts（項目數或完成數改變）/
+    item_added / item_renamed(舊名稱) / item_deleted / item_completed /
+    item_moved(新的索引) / reloaded（record 為 None，需重建所有畫面）
+
+    其他程序對同一個資料庫的異動由 poll_changes() 偵測並以相同的事件通知
+    """
+
+    def __init__(self, db_path="todo.db", cache_size=32, pragmas=None, busy_timeout=5000):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self.busy_timeout = busy_timeout  # 毫秒，等待其他程序釋放寫入鎖
+        self.conn = sqlite3.connect(db_path, timeout=busy_timeout / 1000)
+        apply_pragmas(self.conn, pragmas)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+        self.categories = {}      # id -> Category
+        self.category_map = {}    # 名稱 -> id
+        # category_id -> {item_id: Item}，最多快取 cache_size 個分類，超過時淘汰最久未使用的
+        self._items = OrderedDict()
+        self.cache_size = cache_size
+        self._lock = threading.Lock()  # 背景預取與主執行緒共用快取
+        self._generations = {}    # category_id -> 異動次數，避免預取覆蓋較新的資料
+        self.recent_categories = deque(maxlen=8)  # 最近進入的分類，最新的在最前面
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prefetched = 0
+        self.prefetcher = None
+        self._batch_depth = 0     # 批次模式中延後 commit
+        self._data_version = None # PRAGMA data_version，其他連線提交後才會改變
+        self._change_seq = 0      # 已套用的異動記錄序號
+        self._listeners = []
+
+    # 訂閱
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, record, *extra):
+        for listener in list(self._listeners):
+            listener(event, record, *extra)
+
+    # 讀取
+    def load(self):
+        """從 SQLite 載入所有分類（只需呼叫一次）"""
+        self._data_version = self._read_data_version()
+        self._change_seq = self._execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        self.categories.clear()
+        self.category_map.clear()
+        with self._lock:
+            for category_id in self._items:
+                self._touch(category_id)  # 捨棄進行中的預取
+            self._items.clear()
+        for cat_id, name, total, completed in self._execute(
+                "SELECT c.id, c.name, COALESCE(s.total, 0), COALESCE(s.completed, 0) "
+                "FROM categories c LEFT JOIN category_stats s ON s.category_id = c.id"):
+            self.categories[cat_id] = Category(cat_id, name, total, completed)
+            self.category_map[name] = cat_id
+
+    def category_id(self, name):
+        return self.category_map.get(name)
+
+    def _item_dict(self, category_id, record=False):
+        with self._lock:
+            items = self._items.get(category_id)
+            if items is not None:
+                self._items.move_to_end(category_id)
+                if record:
+                    self.cache_hits += 1
+                return items
+            if record:
+                self.cache_misses += 1
+
+        rows = self._execute(ITEMS_QUERY, (category_id,)).fetchall()
+        with self._lock:
+            items = self._items.get(category_id)  # 背景預取可能剛好完成
+            if items is None:
+                items = make_items(category_id, rows)
+                self._cache_put(category_id, items)
+        return items
+
+    def _cache_put(self, category_id, items):
+        self._items[category_id] = items
+        self._items.move_to_end(category_id)
+        while len(self._items) > self.cache_size:
+            self._items.popitem(last=False)
+
+    def _touch(self, category_id):
+        """記錄分類內容已異動"""
+        self._generations[category_id] = self._generations.get(category_id, 0) + 1
+
+    def items(self, category_id):
+        """取得分類下的項目；已快取（或已預取）的分類不再查詢 SQLite"""
+        if category_id not in self.categories:
+            return []
+        if category_id in self.recent_categories:
+            self.recent_categories.remove(category_id)
+        self.recent_categories.appendleft(category_id)
+        return list(self._item_dict(category_id, record=True).values())
+
+    def is_cached(self, category_id):
+        with self._lock:
+            return category_id in self._items
+
+    # 預取
+    def start_prefetcher(self):
+        if self.prefetcher is None:
+            self.prefetcher = ItemPrefetcher(self)
+        return self.prefetcher
+
+    def prefetch(self, category_id):
+        """在背景預先載入分類的項目"""
+        if self.prefetcher is not None and category_id in self.categories:
+            self.prefetcher.request(category_id)
+
+    def prefetch_recent(self):
+        for category_id in list(self.recent_categories):
+            self.prefetch(category_id)
+
+    def _install_prefetched(self, category_id, rows, generation):
+        with self._lock:
+            if category_id in self._items or category_id not in self.categories:
+                return
+            if self._generations.get(category_id, 0) != generation:
+                return  # 查詢期間資料已異動，捨棄結果
+            self._cache_put(category_id, make_items(category_id, rows))
+            self.prefetched += 1
+
+    def cache_stats(self):
+        """快取命中率統計"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "prefetched": self.prefetched,
+            "cached_categories": len(self._items),
+        }
+
+    def find_item(self, category_id, name):
+        if category_id not in self.categories:
+            return None
+        for item in self._item_dict(category_id).values():
+            if item.name == name:
+                return item
+        return None
+
+    def get_item(self, category_id, item_id):
+        if category_id not in self.categories:
+            return None
+        return self._item_dict(category_id).get(item_id)
+
+    # 交易
+    def _execute(self, sql, params=(), many=False):
+        """執行 SQL；其他程序鎖住資料庫超過 busy_timeout 時退避重試，避免 database is locked"""
+        execute = self.conn.executemany if many else self.conn.execute
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return execute(sql, params)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                    self._abort()
+                    raise
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+            except sqlite3.Error:
+                self._abort()
+                raise
+
+    def _abort(self):
+        """失敗的寫入（ex: 名稱重複）仍會開始交易並保留寫入鎖；不在批次中時結束交易，以免其他程序無法寫入"""
+        if not self._batch_depth and self.conn.in_transaction:
+            self.conn.rollback()
+
+    def _commit(self):
+        if not self._batch_depth:
+            self._commit_now()
+
+    def _commit_now(self):
+        for attempt in range(BUSY_RETRIES):
+            try:
+                self.conn.commit()
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                    raise
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    @contextmanager
+    def batch(self):
+        """批次模式：區塊內的異動合併為一次交易，大量指令時避免每筆都 commit"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._commit_now()
+
+    def pending_reminders(self):
+        """所有未完成且設有提醒時間的項目 (item_id, category_id, name, due_at)，走 idx_items_due 索引"""
+        return self._execute(
+            "SELECT id, category_id, name, due_at FROM items "
+            "WHERE due_at IS NOT NULL AND completed = 0").fetchall()
+
+    # 指令記錄
+    def log_commands(self, rows):
+        """寫入指令記錄 (key, tokens, command, target, target_new, outcome, at)；批次模式中隨批次提交"""
+        if not rows:
+            return
+        self._execute("INSERT INTO command_history (key, tokens, command, target, target_new, outcome, at) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?)", rows, many=True)
+        self._commit()
+
+    def command_history(self):
+        """每個可辨識指令的 (key, tokens, command, target, target_new, 使用次數, 最後使用時間)；
+        分詞與解析取最後一次的記錄，取消的指令不計入"""
+        return self._execute(
+            "SELECT key, tokens, command, target, target_new, COUNT(*), MAX(at) FROM command_history "
+            "WHERE command IS NOT NULL AND outcome != 'cancelled' GROUP BY key").fetchall()
+
+    def prune_command_history(self, keep):
+        """只保留最近 keep 筆指令記錄，回傳刪除的筆數"""
+        cursor = self._execute(
+            "DELETE FROM command_history WHERE id <= "
+            "(SELECT id FROM command_history ORDER BY id DESC LIMIT 1 OFFSET ?)", (keep,))
+        self._commit()
+        return cursor.rowcount
+
+    # 其他程序的異動
+    def _read_data_version(self):
+        return self._execute("PRAGMA data_version").fetchone()[0]
+
+    def poll_changes(self):
+        """檢查其他連線是否修改了資料庫，只重新讀取異動記錄中的列並通知訂閱者，回傳套用的異動數
+
+        沒有外部異動時只執行一次 PRAGMA data_version，可放在計時器中頻繁呼叫
+        """
+        version = self._read_data_version()
+        if version == self._data_version:
+            return 0
+        self._data_version = version
+
+        first_seq, last_seq = self._execute("SELECT MIN(seq), MAX(seq) FROM changes").fetchone()
+        if first_seq is not None and (first_seq > self._change_seq + 1
+                                      or last_seq - self._change_seq > POLL_RELOAD_THRESHOLD):
+            # 記錄已被清除，無法得知漏掉的異動；或異動太多，重新載入比逐列套用快
+            self.load()
+            self._notify("reloaded", None)
+            self._trim_changes(first_seq, last_seq)
+            return len(self.categories)
+
+        rows = self._execute(
+            "SELECT seq, table_name, row_id, category_id FROM changes WHERE seq > ? ORDER BY seq",
+            (self._change_seq,)).fetchall()
+        if not rows:
+            return 0
+        self._change_seq = rows[-1][0]
+        # 同一列多次異動只需讀取最新狀態；分類先處理，項目才找得到所屬分類
+        category_ids = list(dict.fromkeys(row_id for _, table, row_id, _ in rows if table == "categories"))
+        item_keys = list(dict.fromkeys((row_id, category_id) for _, table, row_id, category_id in rows
+                                       if table == "items"))
+        applied = sum(self._apply_category_change(category_id) for category_id in category_ids)
+        order = {}  # category_id -> 排序後的 (排序鍵, id)，每個分類只排序一次
+        applied += sum(self._apply_item_change(item_id, category_id, order) for item_id, category_id in item_keys)
+        for category_id in order:
+            if self.is_cached(category_id):
+                self._sort_items(category_id)
+        applied += self._refresh_counts({category_id for _, category_id in item_keys})
+        self._trim_changes(first_seq, last_seq)
+        return applied
+
+    def _trim_changes(self, first_seq, last_seq):
+        """記錄超過保留筆數兩倍時清除較舊的部分；只是整理，資料庫忙碌時留到下次"""
+        if first_seq is None or self._batch_depth or last_seq - first_seq < 2 * CHANGE_LOG_LIMIT:
+            return
+        try:
+            trim_change_log(self.conn)
+            self.conn.commit()
+        except sqlite3.OperationalError:
+            self.conn.rollback()
+
+    def _refresh_counts(self, category_ids):
+        """重新讀取分類的項目數與完成數（其他程序新增、刪除或完成了項目），回傳有變動的分類數"""
+        category_ids = [category_id for category_id in category_ids if category_id in self.categories]
+        if not category_ids:
+            return 0
+        placeholders = ", ".join("?" * len(category_ids))
+        changed = 0
+        for category_id, total, completed in self._execute(
+                f"SELECT category_id, total, completed FROM category_stats WHERE category_id IN ({placeholders})",
+                category_ids):
+            category = self.categories[category_id]
+            if (category.total, category.completed) != (total, completed):
+                category.total, category.completed = total, completed
+                self._notify("category_counts", category)
+                changed += 1
+        return changed
+
+    def _adjust_counts(self, category_id, total, completed):
+        """本程序的異動：觸發器已更新資料庫，同步記憶體中的數字"""
+        category = self.categories.get(category_id)
+        if category is None or not (total or completed):
+            return
+        category.total += total
+        category.completed += completed
+        self._notify("category_counts", category)
+
+    def _apply_category_change(self, category_id):
+        row = self._execute("SELECT name FROM categories WHERE id = ?", (category_id,)).fetchone()
+        category = self.categories.get(category_id)
+        if row is None:
+            if category is None:
+                return 0
+            del self.categories[category_id]
+            del self.category_map[category.name]
+            with self._lock:
+                self._touch(category_id)
+                self._items.pop(category_id, None)
+            if category_id in self.recent_categories:
+                self.recent_categories.remove(category_id)
+            self._notify("category_deleted", category)
+        elif category is None:
+            category = Category(category_id, row[0])
+            self.categories[category_id] = category
+            self.category_map[category.name] = category_id
+            self._notify("category_added", category)
+        elif category.name != row[0]:
+            old_name = category.name
+            del self.category_map[old_name]
+            category.name = row[0]
+            self.category_map[category.name] = category_id
+            self._notify("category_renamed", category, old_name)
+        else:
+            return 0  # 本程序自己的異動，記憶體中已是最新
+        return 1
+
+    def _apply_item_change(self, item_id, category_id, order):
+        """套用一個項目的外部異動；新位置以二分搜尋 order 中的排序鍵取得，結束後由呼叫端重排快取"""
+        with self._lock:
+            self._touch(category_id)
+            items = self._items.get(category_id)
+        if items is None:
+            return 0  # 分類未快取，下次進入時會重新讀取
+        row = self._execute(f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ? AND category_id = ?",
+                                (item_id, category_id)).fetchone()
+        item = items.get(item_id)
+        keys = order.get(category_id)
+        if keys is None:
+            keys = order[category_id] = sorted((item.position, item.id) for item in items.values())
+        if row is None:
+            if item is None:
+                return 0
+            del items[item_id]
+            del keys[bisect.bisect_left(keys, (item.position, item_id))]
+            self._notify("item_deleted", item)
+            return 1
+        if item is None:
+            item = make_items(category_id, [row])[item_id]
+            items[item_id] = item
+            index = bisect.bisect_left(keys, (item.position, item_id))
+            keys.insert(index, (item.position, item_id))
+            self._notify("item_added", item)
+            self._notify("item_moved", item, index)
+            return 1
+
+        changed = 0
+        _, name, completed, due_at, position = row
+        item.due_at = due_at
+        if item.name != name:
+            old_name, item.name = item.name, name
+            self._notify("item_renamed", item, old_name)
+            changed = 1
+        if item.completed != completed:
+            item.completed = completed
+            self._notify("item_completed", item)
+            changed = 1
+        if item.position != position:
+            del keys[bisect.bisect_left(keys, (item.position, item_id))]
+            item.position = position
+            index = bisect.bisect_left(keys, (position, item_id))
+            keys.insert(index, (position, item_id))
+            self._notify("item_moved", item, index)
+            changed = 1
+        return changed
+
+    # 分類異動
+    def add_category(self, name, category_id=None):
+        """新增分類；名稱重複時丟出 sqlite3.IntegrityError。指定 category_id 用於撤銷刪除"""
+        if category_id is None:
+            cursor = self._execute("INSERT INTO categories (name) VALUES (?)", (name,))
+        else:
+            cursor = self._execute("INSERT INTO categories (id, name) VALUES (?, ?)",
+                                       (category_id, name))
+        self._commit()
+        category = Category(cursor.lastrowid, name)
+        self.categories[category.id] = category
+        self.category_map[name] = category.id
+        with self._lock:
+            self._touch(category.id)
+            self._cache_put(category.id, {})
+        self._notify("category_added", category)
+        return category
+
+    def rename_category(self, category_id, new_name):
+        category = self.categories[category_id]
+        old_name = category.name
+        self._execute("UPDATE categories SET name = ? WHERE id = ?", (new_name, category_id))
+        self._commit()
+        del self.category_map[old_name]
+        category.name = new_name
+        self.category_map[new_name] = category_id
+        self._notify("category_renamed", category, old_name)
+        return category
+
+    def delete_category(self, category_id):
+        category = self.categories.pop(category_id)
+        self._execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        self._commit()
+        del self.category_map[category.name]
+        with self._lock:
+            self._touch(category_id)
+            self._items.pop(category_id, None)
+        if category_id in self.recent_categories:
+            self.recent_categories.remove(category_id)
+        self._notify("category_deleted", category)
+        return category
+
+    # 項目異動
+    def add_item(self, category_id, name, completed=0, item_id=None, due_at=None, position=None):
+        """新增項目，預設排在最後；指定 item_id、position 用於撤銷刪除，due_at 為提醒時間（Unix 秒）"""
+        items = self._item_dict(category_id)
+        last = next(reversed(items.values()), None)
+        if position is None:
+            position = last.position + POSITION_GAP if last is not None else POSITION_GAP
+        if item_id is None:
+            cursor = self._execute(
+                "INSERT INTO items (category_id, name, completed, due_at, position) VALUES (?, ?, ?, ?, ?)",
+                (category_id, name, completed, due_at, position))
+        else:
+            cursor = self._execute(
+                "INSERT INTO items (id, category_id, name, completed, due_at, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (item_id, category_id, name, completed, due_at, position))
+        self._commit()
+        item = Item(cursor.lastrowid, category_id, name, completed, due_at, position)
+        self._touch(category_id)
+        items[item.id] = item
+        self._notify("item_added", item)
+        if last is not None and position < last.position:
+            # 撤銷刪除時放回原本的位置
+            self._notify("item_moved", item, self._sort_items(category_id).index(item.id))
+        self._adjust_counts(category_id, 1, 1 if completed else 0)
+        return item
+
+    def rename_item(self, category_id, item_id, new_name):
+        item = self._item_dict(category_id)[item_id]
+        old_name = item.name
+        self._execute("UPDATE items SET name = ? WHERE id = ?", (new_name, item_id))
+        self._commit()
+        self._touch(category_id)
+        item.name = new_name
+        self._notify("item_renamed", item, old_name)
+        return item
+
+    def delete_item(self, category_id, item_id):
+        item = self._item_dict(category_id).pop(item_id)
+        self._execute("DELETE FROM items WHERE id = ?", (item_id,))
+        self._commit()
+        self._touch(category_id)
+        self._notify("item_deleted", item)
+        self._adjust_counts(category_id, -1, -1 if item.completed else 0)
+        return item
+
+    def set_completed(self, category_id, item_id, completed):
+        item = self._item_dict(category_id)[item_id]
+        completed = 1 if completed else 0
+        if item.completed == completed:
+            return item
+        self._execute("UPDATE items SET completed = ? WHERE id = ?", (completed, item_id))
+        self._commit()
+        self._touch(category_id)
+        item.completed = completed
+        self._notify("item_completed", item)
+        self._adjust_counts(category_id, 0, 1 if completed else -1)
+        return item
+
+    def move_item(self, category_id, item_id, index):
+        """將項目移到 index 的位置（0 為最上面，-1 為最下面），只更新該列的排序鍵"""
+        items = list(self._item_dict(category_id).values())
+        item = self._item_dict(category_id)[item_id]
+        items.remove(item)
+        if index < 0:
+            index = len(items) + 1 + index
+        index = max(0, min(index, len(items)))
+        before = items[index - 1] if index > 0 else None
+        after = items[index] if index < len(items) else None
+
+        if before is None and after is None:
+            position = POSITION_GAP
+        elif before is None:
+            position = after.position - POSITION_GAP
+        elif after is None:
+            position = before.position + POSITION_GAP
+        else:
+            position = (before.position + after.position) / 2
+        if not ((before is None or before.position < position) and
+                (after is None or position < after.position)):
+            # 反覆插入同一處使浮點數間隔用盡，重新編號整個分類（很少發生）
+            items.insert(index, item)
+            self._renumber(category_id, items)
+            self._notify("item_moved", item, index)
+            return item
+        return self.set_position(category_id, item_id, position)
+
+    def set_position(self, category_id, item_id, position):
+        """直接設定排序鍵（撤銷移動時還原原本的值）"""
+        item = self._item_dict(category_id)[item_id]
+        if item.position == position:
+            return item
+        self._execute("UPDATE items SET position = ? WHERE id = ?", (position, item_id))
+        self._commit()
+        self._touch(category_id)
+        item.position = position
+        index = self._sort_items(category_id).index(item_id)
+        self._notify("item_moved", item, index)
+        return item
+
+    def _sort_items(self, category_id):
+        """依排序鍵重排快取中的項目，回傳排序後的 id 列表"""
+        items = self._item_dict(category_id)
+        ordered = sorted(items.values(), key=lambda item: (item.position, item.id))
+        items.clear()
+        items.update((item.id, item) for item in ordered)
+        return list(items)
+
+    def _renumber(self, category_id, ordered):
+        positions = [((i + 1) * POSITION_GAP, item.id) for i, item in enumerate(ordered)]
+        self._execute("UPDATE items SET position = ? WHERE id = ?", positions, many=True)
+        self._commit()
+        self._touch(category_id)
+        for (position, _), item in zip(positions, ordered):
+            item.position = position
+        self._sort_items(category_id)
+
+    def close(self):
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        self.conn.close()
+
+
+class ItemPrefetcher:
+    """背景執行緒：以獨立的 SQLite 連線預先載入分類項目到 TodoStore 的快取"""
+
+    def __init__(self, store):
+        self.store = store
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="item-prefetcher", daemon=True)
+        self._thread.start()
+
+    def request(self, category_id):
+        if self.store.is_cached(category_id):
+            return
+        with self._pending_lock:
+            if category_id in self._pending:
+                return
+            self._pending.add(category_id)
+        self._queue.put(category_id)
+
+    def _run(self):
+        conn = sqlite3.connect(self.store.db_path)
+        apply_pragmas(conn, self.store.pragmas)
+        while True:
+            category_id = self._queue.get()
+            if category_id is None:
+                break
+            try:
+                if not self.store.is_cached(category_id):
+                    generation = self.store._generations.get(category_id, 0)
+                    rows = conn.execute(ITEMS_QUERY, (category_id,)).fetchall()
+                    self.store._install_prefetched(category_id, rows, generation)
+            except sqlite3.Error as e:
+                print("預取失敗：", e)
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(category_id)
+        conn.close()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join(timeout=1)
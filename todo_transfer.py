@@ -0,0 +1,215 @@
+import argparse
+import csv
+import itertools
+import json
+import sqlite3
+import sys
+import time
+
+from todo_config import open_profile_db
+from todo_store import POSITION_GAP, apply_pragmas, init_db
+
+# 匯出／匯入的欄位；item 為空的列只代表一個（可能沒有項目的）分類
+FIELDS = ["category", "item", "completed", "due_at", "position"]
+
+EXPORT_QUERY = '''
+    SELECT c.name, i.name, i.completed, i.due_at, i.position
+    FROM categories c LEFT JOIN items i ON i.category_id = c.id
+    ORDER BY c.id, i.position, i.id
+'''
+
+
+def detect_format(path, fmt=None):
+    """依副檔名判斷格式（jsonl 或 csv）"""
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def iter_export_rows(conn, chunk_size=1000):
+    """以游標分批讀出所有分類與項目，記憶體用量與資料量無關"""
+    cursor = conn.execute(EXPORT_QUERY)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def write_rows(rows, stream, fmt):
+    """將 (分類, 項目, 完成, 提醒時間, 排序鍵) 寫成 JSON Lines 或 CSV，回傳列數"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    else:
+        for category, item, completed, due_at, position in rows:
+            record = {"category": category}
+            if item is not None:
+                record.update(item=item, completed=completed, due_at=due_at, position=position)
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_records(stream, fmt):
+    """逐列讀取匯出檔，產生與 FIELDS 對應的 dict"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _optional(value, convert):
+    return None if value is None or value == "" else convert(value)
+
+
+def iter_import_rows(records):
+    """將匯出紀錄轉為 (分類, 項目, 完成, 提醒時間, 排序鍵)；未提供排序鍵時依檔案順序編號"""
+    for number, record in enumerate(records, 1):
+        category = record.get("category")
+        if not category:
+            continue
+        item = record.get("item") or None
+        position = _optional(record.get("position"), float)
+        yield (category, item,
+               1 if _optional(record.get("completed"), int) else 0,
+               _optional(record.get("due_at"), int),
+               number * POSITION_GAP if position is None else position)
+
+
+def export_db(db_path, stream, fmt="jsonl", chunk_size=1000, pragmas=None):
+    """匯出資料庫，回傳列數"""
+    conn = sqlite3.connect(db_path)
+    apply_pragmas(conn, pragmas)
+    try:
+        return write_rows(iter_export_rows(conn, chunk_size), stream, fmt)
+    finally:
+        conn.close()
+
+
+def import_rows(conn, rows, chunk_size=1000, progress=None):
+    """在單一交易內匯入 (分類, 項目, 完成, 提醒時間, 排序鍵)，回傳 (讀取列數, 新增分類數, 新增項目數)
+
+    資料先分批以 executemany 寫入暫存表，再以集合運算合併：名稱已存在的分類與
+    資料庫中同分類下已有同名項目的項目會略過，因此重複匯入同一份檔案不會產生重複資料；
+    檔案中同分類的同名項目（ex: 兩個「買牛奶」）都會匯入
+    """
+    conn.execute("BEGIN IMMEDIATE")  # 先取得寫入鎖，其他程序寫入時依 busy_timeout 等待
+    try:
+        # 以列號（rowid）為鍵，不以名稱去重
+        conn.execute("CREATE TEMP TABLE import_items ("
+                     "category TEXT, name TEXT, completed INTEGER, due_at INTEGER, position REAL)")
+        conn.execute("CREATE TEMP TABLE import_categories (name TEXT PRIMARY KEY)")
+        count = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            conn.executemany("INSERT OR IGNORE INTO import_categories (name) VALUES (?)",
+                             [(row[0],) for row in chunk])
+            conn.executemany("INSERT INTO import_items VALUES (?, ?, ?, ?, ?)",
+                             [row for row in chunk if row[1] is not None])
+            count += len(chunk)
+            if progress:
+                progress(count)
+
+        categories_before = conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+        conn.execute("INSERT OR IGNORE INTO categories (name) SELECT name FROM import_categories")
+        categories_added = conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0] - categories_before
+
+        # 匯入的項目排在分類現有項目之後；SELECT 讀取 items，SQLite 會先算出全部結果再寫入，
+        # 因此只與匯入前已有的項目比對
+        conn.execute('''
+            CREATE TEMP TABLE import_offsets AS
+            SELECT c.id AS category_id, c.name AS category,
+                   COALESCE((SELECT MAX(position) FROM items WHERE category_id = c.id), 0) AS offset
+            FROM categories c JOIN import_categories ic ON ic.name = c.name
+        ''')
+        cursor = conn.execute('''
+            INSERT INTO items (category_id, name, completed, due_at, position)
+            SELECT o.category_id, s.name, s.completed, s.due_at, o.offset + s.position
+            FROM import_items s JOIN import_offsets o ON o.category = s.category
+            WHERE NOT EXISTS (SELECT 1 FROM items i WHERE i.category_id = o.category_id AND i.name = s.name)
+            ORDER BY o.category_id, s.position, s.rowid
+        ''')
+        items_added = cursor.rowcount
+        conn.execute("DROP TABLE import_items")
+        conn.execute("DROP TABLE import_categories")
+        conn.execute("DROP TABLE import_offsets")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return count, categories_added, items_added
+
+
+def import_db(db_path, stream, fmt="jsonl", chunk_size=1000, progress=None, pragmas=None, busy_timeout=5000):
+    """從匯出檔匯入資料庫，回傳 (讀取列數, 新增分類數, 新增項目數)"""
+    init_db(db_path, pragmas, busy_timeout)
+    # 交易由 import_rows 自行控制
+    conn = sqlite3.connect(db_path, timeout=busy_timeout / 1000, isolation_level=None)
+    apply_pragmas(conn, pragmas)
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        return import_rows(conn, iter_import_rows(read_records(stream, fmt)), chunk_size, progress)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    """匯出或匯入分類與項目（JSON Lines / CSV），大量資料時以串流處理"""
+    parser = argparse.ArgumentParser(description="V-Todo 資料匯出／匯入")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="匯出／匯入檔案路徑；- 代表標準輸出／輸入")
+    parser.add_argument("--db", help="SQLite 資料庫路徑（預設依設定檔）")
+    parser.add_argument("--profile-name", dest="profile_name", help="使用的設定檔名稱")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="檔案格式（預設依副檔名判斷）")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每批讀寫列數（預設 1000）")
+    parser.add_argument("--report-every", type=int, default=0, help="每處理 N 列輸出一次進度")
+    args = parser.parse_args(argv)
+
+    config, db_path, pragmas, busy_timeout = open_profile_db(parser, args)
+    fmt = detect_format(args.path, args.format)
+    chunk_size = max(1, args.chunk_size)
+    start = time.perf_counter()
+
+    def rate(count):
+        elapsed = time.perf_counter() - start
+        return count / elapsed if elapsed else 0
+
+    if args.action == "export":
+        if args.path == "-":
+            count = export_db(db_path, sys.stdout, fmt, chunk_size, pragmas)
+        else:
+            with open(args.path, "w", encoding="utf-8", newline="") as stream:
+                count = export_db(db_path, stream, fmt, chunk_size, pragmas)
+        print(f"已匯出 {count} 列，{rate(count):.0f} 列/秒", file=sys.stderr)
+        return 0
+
+    next_report = [args.report_every]
+
+    def progress(count):
+        if args.report_every and count >= next_report[0]:
+            print(f"已讀取 {count} 列，{rate(count):.0f} 列/秒", file=sys.stderr)
+            next_report[0] += args.report_every
+
+    if args.path == "-":
+        result = import_db(db_path, sys.stdin, fmt, chunk_size, progress, pragmas, busy_timeout)
+    else:
+        with open(args.path, encoding="utf-8", newline="") as stream:
+            result = import_db(db_path, stream, fmt, chunk_size, progress, pragmas, busy_timeout)
+    count, categories_added, items_added = result
+    print(f"已匯入 {count} 列（新增 {categories_added} 個分類、{items_added} 個項目），"
+          f"耗時 {time.perf_counter() - start:.2f} 秒，{rate(count):.0f} 列/秒", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())